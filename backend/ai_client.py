@@ -0,0 +1,102 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+from flask import current_app
+from cache import MemoryBackend
+
+# Shared plumbing for /api/ai: one pooled Groq client per process, a bounded gate
+# on concurrent LLM calls and a small LRU+TTL cache of finished answers. All of it
+# lives on an AIGate built per app by init_ai(), from that app's config.
+
+
+class AIBusyError(Exception):
+    pass
+
+
+class AIGate:
+
+    def __init__(self, api_key=None, base_url=None, model=None, request_timeout=30.0,
+                 max_concurrency=4, max_queue=8, queue_timeout=5.0, cache_size=256, cache_ttl=600):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.request_timeout = request_timeout
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.cache = MemoryBackend(cache_size)
+        self.cache_ttl = cache_ttl
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def client(self):
+        # The SDK keeps an HTTP connection pool, so build it once and share it
+        if self._client is None:
+            if not self.api_key:
+                raise RuntimeError("GROQ_API_KEY not set in environment")
+            with self._client_lock:
+                if self._client is None:
+                    # Imported on first use: the SDK (and pydantic under it) is a large
+                    # share of startup time and most workers rarely serve AI calls
+                    from groq import Groq
+                    self._client = Groq(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        timeout=self.request_timeout,
+                        max_retries=1,
+                    )
+        return self._client
+
+    def acquire(self):
+        # Waits up to AI_QUEUE_TIMEOUT for a free slot; refuses at once when the
+        # queue is already full, so AI traffic cannot pile up on every worker thread
+        with self._waiting_lock:
+            if self._waiting >= self.max_queue:
+                raise AIBusyError("AI assistant is busy, please retry shortly")
+            self._waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+        if not acquired:
+            raise AIBusyError("AI assistant is busy, please retry shortly")
+
+    def release(self):
+        # Safe outside an app context, e.g. from Response.call_on_close
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def init_ai(app):
+    gate = AIGate(
+        api_key=app.config.get("GROQ_API_KEY"),
+        base_url=app.config.get("GROQ_BASE_URL"),
+        model=app.config.get("GROQ_MODEL"),
+        request_timeout=app.config.get("AI_REQUEST_TIMEOUT", 30.0),
+        max_concurrency=app.config.get("AI_MAX_CONCURRENCY", 4),
+        max_queue=app.config.get("AI_MAX_QUEUE", 8),
+        queue_timeout=app.config.get("AI_QUEUE_TIMEOUT", 5.0),
+        cache_size=app.config.get("AI_CACHE_SIZE", 256),
+        cache_ttl=app.config.get("AI_CACHE_TTL", 600),
+    )
+    app.extensions["ai"] = gate
+    return gate
+
+
+def ai_gate():
+    return current_app.extensions["ai"]
+
+
+def cache_key(mode, prompt, context):
+    raw = "\x1f".join([mode, prompt, context])
+    return "ai:" + hashlib.sha256(raw.encode()).hexdigest()
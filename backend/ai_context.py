@@ -0,0 +1,117 @@
+from datetime import date
+from flask import current_app
+from sqlalchemy import case, func
+from models import db, Project, Task, TaskStatusEnum
+from cache import MemoryBackend
+
+# Project context for /api/ai prompts, capped at a token budget. Overdue and open
+# tasks are listed first (most recently changed first within each group), then
+# recently finished ones; whatever does not fit is summarised as status counts.
+# Built contexts are cached per project and dropped by invalidate_context() when
+# one of its tasks changes, so other projects keep their entries. The cache is
+# per app (init_ai_context) and per worker.
+
+
+def init_ai_context(app):
+    cache = MemoryBackend(app.config.get("AI_CONTEXT_CACHE_SIZE", 512))
+    app.extensions["ai_context"] = cache
+    return cache
+
+
+def _cache():
+    return current_app.extensions["ai_context"]
+
+
+def estimate_tokens(text):
+    # Close enough for English prompts without pulling in a tokenizer
+    return len(text) // 4 + 1
+
+
+def _truncate(text, max_tokens):
+    limit = max_tokens * 4
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def _task_line(t, today):
+    overdue = t.deadline and t.deadline < today and t.status != TaskStatusEnum.DONE
+    status = t.status.value if t.status else "N/A"
+    return f"- {t.title} | {status}{' (OVERDUE)' if overdue else ''} | Deadline: {t.deadline or 'N/A'}"
+
+
+def _prioritised_tasks(project_id, today, limit):
+    # Overdue, then in progress, then to do, then done; newest change first in each
+    priority = case(
+        (db.and_(Task.deadline < today, Task.status != TaskStatusEnum.DONE), 0),
+        (Task.status == TaskStatusEnum.IN_PROGRESS, 1),
+        (Task.status == TaskStatusEnum.DONE, 3),
+        else_=2,
+    )
+    return db.session.query(Task.title, Task.status, Task.deadline) \
+        .filter(Task.project_id == project_id) \
+        .order_by(priority, Task.updated_at.desc(), Task.id.desc()) \
+        .limit(limit).all()
+
+
+def _status_counts(project_id):
+    rows = db.session.query(Task.status, func.count(Task.id)) \
+        .filter(Task.project_id == project_id).group_by(Task.status).all()
+    return {status: count for status, count in rows}
+
+
+def build_context(project_id, budget=None):
+    budget = budget or current_app.config["AI_CONTEXT_TOKEN_BUDGET"]
+    p = db.session.query(Project.title, Project.description).filter(Project.id == project_id).first()
+    if not p:
+        return ""
+    today = date.today()
+
+    header = f"Project: {p.title}\nDescription: {_truncate(p.description or 'N/A', budget // 4)}\nTasks:"
+    used = estimate_tokens(header)
+    # Leave room for the summary line of tasks that did not fit
+    reserve = 40
+
+    lines, listed = [], {}
+    for t in _prioritised_tasks(project_id, today, current_app.config["AI_CONTEXT_MAX_TASKS"]):
+        line = _task_line(t, today)
+        cost = estimate_tokens(line)
+        if used + cost > budget - reserve:
+            break
+        lines.append(line)
+        used += cost
+        listed[t.status] = listed.get(t.status, 0) + 1
+
+    counts = _status_counts(project_id)
+    rest = [(s, counts.get(s, 0) - listed.get(s, 0)) for s in [*TaskStatusEnum, None]]
+    rest = [(s, n) for s, n in rest if n > 0]
+    if rest:
+        summary = ", ".join(f"{n} {s.value if s else 'N/A'}" for s, n in rest)
+        lines.append(f"(+ {sum(n for _, n in rest)} more tasks not listed: {summary})")
+    return header + "\n" + "\n".join(lines)
+
+
+def _project_id(project_id):
+    # JSON bodies and job payloads may carry "3" or 3; both must hit the same entry
+    try:
+        return int(project_id)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid project_id {project_id!r}")
+
+
+def project_context(project_id):
+    # Cached build_context(); the date is part of the key because overdue flags change daily
+    project_id = _project_id(project_id)
+    cache = _cache()
+    key = f"ctx:{project_id}:{cache.generation(project_id)}:{date.today().isoformat()}"
+    context = cache.get(key)
+    if context is None:
+        context = build_context(project_id)
+        cache.set(key, context, current_app.config["AI_CONTEXT_TTL"])
+    return context
+
+
+def invalidate_context(*project_ids):
+    # Per worker; other workers pick the change up within AI_CONTEXT_TTL
+    cache = _cache()
+    for project_id in project_ids:
+        if project_id:
+            cache.bump(_project_id(project_id))
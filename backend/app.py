@@ -1,79 +1,167 @@
+import logging
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
 from models import db
+from cache import init_cache
+from dbpool import dispose_after_fork
+from events import init_events
+from jobs import init_jobs
+from ratelimit import init_proxy, init_rate_limits
+from logs import init_logging
+from metrics import init_metrics
+from serializers import init_json
+from replicas import init_replicas
+from passwords import init_passwords
+from ai_client import init_ai
+from ai_context import init_ai_context
+
+logger = logging.getLogger(__name__)
+
+# Application factory. Building the app touches neither the database nor the
+# network, so every gunicorn worker (or a --preload master) starts fast; the
+# schema is managed separately with `python migrations.py` or `flask init-db`.
+# Production entry point: wsgi.py
+
+
+def create_app(config=Config):
+    # config: a class/object for app.config.from_object, or a dict of overrides on top of Config
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not Config:
+        app.config.from_object(config)
+
+    init_logging(app)
+    init_json(app)
+    # Before the other hooks so their time is part of the request latency
+    init_metrics(app)
+
+    # CORS for API
+    CORS(app, resources={
+        r"/api/*": {
+            "origins": "*",
+            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "X-Request-ID"],
+            "expose_headers": ["Content-Type", "Authorization", "ETag", "X-Request-ID", "X-Query-Count", "X-Query-Time-Ms"],
+            "supports_credentials": False
+        }
+    })
+
+    jwt = JWTManager(app)
+
+    @jwt.expired_token_loader
+    def expired_token_callback(jwt_header, jwt_payload):
+        return jsonify({"message": "Token has expired. Please login again."}), 401
+
+    @jwt.invalid_token_loader
+    def invalid_token_callback(error):
+        return jsonify({"message": "Invalid token. Please login again."}), 422
+
+    @jwt.unauthorized_loader
+    def unauthorized_callback(error):
+        return jsonify({"message": "Missing authorization token. Please login."}), 401
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({"message": "Token has been revoked"}), 401
+
+    db.init_app(app)
+    init_replicas(app)
+    init_cache(app)
+    init_events(app)
+    init_jobs(app)
+    init_proxy(app)
+    init_rate_limits(app)
+    init_passwords(app)
+    init_ai(app)
+    init_ai_context(app)
+    with app.app_context():
+        dispose_after_fork(db.engine)
+
+    register_blueprints(app)
+
+    @app.route("/")
+    def home():
+        return {"message": "Project Management API running", "status": "OK"}
+
+    @app.errorhandler(Exception)
+    def handle_error(error):
+        logger.exception("Unhandled error")
+        return {"message": f"Server error: {str(error)}"}, 500
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create missing tables and apply pending migrations."""
+        init_db(app)
+
+    return app
+
+
+def register_blueprints(app):
+    from routes.auth_routes import bp as auth_bp
+    from routes.project_routes import bp as projects_bp
+    from routes.task_routes import bp as tasks_bp
+    from routes.user_routes import bp as users_bp
+    from routes.comment_routes import bp as comments_bp
+    from routes.ai_routes import bp as ai_bp
+    from routes.diagnostics_routes import bp as diagnostics_bp
+    from routes.export_routes import bp as export_bp
+    from routes.dashboard_routes import bp as dashboard_bp
+    from routes.sync_routes import bp as sync_bp
+    from routes.event_routes import bp as events_bp
+    from routes.search_routes import bp as search_bp
+    from routes.job_routes import bp as jobs_bp
+    from routes.metrics_routes import bp as metrics_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(projects_bp)
+    app.register_blueprint(tasks_bp)
+    app.register_blueprint(users_bp)
+    app.register_blueprint(comments_bp)
+    app.register_blueprint(ai_bp)
+    app.register_blueprint(diagnostics_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(metrics_bp)
+
+
+def init_db(app):
+    # Deploy step, not part of worker boot
+    import migrations
+
+    with app.app_context():
+        db.create_all()
+        applied = migrations.upgrade(db.engine)
+        logger.info("Database schema ready", extra={"migrations_applied": applied})
+    return applied
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `from app import app` and `gunicorn app:app` keep working; the app is
+    # only built when something asks for it
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# CORS for API
-CORS(app, resources={
-    r"/api/*": {
-        "origins": "*",
-        "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": False
-    }
-})
-
-jwt = JWTManager(app)
-
-@jwt.expired_token_loader
-def expired_token_callback(jwt_header, jwt_payload):
-    return jsonify({"message": "Token has expired. Please login again."}), 401
-
-@jwt.invalid_token_loader
-def invalid_token_callback(error):
-    return jsonify({"message": "Invalid token. Please login again."}), 422
-
-@jwt.unauthorized_loader
-def unauthorized_callback(error):
-    return jsonify({"message": "Missing authorization token. Please login."}), 401
-
-@jwt.revoked_token_loader
-def revoked_token_callback(jwt_header, jwt_payload):
-    return jsonify({"message": "Token has been revoked"}), 401
-
-db.init_app(app)
-
-with app.app_context():
-    db.create_all()
-    print("=" * 60)
-    print("Database tables created successfully!")
-    print("=" * 60)
-
-# Import and register blueprints
-from routes.auth_routes import bp as auth_bp
-from routes.project_routes import bp as projects_bp
-from routes.task_routes import bp as tasks_bp
-from routes.user_routes import bp as users_bp
-from routes.comment_routes import bp as comments_bp
-from routes.ai_routes import bp as ai_bp  # NEW
-
-app.register_blueprint(auth_bp)
-app.register_blueprint(projects_bp)
-app.register_blueprint(tasks_bp)
-app.register_blueprint(users_bp)
-app.register_blueprint(comments_bp)
-app.register_blueprint(ai_bp)  # NEW
-
-@app.route("/")
-def home():
-    return {"message": "Project Management API running", "status": "OK"}
-
-@app.errorhandler(Exception)
-def handle_error(error):
-    print(f"Unhandled Error: {str(error)}")
-    import traceback
-    traceback.print_exc()
-    return {"message": f"Server error: {str(error)}"}, 500
 
 if __name__ == "__main__":
     import os
+    application = create_app()
+    # Local development: bring the schema up to date before serving
+    init_db(application)
     port = int(os.getenv("PORT", 5000))
-    print("=" * 60)
-    print("🚀 Starting Flask Server...")
-    print("=" * 60)
-    app.run(debug=True, host="0.0.0.0", port=port)
+    logger.info("Starting Flask server", extra={"port": port})
+    application.run(debug=True, host="0.0.0.0", port=port)
@@ -0,0 +1,322 @@
+# Latency percentiles, throughput, SQL statements per request and peak RSS for
+# the main API endpoints on a seeded database, driven through the Flask test
+# client or over HTTP at several client concurrencies. The AI endpoint talks
+# to benchmarks/fake_groq.py, so no key or network is needed.
+#
+# Usage (from backend/):
+#   python -m benchmarks.api_benchmark
+#   python -m benchmarks.api_benchmark --mode http --concurrency 1,8,32
+#   python -m benchmarks.api_benchmark --tasks 100000 --comments 1000000 --only tasks,comments
+#   python -m benchmarks.api_benchmark --save-baseline bench.json
+#   python -m benchmarks.api_benchmark --baseline bench.json     # exit code 1 on regressions
+#   python -m benchmarks.api_benchmark --db mysql+pymysql://user:pw@localhost/pm_bench --reuse
+#   python -m benchmarks.api_benchmark --url http://127.0.0.1:5000 --reuse   # a running server
+#
+# Without --reuse the target database is a scratch database: all tables are
+# dropped and reseeded. --reuse and --url expect a database seeded by
+# benchmarks/seed.py with the same --users/--projects/--tasks counts.
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+from benchmarks.seed import seed, SEED_PASSWORD
+from benchmarks.fake_groq import start_fake_groq
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# build(rng, scale, n) -> (path, JSON body or None); n is unique per request
+Scenario = namedtuple("Scenario", "name role method build")
+
+SCENARIOS = [
+    Scenario("auth.login", None, "POST", lambda rng, s, n: (
+        "/api/auth/login", {"email": f"user{rng.randint(1, s.users)}@example.com", "password": SEED_PASSWORD})),
+    Scenario("projects.list", "ADMIN", "GET", lambda rng, s, n: ("/api/projects/?limit=50", None)),
+    Scenario("projects.metrics", "ADMIN", "GET", lambda rng, s, n: (
+        f"/api/projects/{rng.randint(1, s.projects)}/metrics", None)),
+    Scenario("tasks.list", "ADMIN", "GET", lambda rng, s, n: ("/api/tasks/?limit=50", None)),
+    Scenario("tasks.list.developer", "DEVELOPER", "GET", lambda rng, s, n: ("/api/tasks/?limit=50", None)),
+    Scenario("tasks.create", "MANAGER", "POST", lambda rng, s, n: ("/api/tasks/", {
+        "title": f"Benchmark task {n}",
+        "project_id": rng.randint(1, s.projects),
+        "assigned_to": rng.randint(1, s.users)})),
+    Scenario("tasks.status", "ADMIN", "PATCH", lambda rng, s, n: (
+        f"/api/tasks/{rng.randint(1, s.tasks)}/status", {"status": rng.choice(["TODO", "IN_PROGRESS", "DONE"])})),
+    Scenario("comments.list", "ADMIN", "GET", lambda rng, s, n: (f"/api/comments/task/{rng.randint(1, s.tasks)}", None)),
+    Scenario("comments.create", "DEVELOPER", "POST", lambda rng, s, n: (
+        f"/api/comments/task/{rng.randint(1, s.tasks)}", {"content": f"Benchmark comment {n}"})),
+    Scenario("users.list", "ADMIN", "GET", lambda rng, s, n: ("/api/users/", None)),
+    # A fresh prompt every time so the answer cache never short-circuits the model call
+    Scenario("ai.assist", "ADMIN", "POST", lambda rng, s, n: ("/api/ai/assist", {
+        "prompt": f"Summarise the project status, request {n}",
+        "project_id": rng.randint(1, s.projects),
+        "mode": "summary"})),
+]
+
+
+class TestClientSession:
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body, headers):
+        r = self.client.open(path, method=method, json=body, headers=headers)
+        return r.status_code, r.headers.get("X-Query-Count"), r.get_data()
+
+
+class HttpSession:
+    # One keep-alive connection per client thread
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = None
+
+    def request(self, method, path, body, headers):
+        headers = dict(headers, **{"Content-Type": "application/json"})
+        payload = json.dumps(body) if body is not None else None
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                r = self.conn.getresponse()
+                data = r.read()
+                return r.status, r.getheader("X-Query-Count"), data
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed an idle keep-alive connection; retry once on a new one
+                self.conn.close()
+                self.conn = None
+                if attempt == 2:
+                    raise
+
+
+def start_http_server(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, name="bench-http", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def build_app(args, groq_url):
+    from models import db
+
+    uri = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "api_bench.db")
+    overrides = {
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "RESPONSE_CACHE_BACKEND": args.cache,
+        "RATE_LIMIT_BACKEND": "off",
+        "JOBS_WORKERS": 0,
+        "METRICS_QUERY_HEADER": True,
+        "LOG_LEVEL": args.log_level,
+        "GROQ_BASE_URL": groq_url,
+        "GROQ_API_KEY": "fake",
+    }
+    if uri.startswith("sqlite"):
+        overrides["SQLALCHEMY_ENGINE_OPTIONS"] = {}
+    from app import create_app
+
+    app = create_app(overrides)
+    with app.app_context():
+        if not args.reuse:
+            print(f"Seeding {uri} ...")
+            started = time.perf_counter()
+            db.drop_all()
+            db.create_all()
+            seed(users=args.users, projects=args.projects, tasks=args.tasks, comments=args.comments)
+            print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    return app
+
+
+def login_tokens(session):
+    # An admin (user 1 in seed.py) plus the first seeded manager and developer
+    def login(email):
+        status, _, data = session.request("POST", "/api/auth/login", {"email": email, "password": SEED_PASSWORD}, {})
+        if status != 200:
+            raise SystemExit(f"Login as {email} failed with {status}: {data[:200]!r}")
+        return json.loads(data)["access_token"]
+
+    tokens = {"ADMIN": login("user1@example.com")}
+    _, _, data = session.request("GET", "/api/users/", None, {"Authorization": f"Bearer {tokens['ADMIN']}"})
+    users = json.loads(data)
+    for role in ("MANAGER", "DEVELOPER"):
+        user = next(u for u in users if u["role"].upper() == role)
+        tokens[role] = login(user["email"])
+    return tokens
+
+
+def percentile(values, q):
+    # Nearest-rank on an already sorted list
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_scenario(scenario, sessions, tokens, scale, total, warmup, counter):
+    headers = {"Authorization": f"Bearer {tokens[scenario.role]}"} if scenario.role else {}
+    samples = []
+    lock = threading.Lock()
+
+    def client_loop(n, session, count):
+        rng = random.Random(n)
+        local = []
+        for _ in range(count):
+            path, body = scenario.build(rng, scale, next(counter))
+            started = time.perf_counter()
+            status, queries, _ = session.request(scenario.method, path, body, headers)
+            local.append((time.perf_counter() - started, status, queries))
+        with lock:
+            samples.extend(local)
+
+    client_loop(-1, sessions[0], warmup)
+    samples.clear()
+
+    threads = len(sessions)
+    counts = [total // threads + (1 if n < total % threads else 0) for n in range(threads)]
+    workers = [threading.Thread(target=client_loop, args=(n, sessions[n], counts[n])) for n in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    queries = [int(s[2]) for s in samples if s[2] is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s[1] >= 400),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50": round(percentile(latencies, 50), 2),
+        "p95": round(percentile(latencies, 95), 2),
+        "p99": round(percentile(latencies, 99), 2),
+        "queries": round(sum(queries) / len(queries), 1) if queries else None,
+        "rss_mb": round(peak_rss_mb(), 1) if resource is not None else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Latency regressions need to clear both the tolerance and 1 ms of noise;
+    # any increase in statements per request is a regression
+    regressions = []
+    print(f"\n=== against baseline (tolerance {tolerance:.0%}) ===")
+    for key, now in results.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f"{key:<30} new")
+            continue
+        change = (now["p95"] - before["p95"]) / before["p95"] if before["p95"] else 0.0
+        flags = []
+        if now["p95"] > before["p95"] * (1 + tolerance) and now["p95"] - before["p95"] > 1.0:
+            flags.append("p95")
+        if now["queries"] is not None and before["queries"] is not None and now["queries"] > before["queries"] + 0.5:
+            flags.append("queries")
+        if flags:
+            regressions.append(key)
+        print(f"{key:<30} p95 {before['p95']:>8.2f} -> {now['p95']:>8.2f} ({change:+.0%})  "
+              f"queries {before['queries']} -> {now['queries']}  {'REGRESSION: ' + ', '.join(flags) if flags else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API endpoint benchmark on a seeded database")
+    parser.add_argument("--mode", choices=["client", "http"], default="client",
+                        help="Flask test client, or HTTP against a local threaded server")
+    parser.add_argument("--url", help="benchmark a running server over HTTP instead (implies --mode http)")
+    parser.add_argument("--db", help="SQLAlchemy URI (default: temp SQLite file)")
+    parser.add_argument("--reuse", action="store_true", help="use the already seeded --db as is")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--comments", type=int, default=30000)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated client threads")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and concurrency")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", help="comma separated endpoint names or prefixes, e.g. tasks,auth.login")
+    parser.add_argument("--cache", default="off", choices=["off", "memory"], help="GET response cache")
+    parser.add_argument("--groq-delay", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--log-level", default="ERROR")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="write these results as JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown against the baseline")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",") if w.strip()]
+        scenarios = [s for s in SCENARIOS if any(s.name == w or s.name.startswith(w + ".") for w in wanted)]
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+
+    if args.url:
+        base_url, mode = args.url.rstrip("/"), "http"
+    else:
+        _, groq_url = start_fake_groq(args.groq_delay)
+        app = build_app(args, groq_url)
+        mode = args.mode
+        base_url = start_http_server(app) if mode == "http" else None
+
+    def new_session():
+        return HttpSession(base_url) if base_url else TestClientSession(app)
+
+    tokens = login_tokens(new_session())
+    counter = itertools.count()
+
+    print(f"mode {mode}, {args.users} users, {args.projects} projects, {args.tasks} tasks, "
+          f"{args.comments} comments, response cache {args.cache}")
+    print(f"{'endpoint':<22} {'conc':>4} {'reqs':>5} {'err':>4} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7} {'rss MB':>7}")
+    results = {}
+    for scenario in scenarios:
+        for threads in concurrencies:
+            sessions = [new_session() for _ in range(threads)]
+            r = run_scenario(scenario, sessions, tokens, args, args.requests, args.warmup, counter)
+            results[f"{scenario.name}@{threads}"] = r
+            print(f"{scenario.name:<22} {threads:>4} {r['requests']:>5} {r['errors']:>4} {r['rps']:>8.1f} "
+                  f"{r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} "
+                  f"{'-' if r['queries'] is None else r['queries']:>7} {'-' if r['rss_mb'] is None else r['rss_mb']:>7}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"mode": mode, "scale": [args.users, args.projects, args.tasks, args.comments],
+                       "results": results}, f, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("mode") != mode or baseline.get("scale") != [args.users, args.projects, args.tasks, args.comments]:
+            print(f"\nNote: baseline was recorded with mode {baseline.get('mode')} and scale {baseline.get('scale')}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
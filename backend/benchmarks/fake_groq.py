@@ -0,0 +1,91 @@
+# Stand-in for the Groq chat completions API so the AI endpoints can be
+# benchmarked without a key, network or per-token cost. Answers every request
+# after a fixed delay (the "model time"), streaming or not. The server counts the
+# requests it got and the most it had in flight at once (requests, peak).
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = "Here is a short, deterministic answer from the fake model."
+STORIES = {"stories": [
+    {"title": "As a user, I can log in", "description": "Login with email and password"},
+    {"title": "As a manager, I can export tasks", "description": "CSV export of the task list"},
+]}
+
+
+def _completion(content):
+    return {
+        "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(content):
+    return {
+        "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": "fake",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.05
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            self._answer(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _answer(self, body):
+        time.sleep(self.delay)
+        prompt = json.dumps(body.get("messages", []))
+        content = json.dumps(STORIES) if "user stories" in prompt.lower() else ANSWER
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in content.split(" "):
+                self.wfile.write(f"data: {json.dumps(_chunk(word + ' '))}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+            return
+
+        data = json.dumps(_completion(content)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_groq(delay=0.05, port=0):
+    # Returns the running server and the base URL to put in GROQ_BASE_URL
+    handler = type("Handler", (FakeGroqHandler,), {"delay": delay})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = server.active = server.peak = 0
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    import sys
+    server, url = start_fake_groq(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Fake Groq listening on {url}")
+    threading.Event().wait()
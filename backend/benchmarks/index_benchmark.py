@@ -0,0 +1,122 @@
+# Query plans and latency for the hot filter queries before and after the
+# migration-1 composite indexes.
+#
+# Usage (from backend/):
+#   python -m benchmarks.index_benchmark --tasks 100000 --comments 300000
+#   python -m benchmarks.index_benchmark --db mysql+pymysql://user:pw@localhost/pm_bench
+#
+# The target database is a scratch database: all tables are dropped first.
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+from flask import Flask
+from sqlalchemy import case, func, select, text
+import migrations
+from models import db, Task, Comment, TaskStatusEnum
+from benchmarks.seed import seed
+
+V1_INDEXES = [
+    "ix_task_assigned_status",
+    "ix_task_project_status_deadline",
+    "ix_task_created_id",
+    "ix_project_created_id",
+    "ix_comment_task_created",
+]
+
+
+def hot_queries():
+    today = date.today()
+    overdue = case((Task.deadline < today, 1), else_=0)
+    return {
+        "developer tasks by status": select(Task.id, Task.title)
+            .where(Task.assigned_to == 7, Task.status == TaskStatusEnum.IN_PROGRESS),
+        "project metrics": select(Task.status, func.count(Task.id), func.sum(overdue))
+            .where(Task.project_id == 3).group_by(Task.status),
+        "project overdue": select(func.count(Task.id))
+            .where(Task.project_id == 3, Task.status != TaskStatusEnum.DONE, Task.deadline < today),
+        "task comments page": select(Comment.id, Comment.content)
+            .where(Comment.task_id == 42)
+            .order_by(Comment.created_at.desc(), Comment.id.desc()).limit(50),
+        "task listing page": select(Task.id, Task.title)
+            .order_by(Task.created_at, Task.id).limit(50),
+    }
+
+
+def explain(conn, stmt):
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    return [" | ".join(str(col) for col in row) for row in conn.execute(text(prefix + sql))]
+
+
+def measure(conn, stmt, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(stmt).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def report(label, runs):
+    print(f"\n=== {label} ===")
+    results = {}
+    with db.engine.connect() as conn:
+        for name, stmt in hot_queries().items():
+            results[name] = measure(conn, stmt, runs)
+            print(f"\n{name}: median {results[name]:.2f} ms")
+            for line in explain(conn, stmt):
+                print(f"    {line}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index benchmark for the hot task and comment queries")
+    parser.add_argument("--db", help="SQLAlchemy URI of a scratch database (default: temp SQLite file)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--comments", type=int, default=150000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    uri = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "index_bench.db")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.drop_all()
+        migrations.schema_version.drop(db.engine, checkfirst=True)
+        db.create_all()
+        # Start from the pre-migration schema
+        indexes = {ix.name: ix for t in db.metadata.tables.values() for ix in t.indexes}
+        for name in V1_INDEXES:
+            indexes[name].drop(db.engine)
+
+        print(f"Seeding {uri} ...")
+        started = time.perf_counter()
+        seed(users=args.users, projects=args.projects, tasks=args.tasks, comments=args.comments)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+        if db.engine.dialect.name == "sqlite":
+            with db.engine.begin() as conn:
+                conn.execute(text("ANALYZE"))
+
+        before = report("before migration", args.runs)
+        migrations.upgrade(db.engine)
+        if db.engine.dialect.name == "sqlite":
+            with db.engine.begin() as conn:
+                conn.execute(text("ANALYZE"))
+        after = report("after migration", args.runs)
+
+        print("\n=== summary (median ms) ===")
+        for name in before:
+            speedup = before[name] / after[name] if after[name] else float("inf")
+            print(f"{name:<28} {before[name]:>9.2f} -> {after[name]:>9.2f}  ({speedup:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Logins per second through /api/auth/login for the configured password hash
+# method, at several client concurrencies, normalised per CPU core.
+#
+# Usage (from backend/):
+#   python -m benchmarks.login_benchmark
+#   python -m benchmarks.login_benchmark --method pbkdf2:sha256:600000 --threads 1,4,16
+#
+# Runs against a temp SQLite database with rate limiting off.
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from config import Config
+from models import db, User
+from cache import init_cache
+from ratelimit import init_rate_limits
+from passwords import init_passwords, hash_method, hash_password
+from benchmarks.seed import seed, SEED_PASSWORD
+
+
+def build_app(uri, method=None):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {}
+    if method:
+        app.config["PASSWORD_HASH_METHOD"] = method
+    db.init_app(app)
+    JWTManager(app)
+    init_cache(app, backend=None)
+    app.config["RATE_LIMIT_BACKEND"] = "off"
+    init_rate_limits(app)
+    init_passwords(app)
+
+    from routes.auth_routes import bp as auth_bp
+    app.register_blueprint(auth_bp)
+    return app
+
+
+def run_logins(app, users, threads, duration):
+    done, failed = [0] * threads, [0] * threads
+    stop = time.perf_counter() + duration
+
+    def client_loop(n):
+        client = app.test_client()
+        rng = random.Random(n)
+        while time.perf_counter() < stop:
+            email = f"user{rng.randint(1, users)}@example.com"
+            r = client.post("/api/auth/login", json={"email": email, "password": SEED_PASSWORD})
+            if r.status_code == 200:
+                done[n] += 1
+            else:
+                failed[n] += 1
+
+    workers = [threading.Thread(target=client_loop, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    return sum(done) / elapsed, sum(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput benchmark")
+    parser.add_argument("--method", help="werkzeug hash method (default: PASSWORD_HASH_METHOD)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--threads", default="1,2,4,8", help="comma separated client concurrencies")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    args = parser.parse_args()
+
+    uri = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "login_bench.db")
+    app = build_app(uri, args.method)
+    cores = os.cpu_count() or 1
+
+    with app.app_context():
+        db.create_all()
+        seed(users=args.users, projects=0, tasks=0, comments=0)
+        # Every seeded user gets a hash made with the method under test
+        password_hash = hash_password(SEED_PASSWORD)
+        db.session.query(User).update({User.password_hash: password_hash})
+        db.session.commit()
+        method = hash_method()
+
+    print(f"method {method}, {app.config['PASSWORD_HASH_WORKERS']} hash workers, {cores} cores")
+    print(f"{'clients':>8} {'logins/s':>10} {'per core':>10} {'failed':>7}")
+    for threads in [int(t) for t in args.threads.split(",")]:
+        rate, failed = run_logins(app, args.users, threads, args.duration)
+        print(f"{threads:>8} {rate:>10.1f} {rate / cores:>10.1f} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Time and memory of the large unpaginated list responses (tasks, projects,
+# users and the comments of one task) with each JSON provider. Seeds ROWS rows of
+# every kind into a scratch database, all comments on task 1, and serves the
+# requests in-process with the response cache off. Memory is the tracemalloc
+# peak while one request is served, measured in a separate pass because
+# tracing slows everything else down.
+#
+# Usage (from backend/):
+#   python -m benchmarks.serialization_benchmark
+#   python -m benchmarks.serialization_benchmark --rows 50000 --runs 5 --json default,orjson
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from benchmarks.seed import _insert, seed, SEED_PASSWORD
+
+ENDPOINTS = [
+    ("tasks.list", "/api/tasks/"),
+    ("projects.list", "/api/projects/"),
+    ("users.list", "/api/users/"),
+    ("comments.list", "/api/comments/task/1"),
+]
+
+
+def build_app(db_uri, provider):
+    overrides = {
+        "SQLALCHEMY_DATABASE_URI": db_uri,
+        "RESPONSE_CACHE_BACKEND": "off",
+        "RATE_LIMIT_BACKEND": "off",
+        "JOBS_WORKERS": 0,
+        "METRICS_ENABLED": False,
+        "LOG_LEVEL": "ERROR",
+        "JSON_PROVIDER": provider,
+    }
+    if db_uri.startswith("sqlite"):
+        overrides["SQLALCHEMY_ENGINE_OPTIONS"] = {}
+    from app import create_app
+
+    return create_app(overrides)
+
+
+def seed_rows(app, rows):
+    import migrations
+    from models import db, Comment
+
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade(db.engine)
+        seed(users=rows, projects=rows, tasks=rows, comments=0)
+        start = datetime(2024, 1, 1)
+        _insert(Comment, ({
+            "id": i,
+            "content": f"Seeded comment {i}",
+            "task_id": 1,
+            "user_id": i % rows + 1,
+            "created_at": start + timedelta(seconds=i * 10),
+        } for i in range(1, rows + 1)), 5000)
+
+
+def measure(app, url, headers, runs):
+    client = app.test_client()
+    times = []
+    for _ in range(runs + 1):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        times.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.data[:200]
+    size = len(response.data)
+
+    tracemalloc.start()
+    client.get(url, headers=headers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The first run warms the query cache and the connection pool
+    return statistics.median(times[1:]), peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Large list response benchmark")
+    parser.add_argument("--rows", type=int, default=50000, help="users, projects, tasks and comments each")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", default="default,orjson", help="comma-separated JSON_PROVIDER values")
+    parser.add_argument("--db", help="existing database seeded by a previous run (--rows must match)")
+    args = parser.parse_args()
+
+    db_uri = args.db
+    if not db_uri:
+        db_uri = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "serialization.db")
+        started = time.perf_counter()
+        seed_rows(build_app(db_uri, "default"), args.rows)
+        print(f"Seeded {args.rows} rows per table in {time.perf_counter() - started:.1f}s")
+
+    print(f"{'endpoint':<16} {'json':<8} {'median ms':>10} {'peak MB':>9} {'body MB':>9}")
+    for provider in args.json.split(","):
+        app = build_app(db_uri, provider)
+        token = app.test_client().post("/api/auth/login", json={
+            "email": "user1@example.com", "password": SEED_PASSWORD}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for name, url in ENDPOINTS:
+            median, peak, size = measure(app, url, headers, args.runs)
+            print(f"{name:<16} {provider:<8} {median * 1000:>10.1f} {peak / 2**20:>9.1f} {size / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Cold start cost of a web worker: imports, create_app() and the first request,
+# each measured in a fresh interpreter, plus import time per top-level package
+# from python -X importtime. Builds the app exactly as wsgi.py does and never
+# connects to the database.
+#
+# Usage (from backend/):
+#   python -m benchmarks.startup_benchmark
+#   python -m benchmarks.startup_benchmark --runs 20 --top 15
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get("/").status_code
+served = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": served - created,
+    "status": status,
+    "groq_loaded": "groq" in sys.modules,
+}))
+"""
+
+
+def child_env():
+    # No job worker threads or log lines from the measured processes
+    return dict(os.environ, JOBS_WORKERS="0", LOG_LEVEL="ERROR", PYTHONDONTWRITEBYTECODE="")
+
+
+def run_once():
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND, env=child_env(),
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - started
+    return result
+
+
+def import_times():
+    # Self time summed per top-level package, in ms
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "from app import create_app; create_app()"],
+                         cwd=BACKEND, env=child_env(), capture_output=True, text=True, check=True)
+    totals = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us) / 1000
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker cold start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="packages to list by import time")
+    args = parser.parse_args()
+
+    run_once()  # warm the OS file cache and bytecode
+    runs = [run_once() for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts, groq imported at startup: {runs[0]['groq_loaded']}")
+    print(f"{'phase':<16} {'median ms':>10} {'max ms':>10}")
+    for phase in ("import", "create_app", "first_request", "process"):
+        values = [r[phase] * 1000 for r in runs]
+        print(f"{phase:<16} {statistics.median(values):>10.1f} {max(values):>10.1f}")
+
+    totals = import_times()
+    print(f"\nimport time by package (self, ms), total {sum(totals.values()):.1f}")
+    for package, ms in sorted(totals.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {package:<28} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import hashlib
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from identity import current_role
+from replicas import pin_namespaces, primary_after_write
+
+# Response cache for GET endpoints. Entries are keyed on the caller's role (and
+# user id for Developers, whose data is scoped), the full request path and a
+# generation counter per data namespace ("tasks", "projects", ...). Writes call
+# invalidate(namespace), which bumps the counter so older entries are never read
+# again and simply age out.
+
+
+class MemoryBackend:
+    # Per-process LRU with TTL. Generations are per worker too, so with several
+    # gunicorn workers a write is only seen by other workers after the TTL: as a
+    # response cache it is for single-worker deployments; use redis otherwise.
+
+    def __init__(self, max_size=2048):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        # Kept apart from the LRU so a counter can never be evicted and reset
+        self._generations = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    # Shared across workers; any client with the redis-py get/set/incr API works,
+    # so tests can pass a local stand-in such as fakeredis. Entries carry a TTL and
+    # counters do not, so a volatile-* maxmemory policy never evicts a counter.
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url):
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=ttl)
+
+    def generation(self, namespace):
+        return int(self.client.get(f"gen:{namespace}") or 0)
+
+    def bump(self, namespace):
+        self.client.incr(f"gen:{namespace}")
+
+
+def init_cache(app, backend=None):
+    if backend is None:
+        kind = app.config.get("RESPONSE_CACHE_BACKEND", "off")
+        if kind == "redis":
+            backend = RedisBackend.from_url(app.config["RESPONSE_CACHE_REDIS_URL"])
+        elif kind == "memory":
+            backend = MemoryBackend(app.config.get("RESPONSE_CACHE_SIZE", 2048))
+        else:
+            backend = None  # "off"
+    app.extensions["response_cache"] = backend
+    return backend
+
+
+def _backend():
+    return current_app.extensions.get("response_cache")
+
+
+def generation(namespace):
+    # Current generation of a namespace, or None when caching is off
+    backend = _backend()
+    return backend.generation(namespace) if backend is not None else None
+
+
+def invalidate(*namespaces):
+    backend = _backend()
+    if backend is None:
+        return
+    for namespace in namespaces:
+        backend.bump(namespace)
+    pin_namespaces(namespaces)
+
+
+def _cache_key(backend, role, namespaces):
+    scope = f"{role}:{get_jwt_identity()}" if role == "DEVELOPER" else role
+    generations = ",".join(f"{ns}={backend.generation(ns)}" for ns in namespaces)
+    raw = f"{scope}|{request.full_path}|{generations}"
+    return "resp:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached_response(*namespaces):
+    # Caches successful JSON GET responses and answers If-None-Match with 304.
+    # Must sit below @jwt_required() so the caller is known.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = _backend()
+            role = current_role() if backend is not None else None
+            if backend is None or role is None:
+                return view(*args, **kwargs)
+
+            key = _cache_key(backend, role, namespaces)
+            cached = backend.get(key)
+            if cached is not None:
+                etag, body = cached.split(b"\n", 1)
+                response = current_app.response_class(body, mimetype="application/json")
+                response.headers["X-Cache"] = "HIT"
+                etag = etag.decode()
+            else:
+                primary_after_write(namespaces)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.mimetype != "application/json":
+                    return response
+                body = response.get_data()
+                etag = hashlib.sha256(body).hexdigest()
+                backend.set(key, etag.encode() + b"\n" + body, current_app.config.get("RESPONSE_CACHE_TTL", 300))
+                response.headers["X-Cache"] = "MISS"
+
+            response.set_etag(etag)
+            # Let browsers keep the body but revalidate every time
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
@@ -1,7 +1,9 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
+from dbpool import InstrumentedQueuePool
 
 load_dotenv()
 
@@ -27,4 +29,137 @@ class Config:
     # --- END CORRECTED LOGIC ---
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
\ No newline at end of file
+
+    # Connection pool, per gunicorn worker process. Keep
+    # WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below MySQL max_connections.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        # Recycle before MySQL's wait_timeout (or a proxy idle timeout) drops the connection
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "280")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "connect_args": {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10"))},
+    }
+
+    # Per-process cache of user id -> role used by identity.current_role(); 0 disables it
+    ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", "60"))
+    ROLE_CACHE_SIZE = int(os.getenv("ROLE_CACHE_SIZE", "1024"))
+
+    # /api/sync only returns changes older than this many seconds, so a transaction
+    # that commits after a cursor was issued cannot land behind it unseen. Must
+    # exceed the longest write transaction plus clock skew between app servers.
+    SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "2"))
+
+    # GET response cache: "redis" (shared), "memory" or "off". Off unless a redis URL
+    # is configured: memory entries are per worker and invalidations do not reach the
+    # other workers, so "memory" is only safe with a single worker process
+    RESPONSE_CACHE_BACKEND = os.getenv(
+        "RESPONSE_CACHE_BACKEND", "redis" if os.getenv("RESPONSE_CACHE_REDIS_URL") else "off")
+    RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+
+    # /api/events pub/sub: "memory" (per worker) or "redis" (shared across workers)
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+    EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+    EVENTS_HEARTBEAT = int(os.getenv("EVENTS_HEARTBEAT", "15"))
+    EVENTS_BUFFER = int(os.getenv("EVENTS_BUFFER", "1000"))
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+    # Lifetime of the ?ticket= from POST /api/events/ticket
+    EVENTS_TICKET_TTL = int(os.getenv("EVENTS_TICKET_TTL", "60"))
+
+    # /api/search: "auto" uses MySQL FULLTEXT when available, else the in-process index
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+    SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", "30"))
+
+    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    # Point at a local fake server in tests; None means the SDK default
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+    GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+    # /api/ai/assist limits, per worker process
+    AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+    AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "8"))
+    AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "5"))
+    AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "30"))
+    AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", "600"))
+    AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "256"))
+    AI_CONTEXT_MAX_TASKS = int(os.getenv("AI_CONTEXT_MAX_TASKS", "200"))
+    # Rough token cap on the project context sent with each prompt
+    AI_CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "1500"))
+    AI_CONTEXT_TTL = int(os.getenv("AI_CONTEXT_TTL", "300"))
+    AI_CONTEXT_CACHE_SIZE = int(os.getenv("AI_CONTEXT_CACHE_SIZE", "512"))
+
+    # Background jobs (jobs.py). JOBS_WORKERS threads run inside each web process;
+    # set it to 0 there and run `python jobs.py` to keep jobs off the web workers.
+    JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+    JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "2"))
+    JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+    JOBS_RETRY_BACKOFF = float(os.getenv("JOBS_RETRY_BACKOFF", "5"))
+    JOBS_STALE_AFTER = int(os.getenv("JOBS_STALE_AFTER", "600"))
+    JOBS_PER_USER_ACTIVE = int(os.getenv("JOBS_PER_USER_ACTIVE", "5"))
+    JOBS_PER_USER_RUNNING = int(os.getenv("JOBS_PER_USER_RUNNING", "2"))
+    JOBS_IMPORT_LIMIT = int(os.getenv("JOBS_IMPORT_LIMIT", "100000"))
+    JOBS_IMPORT_BATCH = int(os.getenv("JOBS_IMPORT_BATCH", "1000"))
+    # Finished jobs and their result files are deleted this many seconds after they end
+    JOBS_RETENTION = int(os.getenv("JOBS_RETENTION", str(7 * 24 * 3600)))
+    # Export files; must be shared storage when workers run on other hosts
+    JOBS_RESULT_DIR = os.getenv("JOBS_RESULT_DIR", os.path.join(tempfile.gettempdir(), "pm-job-results"))
+
+    # Password hashing (passwords.py). Any werkzeug method string; stored hashes
+    # made with another method are upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:260000")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "5"))
+
+    # Login/register rate limits per window (ratelimit.py): memory | redis | off
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    # Number of our own proxies in front of the app that append to X-Forwarded-For
+    # (1 on Railway). 0 trusts none: behind a proxy all clients then share its IP.
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+    LOGIN_LIMIT_WINDOW = int(os.getenv("LOGIN_LIMIT_WINDOW", "60"))
+    # Logins count failed attempts only; registrations count every attempt
+    LOGIN_LIMIT_PER_IP = int(os.getenv("LOGIN_LIMIT_PER_IP", "30"))
+    LOGIN_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_LIMIT_PER_EMAIL", "10"))
+
+    # Logging (logs.py). LOG_LEVELS overrides single loggers, e.g.
+    # "sqlalchemy.engine=INFO,jobs=DEBUG"; LOG_DEBUG_SAMPLE keeps that fraction of DEBUG lines.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "1.0"))
+
+    # Request/SQL metrics (metrics.py), served on /metrics. METRICS_QUERY_HEADER adds
+    # X-Query-Count / X-Query-Time-Ms to every response, for development and tests.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    METRICS_QUERY_HEADER = os.getenv("METRICS_QUERY_HEADER", "false").lower() == "true"
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+    # Set-based deletes (deletes.py): rows per batch and transaction, and the task
+    # count above which a project is deleted by a background job
+    DELETE_BATCH = int(os.getenv("DELETE_BATCH", "1000"))
+    DELETE_INLINE_TASKS = int(os.getenv("DELETE_INLINE_TASKS", "20000"))
+
+    # JSON encoding of responses (serializers.py): auto uses orjson when installed,
+    # default keeps Flask's json-module provider
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+
+    # Read replicas (replicas.py), comma-separated URIs; empty sends everything to the
+    # primary. A caller's reads stay on the primary for REPLICA_PIN_SECONDS after a
+    # write (pins per worker with REPLICA_PIN_BACKEND=memory, shared with redis).
+    # REPLICA_MAX_LAG (seconds, MySQL, 0 = off) takes lagging replicas out of rotation.
+    SQLALCHEMY_REPLICA_URIS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "5"))
+    REPLICA_PIN_BACKEND = os.getenv("REPLICA_PIN_BACKEND", "memory")
+    REPLICA_PIN_REDIS_URL = os.getenv("REPLICA_PIN_REDIS_URL", RESPONSE_CACHE_REDIS_URL)
+    REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "0"))
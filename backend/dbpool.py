@@ -0,0 +1,76 @@
+import os
+import time
+import weakref
+from threading import Lock
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    # QueuePool that also records how long checkouts wait for a free connection
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            stats.update({
+                "checkouts": pool.checkouts,
+                "wait_ms_avg": round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                "wait_ms_max": round(pool.wait_max * 1000, 3),
+                "timeouts": pool.timeouts,
+            })
+    return stats
+
+
+# Engines to reset in a forked child. Weak, so an app (or a test's engine) that
+# is dropped is not kept alive by its fork hook.
+_fork_engines = weakref.WeakSet()
+
+
+def _dispose_in_child():
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_in_child)
+
+
+def dispose_after_fork(engine):
+    # A forked child (gunicorn --preload, multiprocessing) must never share the
+    # parent's pooled sockets: it starts with an empty pool and leaves the
+    # parent's connections open for the parent. One hook for all engines, so
+    # creating apps over and over does not pile up hooks.
+    _fork_engines.add(engine)
@@ -0,0 +1,120 @@
+import logging
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import literal, null, select
+from models import db, User, Project, Task, Comment, Tombstone, Job
+from jobs import remove_result_files
+
+# Set-based deletes for projects, tasks and users. Rows are removed in id batches
+# of DELETE_BATCH with a commit after each, so no ORM objects are loaded, memory
+# stays flat and no transaction grows with the size of the project. The foreign
+# keys carry matching ON DELETE rules (migration 5), but children are removed
+# explicitly so SQLite files, which do not enforce them, end up the same. An
+# interrupted delete leaves whole batches behind; running it again finishes it.
+#
+# Sync tombstones are written with INSERT ... SELECT for the project and every
+# task. A task's tombstone stands for its comments, which get none of their own.
+
+logger = logging.getLogger(__name__)
+
+
+def _batch_ids(model, condition, batch):
+    return [row_id for (row_id,) in db.session.query(model.id).filter(condition).order_by(model.id).limit(batch)]
+
+
+def _tombstones(entity, id_column, condition, assigned_to=None, task_id=None):
+    columns = select(
+        literal(entity), id_column,
+        assigned_to if assigned_to is not None else null(),
+        task_id if task_id is not None else null(),
+        literal(datetime.utcnow())
+    ).where(condition)
+    db.session.execute(Tombstone.__table__.insert().from_select(
+        ["entity", "entity_id", "assigned_to", "task_id", "deleted_at"], columns))
+
+
+def _delete_comments(condition, batch, tombstones=False, commit=False):
+    deleted = 0
+    while True:
+        ids = _batch_ids(Comment, condition, batch)
+        if not ids:
+            return deleted
+        if tombstones:
+            _tombstones("comment", Comment.id, Comment.id.in_(ids), task_id=Comment.task_id)
+        db.session.query(Comment).filter(Comment.id.in_(ids)).delete(synchronize_session=False)
+        if commit:
+            db.session.commit()
+        deleted += len(ids)
+
+
+def _update_in_batches(model, condition, values, batch):
+    # condition must stop matching once values are set, or this never ends
+    updated = 0
+    while True:
+        ids = _batch_ids(model, condition, batch)
+        if not ids:
+            return updated
+        db.session.query(model).filter(model.id.in_(ids)).update(values, synchronize_session=False)
+        db.session.commit()
+        updated += len(ids)
+
+
+def delete_tasks(condition, batch=None, progress=None):
+    # Deletes the tasks matching condition together with their comments;
+    # progress(tasks_deleted) is called after every committed batch
+    batch = batch or current_app.config["DELETE_BATCH"]
+    deleted = 0
+    while True:
+        task_ids = _batch_ids(Task, condition, batch)
+        if not task_ids:
+            return deleted
+        _delete_comments(Comment.task_id.in_(task_ids), batch)
+        _tombstones("task", Task.id, Task.id.in_(task_ids), assigned_to=Task.assigned_to)
+        db.session.query(Task).filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(task_ids)
+        if progress:
+            progress(deleted)
+
+
+def delete_project(project_id, batch=None, progress=None):
+    tasks = delete_tasks(Task.project_id == project_id, batch, progress)
+    _tombstones("project", Project.id, Project.id == project_id)
+    db.session.query(Project).filter(Project.id == project_id).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info("Project deleted", extra={"project_id": project_id, "tasks": tasks})
+    return tasks
+
+
+def delete_user(user_id, reassign_to=None, delete_comments=False, batch=None):
+    # Policy for what the user leaves behind:
+    #   tasks     -> reassigned to reassign_to, or left unassigned
+    #   comments  -> kept without an author (shown as "Unknown"), or deleted
+    #   projects  -> kept, creator cleared
+    #   jobs      -> deleted with their result files; a running one stops at its next progress()
+    batch = batch or current_app.config["DELETE_BATCH"]
+    if reassign_to == user_id:
+        raise ValueError("Cannot reassign tasks to the user being deleted")
+    if reassign_to is not None and db.session.get(User, reassign_to) is None:
+        raise ValueError(f"User {reassign_to} not found")
+
+    project_ids = {pid for (pid,) in db.session.query(Task.project_id)
+                   .filter(Task.assigned_to == user_id).distinct() if pid is not None}
+    tasks = _update_in_batches(Task, Task.assigned_to == user_id, {Task.assigned_to: reassign_to}, batch)
+    if delete_comments:
+        comments = _delete_comments(Comment.user_id == user_id, batch, tombstones=True, commit=True)
+    else:
+        comments = _update_in_batches(Comment, Comment.user_id == user_id, {Comment.user_id: None}, batch)
+
+    db.session.query(Project).filter(Project.created_by == user_id) \
+        .update({Project.created_by: None}, synchronize_session=False)
+    job_ids = [job_id for (job_id,) in db.session.query(Job.id).filter(Job.user_id == user_id)]
+    db.session.query(Job).filter(Job.user_id == user_id).delete(synchronize_session=False)
+    db.session.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+    db.session.commit()
+    remove_result_files(job_ids)
+    logger.info("User deleted", extra={
+        "user_id": user_id, "tasks": tasks, "comments": comments,
+        "reassigned_to": reassign_to, "comments_deleted": delete_comments
+    })
+    return {"tasks": tasks, "comments": comments, "project_ids": project_ids}
@@ -0,0 +1,154 @@
+import itertools
+import json
+import logging
+import queue
+import threading
+from collections import deque
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# In-process pub/sub for change notifications streamed over /api/events.
+# Handlers call publish() after a successful commit. Each connected client holds
+# a bounded queue; a client that falls behind is cut off and reconnects with
+# Last-Event-ID, replaying from the ring buffer of recent events.
+
+
+class Subscriber:
+    def __init__(self, max_size):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.overflowed = False
+
+
+class MemoryBroker:
+    # Single process. Event ids and the replay buffer are per worker, so behind
+    # several gunicorn workers use the redis broker.
+
+    def __init__(self, buffer_size=1000, queue_size=100):
+        self.queue_size = queue_size
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, event):
+        event = dict(event, id=next(self._ids))
+        self._dispatch(event)
+
+    def _dispatch(self, event):
+        with self._lock:
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                sub.overflowed = True
+
+    def subscribe(self):
+        sub = Subscriber(self.queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def replay(self, last_id):
+        with self._lock:
+            events = list(self._buffer)
+        return _replay_from(events, last_id)
+
+
+class RedisBroker(MemoryBroker):
+    # Shares events across workers through a Redis channel. Ids come from INCR and
+    # the replay buffer is a capped list, so Last-Event-ID works on any worker.
+    # Any redis-py compatible client works, including a local stand-in for tests.
+
+    CHANNEL = "pm:events"
+    BUFFER_KEY = "pm:events:buffer"
+    ID_KEY = "pm:events:id"
+
+    def __init__(self, client, buffer_size=1000, queue_size=100):
+        super().__init__(buffer_size, queue_size)
+        self.client = client
+        self.buffer_size = buffer_size
+        self._listener = None
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def publish(self, event):
+        event = dict(event, id=self.client.incr(self.ID_KEY))
+        payload = json.dumps(event)
+        pipe = self.client.pipeline()
+        pipe.rpush(self.BUFFER_KEY, payload)
+        pipe.ltrim(self.BUFFER_KEY, -self.buffer_size, -1)
+        pipe.publish(self.CHANNEL, payload)
+        pipe.execute()
+
+    def subscribe(self):
+        self._ensure_listener()
+        return super().subscribe()
+
+    def _ensure_listener(self):
+        # One listener thread per worker fans Redis messages out to local subscribers
+        with self._lock:
+            if self._listener is not None:
+                return
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.CHANNEL)
+            self._listener = threading.Thread(target=self._listen, args=(pubsub,), daemon=True)
+            self._listener.start()
+
+    def _listen(self, pubsub):
+        for message in pubsub.listen():
+            if message.get("type") == "message":
+                self._dispatch(json.loads(message["data"]))
+
+    def replay(self, last_id):
+        events = [json.loads(e) for e in self.client.lrange(self.BUFFER_KEY, 0, -1)]
+        return _replay_from(events, last_id)
+
+
+def _replay_from(events, last_id):
+    # Events after last_id, or None when the buffer cannot cover the gap (too far
+    # behind, or an id from before a restart) and the client has to resync
+    latest = events[-1]["id"] if events else 0
+    if last_id > latest or (events and events[0]["id"] > last_id + 1):
+        return None
+    return [e for e in events if e["id"] > last_id]
+
+
+def init_events(app, broker=None):
+    if broker is None:
+        kwargs = {
+            "buffer_size": app.config.get("EVENTS_BUFFER", 1000),
+            "queue_size": app.config.get("EVENTS_QUEUE_SIZE", 100),
+        }
+        if app.config.get("EVENTS_BACKEND", "memory") == "redis":
+            broker = RedisBroker.from_url(app.config["EVENTS_REDIS_URL"], **kwargs)
+        else:
+            broker = MemoryBroker(**kwargs)
+    app.extensions["events"] = broker
+    return broker
+
+
+def publish(event_type, project_id=None, assigned_to=None, **data):
+    # project_id / assigned_to drive per-client scoping in /api/events
+    broker = current_app.extensions.get("events")
+    if broker is None:
+        return
+    try:
+        broker.publish({
+            "type": event_type,
+            "project_id": project_id,
+            "assigned_to": assigned_to,
+            "data": data,
+        })
+    except Exception:
+        # The write already committed; a lost notification must not fail the request
+        logger.exception("Error publishing event", extra={"event_type": event_type})
@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from flask import current_app, g
+from flask_jwt_extended import get_jwt_identity
+from models import db, User
+
+# Small per-process LRU of user id -> (role name, expiry). Writes in user_routes
+# invalidate it locally; the TTL bounds staleness across other gunicorn workers.
+_role_cache = OrderedDict()
+_role_lock = Lock()
+
+
+def current_user_id():
+    return int(get_jwt_identity())
+
+
+def current_user():
+    # Full User row, loaded at most once per request
+    if "current_user" not in g:
+        g.current_user = db.session.get(User, current_user_id())
+        if g.current_user:
+            g.current_role = g.current_user.role.name
+            _remember_role(g.current_user.id, g.current_role)
+    return g.current_user
+
+
+def current_role():
+    # Role name ("ADMIN", "MANAGER", "DEVELOPER") of the caller, or None if the user is gone
+    if "current_role" not in g:
+        user_id = current_user_id()
+        role = _cached_role(user_id)
+        if role is None:
+            user = current_user()
+            role = user.role.name if user else None
+        g.current_role = role
+    return g.current_role
+
+
+def invalidate_role(user_id):
+    with _role_lock:
+        _role_cache.pop(user_id, None)
+
+
+def _cached_role(user_id):
+    with _role_lock:
+        entry = _role_cache.get(user_id)
+        if entry is None:
+            return None
+        role, expires = entry
+        if expires < time.monotonic():
+            del _role_cache[user_id]
+            return None
+        _role_cache.move_to_end(user_id)
+        return role
+
+
+def _remember_role(user_id, role):
+    ttl = current_app.config.get("ROLE_CACHE_TTL", 0)
+    if ttl <= 0:
+        return
+    with _role_lock:
+        _role_cache[user_id] = (role, time.monotonic() + ttl)
+        _role_cache.move_to_end(user_id)
+        while len(_role_cache) > current_app.config.get("ROLE_CACHE_SIZE", 1024):
+            _role_cache.popitem(last=False)
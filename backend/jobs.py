@@ -0,0 +1,365 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_
+from models import db, Job, JobStatusEnum
+
+# Background jobs for work that does not fit in a request: AI generation, large
+# exports and imports. The job table is the queue, so any process can enqueue and
+# any worker can run a job. A worker claims a job with a conditional UPDATE, so
+# two workers never run the same job. Handlers register with @job_handler in the
+# modules that own the domain logic and get a JobContext for progress,
+# cancellation and resumable state.
+#
+# Workers run as threads inside each web process (JOBS_WORKERS) or, with
+# JOBS_WORKERS=0 on the web side, in a separate process: python jobs.py
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+ACTIVE = (JobStatusEnum.QUEUED, JobStatusEnum.RUNNING)
+FINISHED = (JobStatusEnum.SUCCEEDED, JobStatusEnum.FAILED, JobStatusEnum.CANCELLED)
+
+# Set by enqueue() so idle workers in this process start without waiting a poll
+_wake = threading.Event()
+
+# Idle workers prune expired jobs at most this often (seconds), per process
+PRUNE_EVERY = 600
+_last_prune = None
+
+
+class JobLimitError(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def job_handler(kind):
+    # handler(job: JobContext, payload: dict) -> JSON-serialisable result.
+    # ValueError means bad input and fails the job at once; any other exception is
+    # retried with backoff up to max_attempts.
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+class JobContext:
+
+    def __init__(self, job):
+        self.id = job.id
+        self.kind = job.kind
+        self.user_id = job.user_id
+        self.attempt = job.attempts
+        # Checkpoint saved by an earlier attempt, if any
+        self.state = json.loads(job.result) if job.result else None
+
+    def progress(self, percent):
+        # Records progress and a heartbeat on a separate connection so the
+        # handler's own transaction is untouched; raises JobCancelled when the
+        # owner asked for cancellation or the job row is gone (owner deleted)
+        now = datetime.utcnow()
+        table = Job.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.id == self.id)
+                         .values(progress=max(0, min(int(percent), 99)), heartbeat_at=now))
+            cancel = conn.execute(db.select(table.c.cancel_requested).where(table.c.id == self.id)).scalar()
+        if cancel or cancel is None:
+            raise JobCancelled()
+
+    def save_state(self, state):
+        # Staged in the handler's session and committed with its next commit, so
+        # a retry resumes from the last batch that was actually written
+        db.session.query(Job).filter(Job.id == self.id) \
+            .update({Job.result: json.dumps(state)}, synchronize_session=False)
+        self.state = state
+
+    def result_path(self, name):
+        os.makedirs(current_app.config["JOBS_RESULT_DIR"], exist_ok=True)
+        return os.path.join(current_app.config["JOBS_RESULT_DIR"], f"job-{self.id}-{name}")
+
+
+class JobLease:
+    # Renews the heartbeat of one running attempt from a side thread while its
+    # handler runs, so a handler that goes longer than JOBS_STALE_AFTER between
+    # progress() calls is not taken for a dead worker and run a second time. The
+    # renewal only matches the attempt that holds the lease: once a job has been
+    # requeued and claimed again, the old attempt can neither renew nor finish it.
+
+    def __init__(self, engine, job_id, attempt, interval):
+        self.engine = engine
+        self.job_id = job_id
+        self.attempt = attempt
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew, name=f"job-lease-{job_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _renew(self):
+        table = Job.__table__
+        while not self._stop.wait(self.interval):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(table.update().where(
+                        table.c.id == self.job_id,
+                        table.c.status == JobStatusEnum.RUNNING,
+                        table.c.attempts == self.attempt,
+                    ).values(heartbeat_at=datetime.utcnow()))
+            except Exception:
+                # A missed renewal is harmless while the next one lands in time
+                logger.exception("Error renewing job lease", extra={"job_id": self.job_id})
+
+
+def enqueue(kind, user_id, payload, max_attempts=None):
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    active = db.session.query(func.count(Job.id)) \
+        .filter(Job.user_id == user_id, Job.status.in_(ACTIVE)).scalar()
+    if active >= current_app.config["JOBS_PER_USER_ACTIVE"]:
+        raise JobLimitError(f"You already have {active} jobs queued or running. Try again when one finishes.")
+
+    job = Job(
+        kind=kind,
+        user_id=user_id,
+        payload=json.dumps(payload),
+        max_attempts=max_attempts or current_app.config["JOBS_MAX_ATTEMPTS"],
+        run_after=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+    _wake.set()
+    return job
+
+
+def cancel(job):
+    # Queued jobs are cancelled outright; running ones stop at their next progress()
+    if job.status == JobStatusEnum.QUEUED:
+        cancelled = db.session.query(Job).filter(Job.id == job.id, Job.status == JobStatusEnum.QUEUED) \
+            .update({Job.status: JobStatusEnum.CANCELLED, Job.finished_at: datetime.utcnow()},
+                    synchronize_session=False)
+        if cancelled:
+            db.session.commit()
+            return True
+    db.session.query(Job).filter(Job.id == job.id, Job.status.in_(ACTIVE)) \
+        .update({Job.cancel_requested: True}, synchronize_session=False)
+    db.session.commit()
+    return False
+
+
+def claim_next():
+    now = datetime.utcnow()
+    # Users already at their running limit wait; the check is best effort, so two
+    # workers claiming at the same instant can briefly exceed it by one
+    busy = [user_id for (user_id,) in db.session.query(Job.user_id)
+            .filter(Job.status == JobStatusEnum.RUNNING, Job.user_id.isnot(None))
+            .group_by(Job.user_id).having(func.count(Job.id) >= current_app.config["JOBS_PER_USER_RUNNING"])]
+    query = db.session.query(Job.id).filter(Job.status == JobStatusEnum.QUEUED, Job.run_after <= now)
+    if busy:
+        query = query.filter(or_(Job.user_id.is_(None), Job.user_id.notin_(busy)))
+
+    for (job_id,) in query.order_by(Job.run_after, Job.id).limit(10).all():
+        claimed = db.session.query(Job).filter(Job.id == job_id, Job.status == JobStatusEnum.QUEUED).update({
+            Job.status: JobStatusEnum.RUNNING,
+            Job.attempts: Job.attempts + 1,
+            Job.started_at: now,
+            Job.heartbeat_at: now,
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+    return None
+
+
+def requeue_stale():
+    # Jobs whose worker process died mid-run (lease not renewed for
+    # JOBS_STALE_AFTER) go back to the queue, or fail once they are out of attempts
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config["JOBS_STALE_AFTER"])
+    stale = db.session.query(Job).filter(Job.status == JobStatusEnum.RUNNING, Job.heartbeat_at < cutoff)
+    stale.filter(Job.attempts < Job.max_attempts).update({
+        Job.status: JobStatusEnum.QUEUED,
+        Job.run_after: datetime.utcnow(),
+        Job.error: "Worker stopped responding",
+    }, synchronize_session=False)
+    stale.update({
+        Job.status: JobStatusEnum.FAILED,
+        Job.finished_at: datetime.utcnow(),
+        Job.error: "Worker stopped responding",
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def remove_result_files(job_ids):
+    # Result files are named job-<id>-<name> (JobContext.result_path)
+    result_dir = current_app.config["JOBS_RESULT_DIR"]
+    for job_id in job_ids:
+        for path in glob.glob(os.path.join(result_dir, f"job-{job_id}-*")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def prune_finished(force=False):
+    # Deletes jobs that finished over JOBS_RETENTION ago and their result files,
+    # plus result files left by jobs that are already gone (deleted users, attempts
+    # that finished after their row was removed) once they are as old
+    global _last_prune
+    if not force and _last_prune is not None and time.monotonic() - _last_prune < PRUNE_EVERY:
+        return 0
+    _last_prune = time.monotonic()
+    retention = current_app.config["JOBS_RETENTION"]
+
+    cutoff = datetime.utcnow() - timedelta(seconds=retention)
+    expired = [job_id for (job_id,) in db.session.query(Job.id)
+               .filter(Job.status.in_(FINISHED), Job.finished_at < cutoff)]
+    if expired:
+        db.session.query(Job).filter(Job.id.in_(expired)).delete(synchronize_session=False)
+        db.session.commit()
+        remove_result_files(expired)
+        logger.info("Pruned finished jobs", extra={"jobs": len(expired)})
+
+    stale_before = time.time() - retention
+    for path in glob.glob(os.path.join(current_app.config["JOBS_RESULT_DIR"], "job-*")):
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+    return len(expired)
+
+
+def _held(ctx):
+    # The job row, if this attempt still holds it (not requeued as stale meanwhile)
+    return db.session.query(Job).filter(Job.id == ctx.id, Job.status == JobStatusEnum.RUNNING,
+                                        Job.attempts == ctx.attempt)
+
+
+def _finish(ctx, status, **values):
+    values = {getattr(Job, k): v for k, v in values.items()}
+    values.update({Job.status: status, Job.finished_at: datetime.utcnow()})
+    _held(ctx).update(values, synchronize_session=False)
+    db.session.commit()
+
+
+def run_job(job):
+    ctx = JobContext(job)
+    max_attempts = job.max_attempts
+    try:
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind '{job.kind}'")
+        lease_interval = max(current_app.config["JOBS_STALE_AFTER"] / 4, 1)
+        with JobLease(db.engine, ctx.id, ctx.attempt, lease_interval):
+            result = handler(ctx, json.loads(job.payload or "{}"))
+        _finish(ctx, JobStatusEnum.SUCCEEDED, result=json.dumps(result), progress=100, error=None)
+    except JobCancelled:
+        db.session.rollback()
+        _finish(ctx, JobStatusEnum.CANCELLED)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Job attempt failed", extra={"job_id": ctx.id, "kind": ctx.kind, "attempt": ctx.attempt})
+        cancelled = db.session.query(Job.cancel_requested).filter(Job.id == ctx.id).scalar()
+        if cancelled:
+            _finish(ctx, JobStatusEnum.CANCELLED, error=str(e))
+        elif isinstance(e, ValueError) or ctx.attempt >= max_attempts:
+            _finish(ctx, JobStatusEnum.FAILED, error=str(e))
+        else:
+            delay = current_app.config["JOBS_RETRY_BACKOFF"] * 2 ** (ctx.attempt - 1)
+            _held(ctx).update({
+                Job.status: JobStatusEnum.QUEUED,
+                Job.run_after: datetime.utcnow() + timedelta(seconds=delay),
+                Job.error: str(e),
+            }, synchronize_session=False)
+            db.session.commit()
+
+
+class JobWorker:
+
+    def __init__(self, app, threads=None, poll_interval=None):
+        self.app = app
+        self.threads = app.config["JOBS_WORKERS"] if threads is None else threads
+        self.poll_interval = poll_interval or app.config["JOBS_POLL_INTERVAL"]
+        self._stop = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._started or self.threads <= 0:
+                return
+            self._started = True
+        for n in range(self.threads):
+            threading.Thread(target=self._loop, name=f"job-worker-{n}", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        _wake.set()
+
+    def run_once(self):
+        # Claims and runs one job; returns False when there was nothing to do
+        with self.app.app_context():
+            try:
+                job = claim_next()
+                if job is None:
+                    requeue_stale()
+                    prune_finished()
+                    return False
+                run_job(job)
+                return True
+            except Exception:
+                logger.exception("Job worker error")
+                db.session.rollback()
+                return False
+            finally:
+                db.session.remove()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self.run_once():
+                _wake.wait(self.poll_interval)
+                _wake.clear()
+
+
+def init_jobs(app):
+    worker = JobWorker(app)
+    app.extensions["jobs"] = worker
+
+    # Threads start with the first request rather than at import, so scripts that
+    # import the app (migrations, benchmarks) do not start claiming jobs
+    @app.before_request
+    def start_job_workers():
+        worker.start()
+
+    return worker
+
+
+if __name__ == "__main__":
+    import sys
+    from app import create_app
+    # Use the module the routes registered their handlers on, not this __main__ copy
+    import jobs
+
+    app = create_app()
+
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else max(app.config["JOBS_WORKERS"], 1)
+    logger.info("Starting job worker threads", extra={"threads": threads})
+    worker = jobs.JobWorker(app, threads=threads)
+    worker.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        worker.stop()
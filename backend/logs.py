@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from flask import g, has_request_context, request
+
+# Structured logging. Records are formatted on the calling thread (cheap string
+# work) and handed to a bounded queue; a single listener thread does the stdout
+# writes, so request threads never block on I/O or contend for stdout. When the
+# queue is full the record is dropped and counted rather than stalling the caller.
+#
+# Modules log through logging.getLogger(__name__). Extra fields go in
+# extra={...} and end up as top-level JSON keys. DEBUG lines, which sit on the
+# per-request paths, are sampled at LOG_DEBUG_SAMPLE.
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    # For local development: LOG_FORMAT=text
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().format(record)
+
+
+class ContextFilter(logging.Filter):
+    # Runs on the calling thread: stamps the request id and applies sampling
+
+    def __init__(self, debug_sample=1.0):
+        super().__init__()
+        self.debug_sample = debug_sample
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and self.debug_sample < 1.0 and random.random() >= self.debug_sample:
+            return False
+        if not hasattr(record, "request_id"):
+            record.request_id = g.get("request_id") if has_request_context() else None
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Keep only the formatted line; exc_info and args may not be picklable or
+        # safe to touch from another thread
+        line = self.format(record)
+        record = logging.makeLogRecord({"msg": line, "levelno": record.levelno, "levelname": record.levelname})
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec):
+    # "sqlalchemy.engine=INFO,jobs=DEBUG" -> {"sqlalchemy.engine": "INFO", "jobs": "DEBUG"}
+    levels = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _start_listener(handler, size):
+    global _listener
+    handler.queue = queue.Queue(maxsize=size)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter("%(message)s"))
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+
+
+def configure_logging(config):
+    # Process-wide; safe to call more than once (later calls only adjust levels)
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(config.get("LOG_LEVEL", "INFO").upper())
+    for name, level in _parse_levels(config.get("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level)
+    if _listener is not None:
+        return
+
+    size = config.get("LOG_QUEUE_SIZE", 10000)
+    # The queue is created (and re-created after a fork) by _start_listener
+    handler = DroppingQueueHandler(None)
+    handler.setFormatter(TextFormatter() if config.get("LOG_FORMAT") == "text" else JsonFormatter())
+    handler.addFilter(ContextFilter(config.get("LOG_DEBUG_SAMPLE", 1.0)))
+    _start_listener(handler, size)
+    atexit.register(lambda: _listener.stop())
+    # The listener thread does not survive a fork (gunicorn --preload), and the
+    # old queue may be mid-operation; each child gets a fresh queue and thread
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: _start_listener(handler, size))
+
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+
+
+def init_logging(app):
+    configure_logging(app.config)
+    # Flask's own logger would otherwise add a second, blocking stderr handler
+    app.logger.handlers.clear()
+    app.logger.propagate = True
+
+    @app.before_request
+    def assign_request_id():
+        # Reuse the id from a proxy or the client when it looks sane
+        incoming = request.headers.get("X-Request-ID", "")
+        g.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def echo_request_id(response):
+        if g.get("request_id"):
+            response.headers["X-Request-ID"] = g.request_id
+        return response
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request and SQL instrumentation. Every request records its latency and the
+# number and total time of the SQL statements it issued (counted through engine
+# events), keyed on the route pattern rather than the raw path so the label set
+# stays small. Statements slower than SLOW_QUERY_MS are logged with their route.
+# /metrics (routes/metrics_routes.py) renders everything in the Prometheus text
+# format. Figures are per process: with several gunicorn workers each one is
+# scraped, or summed, separately.
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Statements issued outside any request (job workers, startup) are filed here
+BACKGROUND = "background"
+
+_local = threading.local()
+_slow_query_seconds = 0.2
+
+
+class QueryCounter:
+
+    def __init__(self, route=BACKGROUND):
+        self.route = route
+        self.count = 0
+        self.seconds = 0.0
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}        # (route, method, status) -> count
+        self.latency = {}         # (route, method) -> Histogram
+        self.request_queries = {}  # (route,) -> Histogram of statements per request
+        self.queries = {}         # (route,) -> [count, seconds]
+        self.slow_queries = {}    # (route,) -> count
+
+    def observe_request(self, route, method, status, seconds, queries):
+        with self._lock:
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault((route, method), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.request_queries.setdefault((route,), Histogram(QUERY_BUCKETS)).observe(queries)
+
+    def observe_query(self, route, seconds, slow):
+        with self._lock:
+            totals = self.queries.setdefault((route,), [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            if slow:
+                self.slow_queries[(route,)] = self.slow_queries.get((route,), 0) + 1
+
+    def reset(self):
+        with self._lock:
+            for values in (self.requests, self.latency, self.request_queries, self.queries, self.slow_queries):
+                values.clear()
+
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        lines = []
+        with self._lock:
+            _counter(lines, "http_requests_total", "Requests handled",
+                     ("route", "method", "status"), self.requests)
+            _histogram(lines, "http_request_duration_seconds", "Request latency",
+                       ("route", "method"), self.latency)
+            _histogram(lines, "db_queries_per_request", "SQL statements issued per request",
+                       ("route",), self.request_queries)
+            _counter(lines, "db_queries_total", "SQL statements executed",
+                     ("route",), {k: v[0] for k, v in self.queries.items()})
+            _counter(lines, "db_query_seconds_total", "Time spent in SQL statements",
+                     ("route",), {k: round(v[1], 6) for k, v in self.queries.items()})
+            _counter(lines, "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS",
+                     ("route",), self.slow_queries)
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _counter(lines, name, help_text, names, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(values.items()):
+        lines.append(f"{name}{_labels(names, key)} {value}")
+
+
+def _histogram(lines, name, help_text, names, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, hist in sorted(values.items()):
+        for bound, count in zip(hist.buckets, hist.counts):
+            lines.append(f"{name}_bucket{_labels(names, key, le=bound)} {count}")
+        lines.append(f"{name}_bucket{_labels(names, key, le='+Inf')} {hist.total}")
+        lines.append(f"{name}_sum{_labels(names, key)} {round(hist.sum, 6)}")
+        lines.append(f"{name}_count{_labels(names, key)} {hist.total}")
+
+
+registry = Registry()
+
+
+@contextmanager
+def count_queries(route=BACKGROUND):
+    # Counts the statements this thread runs inside the block, e.g.
+    #   with count_queries() as q: client.get("/api/tasks")
+    #   assert q.count <= 3
+    previous = getattr(_local, "counter", None)
+    counter = _local.counter = QueryCounter(route)
+    try:
+        yield counter
+    finally:
+        _local.counter = previous
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    counter = getattr(_local, "counter", None)
+    route = counter.route if counter else BACKGROUND
+    if counter:
+        counter.count += 1
+        counter.seconds += elapsed
+    slow = elapsed >= _slow_query_seconds
+    registry.observe_query(route, elapsed, slow)
+    if slow:
+        # Statement text only; parameters can carry user data
+        logger.warning("Slow query", extra={
+            "route": route,
+            "ms": round(elapsed * 1000, 1),
+            "statement": " ".join(statement.split())[:500]
+        })
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def init_metrics(app):
+    global _slow_query_seconds
+    if not app.config.get("METRICS_ENABLED", True):
+        return None
+    _slow_query_seconds = app.config.get("SLOW_QUERY_MS", 200) / 1000.0
+    # On the Engine class so every engine (web, jobs, scripts) is counted; guarded
+    # so building several apps in one process does not double count
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_previous = getattr(_local, "counter", None)
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        g.query_counter = _local.counter = QueryCounter(route)
+
+    @app.after_request
+    def record_request_metrics(response):
+        counter = g.pop("query_counter", None)
+        if counter is None:
+            return response
+        previous = _local.counter = g.pop("metrics_previous", None)
+        if previous is not None:
+            # A count_queries() block around a test client call sees the request's statements
+            previous.count += counter.count
+            previous.seconds += counter.seconds
+        elapsed = time.perf_counter() - g.metrics_started
+        registry.observe_request(counter.route, request.method, response.status_code, elapsed, counter.count)
+        if app.config.get("METRICS_QUERY_HEADER"):
+            response.headers["X-Query-Count"] = str(counter.count)
+            response.headers["X-Query-Time-Ms"] = f"{counter.seconds * 1000:.1f}"
+        return response
+
+    app.extensions["metrics"] = registry
+    return registry
@@ -0,0 +1,166 @@
+# Versioned schema migrations for databases created before a model change.
+# db.create_all() only creates missing tables and never alters existing ones, so
+# each entry in MIGRATIONS runs once per database, in order, and is recorded in
+# the schema_version table.
+#
+# Usage (from backend/): python migrations.py
+import logging
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from models import db, Project, Task, Comment, Tombstone, Job
+
+logger = logging.getLogger(__name__)
+
+_meta = MetaData()
+schema_version = Table(
+    "schema_version", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+def _create_indexes(conn, *names):
+    indexes = {ix.name: ix for table in db.metadata.tables.values() for ix in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+def _v1_hot_path_indexes(conn):
+    _create_indexes(
+        conn,
+        "ix_task_assigned_status",
+        "ix_task_project_status_deadline",
+        "ix_task_created_id",
+        "ix_project_created_id",
+        "ix_comment_task_created",
+    )
+
+
+def _add_column(conn, table, column):
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    if column.name not in existing:
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+        conn.execute(text(ddl))
+
+
+def _v2_sync_columns(conn):
+    for model in (Project, Task, Comment):
+        table = model.__table__
+        _add_column(conn, table, table.c.updated_at)
+        conn.execute(table.update().where(table.c.updated_at.is_(None)).values(updated_at=table.c.created_at))
+    Tombstone.__table__.create(conn, checkfirst=True)
+    _create_indexes(conn, "ix_project_updated_id", "ix_task_updated_id", "ix_comment_updated_id")
+
+
+def _v3_fulltext_indexes(conn):
+    # FULLTEXT only exists on MySQL; elsewhere search.py keeps its own index
+    if conn.dialect.name == "mysql":
+        _create_indexes(conn, "ft_task_title_description", "ft_project_title_description", "ft_comment_content")
+
+
+def _v4_jobs(conn):
+    Job.__table__.create(conn, checkfirst=True)
+
+
+# (table, column, referenced table, ON DELETE rule); all reference <table>.id
+_V5_FOREIGN_KEYS = [
+    ("project", "created_by", "user", "SET NULL"),
+    ("task", "project_id", "project", "CASCADE"),
+    ("task", "assigned_to", "user", "SET NULL"),
+    ("comment", "task_id", "task", "CASCADE"),
+    ("comment", "user_id", "user", "SET NULL"),
+    ("job", "user_id", "user", "CASCADE"),
+]
+
+
+def _sqlite_rebuild(conn, table):
+    # SQLite cannot alter constraints or nullability: move the rows into a table
+    # created from the current model and drop the old one
+    old = f"_old_{table.name}"
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    for index in inspect(conn).get_indexes(table.name):
+        conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+    # Keep other tables' REFERENCES pointing at the original name
+    conn.execute(text("PRAGMA legacy_alter_table = ON"))
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old}"'))
+    conn.execute(text("PRAGMA legacy_alter_table = OFF"))
+    table.create(conn)
+    columns = ", ".join(f'"{c.name}"' for c in table.columns if c.name in existing)
+    conn.execute(text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old}"'))
+    conn.execute(text(f'DROP TABLE "{old}"'))
+
+
+def _v5_delete_rules(conn):
+    if conn.dialect.name == "sqlite":
+        for model in (Project, Task, Comment, Job):
+            _sqlite_rebuild(conn, model.__table__)
+        return
+
+    quote = conn.dialect.identifier_preparer.quote
+    mysql = conn.dialect.name == "mysql"
+    # Comments outlive their author
+    if mysql:
+        conn.execute(text("ALTER TABLE comment MODIFY user_id INTEGER NULL"))
+    else:
+        conn.execute(text("ALTER TABLE comment ALTER COLUMN user_id DROP NOT NULL"))
+
+    inspector = inspect(conn)
+    for table, column, target, rule in _V5_FOREIGN_KEYS:
+        name = f"fk_{table}_{column}"
+        for fk in inspector.get_foreign_keys(table):
+            if fk["constrained_columns"] == [column] and fk["name"]:
+                name = fk["name"]
+                drop = "DROP FOREIGN KEY" if mysql else "DROP CONSTRAINT"
+                conn.execute(text(f"ALTER TABLE {quote(table)} {drop} {quote(name)}"))
+        conn.execute(text(
+            f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} FOREIGN KEY ({quote(column)}) "
+            f"REFERENCES {quote(target)} (id) ON DELETE {rule}"
+        ))
+
+
+def _v6_sync_precision(conn):
+    # Fractional seconds on the sync timestamps; other databases already keep them
+    if conn.dialect.name == "mysql":
+        for table, column in (("project", "updated_at"), ("task", "updated_at"),
+                              ("comment", "updated_at"), ("tombstone", "deleted_at")):
+            conn.execute(text(f"ALTER TABLE `{table}` MODIFY `{column}` DATETIME(6) NULL"))
+
+
+MIGRATIONS = [
+    (1, "Composite indexes for task, project and comment access paths", _v1_hot_path_indexes),
+    (2, "updated_at columns and tombstone table for delta sync", _v2_sync_columns),
+    (3, "FULLTEXT indexes for search", _v3_fulltext_indexes),
+    (4, "Background job table", _v4_jobs),
+    (5, "ON DELETE rules on foreign keys, nullable comment author", _v5_delete_rules),
+    (6, "Microsecond sync timestamps on MySQL", _v6_sync_precision),
+]
+
+
+def current_version(conn):
+    return conn.execute(select(db.func.max(schema_version.c.version))).scalar() or 0
+
+
+def upgrade(engine):
+    _meta.create_all(engine)
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        # One transaction per step so a failure leaves earlier steps recorded
+        with engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            logger.info("Applying migration", extra={"version": version, "description": description})
+            migrate(conn)
+            conn.execute(schema_version.insert().values(version=version, description=description))
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        done = upgrade(db.engine)
+        print(f"Applied migrations: {done or 'none'}")
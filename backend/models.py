@@ -1,8 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.mysql import DATETIME, LONGTEXT
+from sqlalchemy.orm import Session
 from datetime import datetime
+from replicas import RoutingSession
 import enum
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+# Timestamps the delta sync feed pages on. Plain DATETIME on MySQL keeps whole
+# seconds, so rows changed within the same second as a cursor would be skipped.
+SYNC_DATETIME = db.DateTime().with_variant(DATETIME(fsp=6), "mysql")
 
 class RoleEnum(enum.Enum):
     ADMIN = "Admin"
@@ -14,6 +22,13 @@ class TaskStatusEnum(enum.Enum):
     IN_PROGRESS = "In Progress"
     DONE = "Done"
 
+class JobStatusEnum(enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    CANCELLED = "Cancelled"
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(120), nullable=False)
@@ -22,33 +37,136 @@ class User(db.Model):
     role = db.Column(db.Enum(RoleEnum), default=RoleEnum.DEVELOPER, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # Relationship to tasks assigned to this user
-    assigned_tasks = db.relationship("Task", backref="assigned_user", lazy=True, foreign_keys="Task.assigned_to")
+    assigned_tasks = db.relationship("Task", backref="assigned_user", lazy=True, foreign_keys="Task.assigned_to",
+                                     passive_deletes=True)
     # Relationship to comments
-    comments = db.relationship("Comment", backref="author", lazy=True)
+    comments = db.relationship("Comment", backref="author", lazy=True, passive_deletes=True)
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    tasks = db.relationship("Task", backref="project", cascade="all, delete-orphan")
+    updated_at = db.Column(SYNC_DATETIME, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # passive_deletes: the database removes children (ON DELETE CASCADE), the ORM
+    # never loads them just to delete them; see deletes.py for large projects
+    tasks = db.relationship("Task", backref="project", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # Keyset pagination on the project listing
+        db.Index("ix_project_created_id", "created_at", "id"),
+        # Delta sync feed
+        db.Index("ix_project_updated_id", "updated_at", "id"),
+        # /api/search on MySQL; other databases use the in-process index in search.py
+        db.Index("ft_project_title_description", "title", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     status = db.Column(db.Enum(TaskStatusEnum), default=TaskStatusEnum.TODO)
-    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=True)
-    assigned_to = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id", ondelete="CASCADE"), nullable=True)
+    assigned_to = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
     deadline = db.Column(db.Date, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(SYNC_DATETIME, default=datetime.utcnow, onupdate=datetime.utcnow)
     # Relationship to comments
-    comments = db.relationship("Comment", backref="task", cascade="all, delete-orphan", lazy=True)
+    comments = db.relationship("Comment", backref="task", cascade="all, delete-orphan", lazy=True, passive_deletes=True)
+
+    __table_args__ = (
+        # Developer task lists and per-assignee status filters
+        db.Index("ix_task_assigned_status", "assigned_to", "status"),
+        # Project metrics (GROUP BY status) and overdue checks
+        db.Index("ix_task_project_status_deadline", "project_id", "status", "deadline"),
+        # Keyset pagination on the task listing
+        db.Index("ix_task_created_id", "created_at", "id"),
+        # Delta sync feed
+        db.Index("ix_task_updated_id", "updated_at", "id"),
+        db.Index("ft_task_title_description", "title", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    task_id = db.Column(db.Integer, db.ForeignKey("task.id"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey("task.id", ondelete="CASCADE"), nullable=False)
+    # NULL once the author's account is deleted; the comment itself is kept
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(SYNC_DATETIME, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Comments of a task, newest first
+        db.Index("ix_comment_task_created", "task_id", "created_at", "id"),
+        # Delta sync feed
+        db.Index("ix_comment_updated_id", "updated_at", "id"),
+        db.Index("ft_comment_content", "content", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
+# Record of a deleted Task, Project or Comment so sync clients can drop it.
+# assigned_to / task_id are kept for role filtering after the row is gone.
+# "task_reassigned" records a task taken away from the developer in assigned_to:
+# it left their sync set, so their client drops it like a deleted task.
+class Tombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    assigned_to = db.Column(db.Integer, nullable=True)
+    task_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(SYNC_DATETIME, default=datetime.utcnow)
+
+# Background work run by jobs.py. payload/result are JSON text; imports can carry
+# large payloads, hence LONGTEXT on MySQL.
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=True)
+    status = db.Column(db.Enum(JobStatusEnum), default=JobStatusEnum.QUEUED, nullable=False)
+    progress = db.Column(db.Integer, default=0, nullable=False)
+    payload = db.Column(db.Text().with_variant(LONGTEXT(), "mysql"))
+    result = db.Column(db.Text().with_variant(LONGTEXT(), "mysql"))
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Bumped by the worker while it runs; a stale heartbeat means the worker died
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Workers claim the oldest runnable job
+        db.Index("ix_job_status_run_after", "status", "run_after", "id"),
+        # Per-user limits and the "my jobs" listing
+        db.Index("ix_job_user_status", "user_id", "status"),
+    )
+
+# Write tombstones in the same transaction as every ORM delete or reassignment.
+# Set-based deletes in deletes.py bypass the session and write their own.
+@event.listens_for(Session, "after_flush")
+def record_tombstones(session, flush_context):
+    rows = []
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            previous = inspect(obj).attrs.assigned_to.history.deleted
+            if previous and previous[0] is not None and previous[0] != obj.assigned_to:
+                rows.append(("task_reassigned", obj.id, previous[0], None))
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            rows.append(("task", obj.id, obj.assigned_to, None))
+        elif isinstance(obj, Project):
+            rows.append(("project", obj.id, None, None))
+        elif isinstance(obj, Comment):
+            rows.append(("comment", obj.id, None, obj.task_id))
+    if rows:
+        now = datetime.utcnow()
+        session.connection().execute(Tombstone.__table__.insert(), [{
+            "entity": entity,
+            "entity_id": entity_id,
+            "assigned_to": assigned_to,
+            "task_id": task_id,
+            "deleted_at": now
+        } for entity, entity_id, assigned_to, task_id in rows])
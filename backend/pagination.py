@@ -0,0 +1,79 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def wants_page(args):
+    # Pagination is opt-in so existing clients that expect a plain list keep working
+    return "limit" in args or "cursor" in args
+
+
+def parse_limit(args, default=DEFAULT_LIMIT):
+    try:
+        limit = int(args.get("limit", default))
+    except (TypeError, ValueError):
+        raise ValueError("'limit' must be an integer")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_after(column, id_column, value, row_id, descending=False):
+    # (column, id) keyset condition; spelled out with OR/AND so MySQL can use the index
+    if descending:
+        return or_(column < value, and_(column == value, id_column < row_id))
+    return or_(column > value, and_(column == value, id_column > row_id))
+
+
+def keyset_filter(model, cursor, descending=False):
+    created_at, row_id = decode_cursor(cursor)
+    return keyset_after(model.created_at, model.id, created_at, row_id, descending)
+
+
+def keyset_order(model, descending=False):
+    if descending:
+        return [model.created_at.desc(), model.id.desc()]
+    return [model.created_at.asc(), model.id.asc()]
+
+
+def paginate(query, model, args, descending=False, key=None, fetch=None):
+    # Returns (rows, next_cursor). Without limit/cursor params every row is returned
+    # and next_cursor is None. `key` picks the model instance out of tuple rows;
+    # `fetch` runs the final query (default: query.all()).
+    fetch = fetch or (lambda q: q.all())
+    query = query.order_by(*keyset_order(model, descending))
+    if not wants_page(args):
+        return fetch(query), None
+
+    limit = parse_limit(args)
+    if args.get("cursor"):
+        query = query.filter(keyset_filter(model, args["cursor"], descending))
+
+    rows = fetch(query.limit(limit + 1))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = key(rows[-1]) if key else rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+def page_body(args, items, next_cursor):
+    if wants_page(args):
+        return {"items": items, "next_cursor": next_cursor}
+    return items
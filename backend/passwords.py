@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# Password hashing for login, register and user creation. The work runs in a
+# small dedicated pool: PBKDF2 in hashlib releases the GIL, so pool threads hash
+# in parallel, and at most PASSWORD_HASH_WORKERS hashes run per process however
+# many requests arrive. Callers beyond PASSWORD_HASH_QUEUE waiting ones give up
+# after PASSWORD_HASH_TIMEOUT with HashingBusyError instead of piling up.
+#
+# The pool belongs to the app (init_passwords), so its size and the method come
+# from that app's config; its threads start with the first hash.
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+def normalise_method(method):
+    # Werkzeug stores "pbkdf2:sha256" as "pbkdf2:sha256:<iterations>"; normalise so
+    # stored hashes can be compared with the configured method
+    if method.startswith("pbkdf2") and method.count(":") < 2:
+        method = f"{method if ':' in method else 'pbkdf2:sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+
+    def __init__(self, method, salt_length=16, workers=2, queue=32, timeout=5.0):
+        self.method = normalise_method(method)
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._dummy_hash = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusyError("Too many sign-in requests right now, please retry shortly")
+        try:
+            return self._pool.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, stored_hash, password):
+        # Unknown users still pay for one hash so response time does not reveal
+        # which emails are registered
+        if stored_hash is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash("dummy-password")
+            self._run(check_password_hash, self._dummy_hash, password)
+            return False
+        return self._run(check_password_hash, stored_hash, password)
+
+
+def init_passwords(app):
+    hasher = PasswordHasher(
+        app.config.get("PASSWORD_HASH_METHOD", "pbkdf2:sha256"),
+        salt_length=app.config.get("PASSWORD_SALT_LENGTH", 16),
+        workers=app.config.get("PASSWORD_HASH_WORKERS", 2),
+        queue=app.config.get("PASSWORD_HASH_QUEUE", 32),
+        timeout=app.config.get("PASSWORD_HASH_TIMEOUT", 5.0),
+    )
+    app.extensions["passwords"] = hasher
+    return hasher
+
+
+def _hasher():
+    return current_app.extensions["passwords"]
+
+
+def hash_method():
+    return _hasher().method
+
+
+def hash_password(password):
+    return _hasher().hash(password)
+
+
+def verify_password(stored_hash, password):
+    return _hasher().verify(stored_hash, password)
+
+
+def needs_rehash(stored_hash):
+    return stored_hash.split("$", 1)[0] != hash_method()
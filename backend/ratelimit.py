@@ -0,0 +1,133 @@
+import hashlib
+import time
+from threading import Lock
+from flask import current_app, jsonify, request
+
+# Fixed-window request counters for the auth endpoints, so a brute-force burst
+# from one address or against one account is turned away before it costs a
+# password hash. Same backend choice as the response cache: per-process memory
+# or Redis shared by all workers.
+
+
+class MemoryLimiter:
+    # Per process, so with several gunicorn workers each one allows the full limit
+
+    MAX_KEYS = 100000
+
+    def __init__(self):
+        self._windows = {}
+        self._lock = Lock()
+
+    def hit(self, key, window):
+        # Counts one request; returns (count in the current window, seconds left in it)
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._windows.get(key, (now, 0))
+            if now - start >= window:
+                start, count = now, 0
+            self._windows[key] = (start, count + 1)
+            if len(self._windows) > self.MAX_KEYS:
+                self._windows = {k: v for k, v in self._windows.items() if now - v[0] < window}
+        return count + 1, window - (now - start)
+
+    def peek(self, key, window):
+        # Same as hit() without counting
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._windows.get(key, (now, 0))
+        if now - start >= window:
+            return 0, window
+        return count, window - (now - start)
+
+
+class RedisLimiter:
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url):
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def hit(self, key, window):
+        key = f"rl:{key}"
+        count = self.client.incr(key)
+        if count == 1:
+            self.client.expire(key, window)
+        ttl = self.client.ttl(key)
+        return count, ttl if ttl and ttl > 0 else window
+
+    def peek(self, key, window):
+        key = f"rl:{key}"
+        count, ttl = self.client.get(key), self.client.ttl(key)
+        return int(count or 0), ttl if ttl and ttl > 0 else window
+
+
+def init_rate_limits(app, limiter=None):
+    if limiter is None:
+        kind = app.config.get("RATE_LIMIT_BACKEND", "memory")
+        if kind == "redis":
+            limiter = RedisLimiter.from_url(app.config["RATE_LIMIT_REDIS_URL"])
+        elif kind == "memory":
+            limiter = MemoryLimiter()
+        else:
+            limiter = None  # "off"
+    app.extensions["rate_limiter"] = limiter
+    return limiter
+
+
+def init_proxy(app):
+    # X-Forwarded-For is only believed for the TRUSTED_PROXY_COUNT hops our own
+    # proxies appended, counted from the right; whatever the client put in front
+    # of them is ignored. Without it every request behind a proxy comes from the
+    # proxy's address, so the per-IP limits are shared by all clients.
+    hops = app.config.get("TRUSTED_PROXY_COUNT", 0)
+    if hops:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops)
+
+
+def client_ip():
+    return request.remote_addr or "unknown"
+
+
+def _key(scope, value):
+    # Hashed so emails never appear in Redis keys
+    return f"{scope}:{hashlib.sha1(str(value).lower().encode()).hexdigest()}"
+
+
+def limit_exceeded(*rules):
+    # rules are (scope, value, limit); nothing is counted here, see
+    # record_attempt(). Returns the seconds to wait when any limit is reached,
+    # else None.
+    limiter = current_app.extensions.get("rate_limiter")
+    if limiter is None:
+        return None
+    window = current_app.config.get("LOGIN_LIMIT_WINDOW", 60)
+    wait = None
+    for scope, value, limit in rules:
+        if value is None:
+            continue
+        count, remaining = limiter.peek(_key(scope, value), window)
+        if count >= limit:
+            wait = max(wait or 0, remaining)
+    return wait
+
+
+def record_attempt(*rules):
+    # Counts one attempt against each (scope, value, limit) rule
+    limiter = current_app.extensions.get("rate_limiter")
+    if limiter is None:
+        return
+    window = current_app.config.get("LOGIN_LIMIT_WINDOW", 60)
+    for scope, value, _ in rules:
+        if value is not None:
+            limiter.hit(_key(scope, value), window)
+
+
+def too_many_requests(retry_after):
+    response = jsonify({"message": "Too many attempts. Please wait and try again."})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+    return response
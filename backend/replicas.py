@@ -0,0 +1,262 @@
+import logging
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, exc, text
+from dbpool import dispose_after_fork
+
+# Read replicas (SQLALCHEMY_REPLICA_URIS). Handlers marked @read_replica run their
+# queries on a healthy replica; everything else (writes, flushes, unmarked routes,
+# background jobs) stays on the primary. Read-your-writes: a successful write
+# request pins its user to the primary for REPLICA_PIN_SECONDS, and invalidating a
+# response cache namespace pins that namespace, so a lagging replica never refills
+# the cache with rows from before the write. Pins live in a memory (per worker) or
+# redis store, like the response cache.
+#
+# A thread per process checks every replica each REPLICA_HEALTH_INTERVAL (SELECT 1,
+# plus replication lag on MySQL when REPLICA_MAX_LAG is set). A replica that fails
+# a check or a statement gets no reads until it passes a check again, and a
+# request whose replica fails mid-way is run again on the primary.
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class RoutingSession(Session):
+    # Session class for the app's SQLAlchemy(): inside a @read_replica handler
+    # statements go to the chosen replica, except while flushing
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get("replica")
+            if replica is not None:
+                return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replica:
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        # Assumed up until the first check; building the app never connects
+        self.healthy = True
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+
+    def mark_down(self, error):
+        if self.healthy:
+            logger.warning("Replica marked down", extra={"replica": self.name, "error": str(error)})
+        self.healthy = False
+        self.error = str(error)
+
+    def mark_up(self, lag):
+        if not self.healthy:
+            logger.info("Replica back up", extra={"replica": self.name, "lag": lag})
+        self.healthy = True
+        self.error = None
+        self.lag = lag
+
+    def status(self):
+        return {
+            "name": self.name,
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+        }
+
+
+class ReplicaSet:
+
+    def __init__(self, replicas, pins, pin_seconds=5, interval=5.0, max_lag=0.0):
+        self.replicas = replicas
+        self.pins = pins
+        self.pin_seconds = pin_seconds
+        self.interval = interval
+        self.max_lag = max_lag
+        self._checker_pid = None
+        self._lock = threading.Lock()
+
+    def choose(self):
+        # A random healthy replica, or None to read from the primary
+        self._ensure_checker()
+        healthy = [r for r in self.replicas if r.healthy]
+        return random.choice(healthy) if healthy else None
+
+    def pin(self, key):
+        if self.pin_seconds > 0:
+            self.pins.set(f"pin:{key}", b"1", math.ceil(self.pin_seconds))
+
+    def pinned(self, key):
+        return self.pin_seconds > 0 and self.pins.get(f"pin:{key}") is not None
+
+    def check(self, replica):
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                lag = None
+                if self.max_lag and replica.engine.dialect.name == "mysql":
+                    lag = _replication_lag(conn)
+                    if lag is None:
+                        raise RuntimeError("Replication is not running")
+                    if lag > self.max_lag:
+                        raise RuntimeError(f"Replication lag {lag}s over REPLICA_MAX_LAG")
+            replica.mark_up(lag)
+        except Exception as e:
+            replica.mark_down(e)
+        replica.checked_at = datetime.utcnow()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self.check(replica)
+
+    def _ensure_checker(self):
+        # Started on first use in each process; threads do not survive a fork
+        pid = os.getpid()
+        if self.interval <= 0 or self._checker_pid == pid:
+            return
+        with self._lock:
+            if self._checker_pid == pid:
+                return
+            self._checker_pid = pid
+            threading.Thread(target=self._run_checks, name="replica-health", daemon=True).start()
+
+    def _run_checks(self):
+        while True:
+            time.sleep(self.interval)
+            self.check_all()
+
+
+def _replication_lag(conn):
+    # Seconds behind the source; None when replication is stopped, 0 on a server
+    # that is not a replica at all. Needs the REPLICATION CLIENT privilege.
+    for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                              ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        try:
+            row = conn.execute(text(statement)).mappings().first()
+        except exc.ProgrammingError:
+            continue  # MySQL before 8.0.22 has no SHOW REPLICA STATUS
+        return 0 if row is None else row[column]
+    raise RuntimeError("Cannot read replication status")
+
+
+def _watch(replica):
+    def handle_error(context):
+        # Connection failures and server errors take the replica out until the
+        # next passing check; the running request is retried on the primary
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, (exc.OperationalError, exc.InterfaceError)):
+            replica.mark_down(context.original_exception)
+            if has_app_context() and g.get("replica") is replica:
+                g.replica_failed = True
+    event.listen(replica.engine, "handle_error", handle_error)
+
+
+def _replicas():
+    return current_app.extensions.get("replicas")
+
+
+def _jwt_user_id():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:  # no JWT checked on this request
+        return None
+
+
+def read_replica(view):
+    # Runs the view against a replica unless the caller wrote recently. Must sit
+    # below @jwt_required() and above @cached_response.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replicas = _replicas()
+        if replicas is None or request.method not in SAFE_METHODS:
+            return view(*args, **kwargs)
+        user_id = _jwt_user_id()
+        if user_id is not None and replicas.pinned(f"user:{user_id}"):
+            return view(*args, **kwargs)
+        g.replica = replicas.choose()
+        if g.replica is None:
+            return view(*args, **kwargs)
+
+        try:
+            response = view(*args, **kwargs)
+        except Exception:
+            if not g.get("replica_failed"):
+                raise
+        finally:
+            failed = g.pop("replica_failed", False) and g.replica
+            g.replica = None
+        if not failed:
+            return response
+
+        logger.warning("Replica read failed, retrying on the primary", extra={"replica": failed.name})
+        current_app.extensions["sqlalchemy"].session.rollback()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def primary_after_write(namespaces):
+    # Called on a response cache miss: data written within the pin window is read
+    # from the primary, so the entry stored for the new generation is current
+    replicas = _replicas()
+    if replicas is not None and g.get("replica") is not None:
+        if any(replicas.pinned(f"ns:{namespace}") for namespace in namespaces):
+            g.replica = None
+
+
+def pin_namespaces(namespaces):
+    replicas = _replicas()
+    if replicas is not None:
+        for namespace in namespaces:
+            replicas.pin(f"ns:{namespace}")
+
+
+def init_replicas(app):
+    uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+    if not uris:
+        app.extensions["replicas"] = None
+        return None
+
+    from cache import MemoryBackend, RedisBackend
+
+    if app.config.get("REPLICA_PIN_BACKEND", "memory") == "redis":
+        pins = RedisBackend.from_url(app.config["REPLICA_PIN_REDIS_URL"])
+    else:
+        pins = MemoryBackend(app.config.get("REPLICA_PIN_SIZE", 10000))
+
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    replicas = []
+    for index, uri in enumerate(uris, start=1):
+        replica = Replica(f"replica{index}", create_engine(uri, **options))
+        _watch(replica)
+        dispose_after_fork(replica.engine)
+        replicas.append(replica)
+
+    replica_set = ReplicaSet(
+        replicas, pins,
+        pin_seconds=app.config.get("REPLICA_PIN_SECONDS", 5),
+        interval=app.config.get("REPLICA_HEALTH_INTERVAL", 5.0),
+        max_lag=app.config.get("REPLICA_MAX_LAG", 0.0),
+    )
+    app.extensions["replicas"] = replica_set
+
+    @app.after_request
+    def pin_writer(response):
+        # Successful writes keep the caller's reads on the primary for a while
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user_id = _jwt_user_id()
+            if user_id is not None:
+                replica_set.pin(f"user:{user_id}")
+        return response
+
+    return replica_set
@@ -1,15 +1,46 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from groq import Groq
-from config import Config
-from models import Project, Task
+import json
+from models import db, Project, Task
+from identity import current_role
+from ai_context import project_context
+from jobs import enqueue, job_handler, JobLimitError
+from routes.task_routes import prepare_task_rows, announce_created_tasks
+from ai_client import AIBusyError, ai_gate, cache_key
 
 bp = Blueprint("ai", __name__, url_prefix="/api/ai")
 
-def get_groq_client():
-    if not Config.GROQ_API_KEY:
-        raise RuntimeError("GROQ_API_KEY not set in environment")
-    return Groq(api_key=Config.GROQ_API_KEY)
+SYSTEM_PROMPT = "You are an expert project assistant for software teams."
+
+STORIES_PROMPT = (
+    "Write user stories for the project below. Reply with JSON only, shaped as "
+    '{"stories": [{"title": "As a <role>, I want <goal> so that <benefit>", "description": "<acceptance criteria>"}]}.'
+)
+
+def completion_args(gate, mode, context, final_prompt, stream=False, max_tokens=512):
+    return dict(
+        model=gate.model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Mode: {mode}\n\nContext:\n{context}\n\nUser Prompt:\n{final_prompt}"}
+        ],
+        temperature=0.4,
+        max_completion_tokens=max_tokens,
+        stream=stream,
+    )
+
+# Helper function: one blocking completion through the shared slot gate, cached
+def complete(mode, context, final_prompt, max_tokens=512):
+    gate = ai_gate()
+    with gate.slot():
+        completion = gate.client().chat.completions.create(
+            **completion_args(gate, mode, context, final_prompt, max_tokens=max_tokens))
+    text = completion.choices[0].message.content if completion.choices else ""
+    gate.cache.set(cache_key(mode, final_prompt, context), text, gate.cache_ttl)
+    return text
+
+def assist_prompt(prompt, context):
+    return prompt or f"Summarize the following project and suggest next steps:\n\n{context}"
 
 @bp.route("/assist", methods=["POST"])
 @jwt_required()
@@ -19,33 +50,139 @@ def assist():
         prompt = (data.get("prompt") or "").strip()
         project_id = data.get("project_id")
         mode = data.get("mode", "general")  # general | ideas | summary | description
-
-        # Optional context from project/tasks
-        context = ""
-        if project_id:
-            p = Project.query.get(project_id)
-            if p:
-                tasks = Task.query.filter_by(project_id=project_id).all()
-                lines = [f"- {t.title} | {t.status.value} | Deadline: {t.deadline or 'N/A'}" for t in tasks]
-                context = f"Project: {p.title}\nDescription: {p.description or 'N/A'}\nTasks:\n" + "\n".join(lines)
+        stream = bool(data.get("stream"))
 
         if not prompt and not project_id:
             return jsonify({"message": "Provide 'prompt' or 'project_id'"}), 400
 
-        final_prompt = prompt or f"Summarize the following project and suggest next steps:\n\n{context}"
-
-        client = get_groq_client()
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are an expert project assistant for software teams."},
-                {"role": "user", "content": f"Mode: {mode}\n\nContext:\n{context}\n\nUser Prompt:\n{final_prompt}"}
-            ],
-            temperature=0.4,
-            max_completion_tokens=512,
-        )
-
-        text = completion.choices[0].message.content if completion.choices else ""
-        return jsonify({"message": text}), 200
+        # Optional context from project/tasks
+        context = project_context(project_id) if project_id else ""
+        final_prompt = assist_prompt(prompt, context)
+
+        gate = ai_gate()
+        key = cache_key(mode, final_prompt, context)
+        cached = gate.cache.get(key)
+        if cached is not None:
+            if stream:
+                return Response(cached, mimetype="text/plain", headers={"X-Cache": "HIT"})
+            return jsonify({"message": cached, "cached": True}), 200
+
+        # "async": true answers at once with a job id; poll /api/jobs/<id> for the text
+        if data.get("async"):
+            job = enqueue("ai.assist", int(get_jwt_identity()), {"prompt": prompt, "project_id": project_id, "mode": mode})
+            return jsonify({"message": "Request queued", "job_id": job.id}), 202
+
+        # Nothing below needs the database; hand the connection back before the slow call
+        db.session.remove()
+
+        if stream:
+            gate.acquire()
+            try:
+                chunks = gate.client().chat.completions.create(**completion_args(gate, mode, context, final_prompt, stream=True))
+            except Exception:
+                gate.release()
+                raise
+
+            def generate():
+                parts = []
+                for chunk in chunks:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                gate.cache.set(key, "".join(parts), gate.cache_ttl)
+
+            response = Response(generate(), mimetype="text/plain", headers={"X-Cache": "MISS"})
+            # Runs when the server closes the response, even if the client went away early
+            response.call_on_close(gate.release)
+            return response
+
+        return jsonify({"message": complete(mode, context, final_prompt)}), 200
+    except JobLimitError as e:
+        return jsonify({"message": str(e)}), 429
+    except AIBusyError as e:
+        return jsonify({"message": str(e)}), 503
     except Exception as e:
         return jsonify({"message": str(e)}), 500
+
+@job_handler("ai.assist")
+def run_assist_job(job, payload):
+    mode = payload.get("mode", "general")
+    project_id = payload.get("project_id")
+    context = project_context(project_id) if project_id else ""
+    final_prompt = assist_prompt((payload.get("prompt") or "").strip(), context)
+    cached = ai_gate().cache.get(cache_key(mode, final_prompt, context))
+    if cached is not None:
+        return {"message": cached}
+    # Release the DB connection for the duration of the LLM call
+    db.session.close()
+    return {"message": complete(mode, context, final_prompt)}
+
+# Helper function: the story list out of a model reply, tolerating prose around the JSON
+def parse_stories(text):
+    start, end = (text or "").find("{"), (text or "").rfind("}")
+    try:
+        data = json.loads(text[start:end + 1]) if 0 <= start < end else None
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict) or not isinstance(data.get("stories"), list):
+        # Not a ValueError: a malformed reply is worth another attempt
+        raise RuntimeError("AI reply did not contain a story list")
+    return [{
+        "title": str(s["title"]).strip()[:200],
+        "description": str(s.get("description") or "").strip()
+    } for s in data["stories"] if isinstance(s, dict) and s.get("title")]
+
+@bp.route("/generate-user-stories", methods=["POST"])
+@jwt_required()
+def generate_user_stories():
+    try:
+        data = request.get_json() or {}
+        project_id = data.get("project_id")
+        description = (data.get("projectDescription") or "").strip()
+        create_tasks = bool(data.get("create_tasks"))
+
+        if not project_id and not description:
+            return jsonify({"message": "Provide 'project_id' or 'projectDescription'"}), 400
+        if project_id and db.session.get(Project, project_id) is None:
+            return jsonify({"message": "Project not found"}), 404
+        if create_tasks:
+            if not project_id:
+                return jsonify({"message": "'create_tasks' needs a 'project_id'"}), 400
+            # Only Admin and Manager can create tasks
+            if current_role() not in ["ADMIN", "MANAGER"]:
+                return jsonify({"message": "Unauthorized. Only Admin and Manager can create tasks."}), 403
+
+        job = enqueue("ai.user_stories", int(get_jwt_identity()), {
+            "project_id": project_id,
+            "projectDescription": description,
+            "create_tasks": create_tasks
+        })
+        return jsonify({"message": "Generation queued", "job_id": job.id}), 202
+    except JobLimitError as e:
+        return jsonify({"message": str(e)}), 429
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+@job_handler("ai.user_stories")
+def run_user_stories_job(job, payload):
+    project_id = payload.get("project_id")
+    context = project_context(project_id) if project_id else ""
+    prompt = f"{STORIES_PROMPT}\n\n{payload.get('projectDescription') or 'See the project context.'}"
+    db.session.close()
+    job.progress(10)
+
+    text = complete("user_stories", context, prompt, max_tokens=2048)
+    stories = parse_stories(text)
+    job.progress(80)
+
+    created = 0
+    if payload.get("create_tasks") and stories:
+        rows, _ = prepare_task_rows([dict(s, project_id=project_id) for s in stories])
+        if rows:
+            db.session.execute(db.insert(Task), rows)
+            db.session.commit()
+            announce_created_tasks(rows)
+            created = len(rows)
+    return {"stories": stories, "created": created}
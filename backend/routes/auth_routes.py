@@ -1,16 +1,25 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+import logging
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models import db, User, RoleEnum
+from cache import invalidate
+from passwords import HashingBusyError, hash_password, verify_password, needs_rehash
+from ratelimit import client_ip, limit_exceeded, record_attempt, too_many_requests
 from datetime import timedelta
 
 bp = Blueprint("auth", __name__, url_prefix="/api/auth")
+logger = logging.getLogger(__name__)
 
 @bp.route("/register", methods=["POST"])
 def register():
     try:
         data = request.json
-        print(f"Register request: {data['email']}")
+
+        rule = ("register-ip", client_ip(), current_app.config["LOGIN_LIMIT_PER_IP"])
+        retry = limit_exceeded(rule)
+        if retry:
+            return too_many_requests(retry)
+        record_attempt(rule)
         
         if User.query.filter_by(email=data["email"]).first():
             return jsonify({"message": "Email already registered"}), 400
@@ -18,18 +27,20 @@ def register():
         user = User(
             full_name=data["full_name"],
             email=data["email"],
-            password_hash=generate_password_hash(data["password"]),
+            password_hash=hash_password(data["password"]),
             role=RoleEnum[data.get("role", "DEVELOPER").upper()]
         )
         db.session.add(user)
         db.session.commit()
+        invalidate("users")
 
-        print(f"User registered: {user.email} (ID: {user.id})")
+        logger.info("User registered", extra={"user_id": user.id, "role": user.role.name})
         return jsonify({"message": "User created successfully"}), 201
+    except HashingBusyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 503
     except Exception as e:
-        print(f"Register error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Register error")
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
@@ -37,17 +48,37 @@ def register():
 def login():
     try:
         data = request.json
-        print(f"Login attempt: {data.get('email', 'NO EMAIL')}")
+
+        # Checked before any hashing so a burst costs no CPU. Only failures are
+        # counted, so users sharing a proxy address are not locked out by logins
+        # that succeed.
+        rules = (
+            ("login-ip", client_ip(), current_app.config["LOGIN_LIMIT_PER_IP"]),
+            ("login-email", data.get("email"), current_app.config["LOGIN_LIMIT_PER_EMAIL"])
+        )
+        retry = limit_exceeded(*rules)
+        if retry:
+            logger.warning("Login rate limited", extra={"ip": client_ip()})
+            return too_many_requests(retry)
         
         user = User.query.filter_by(email=data["email"]).first()
+        # Hand the connection back while hashing; the loaded user stays readable
+        db.session.close()
         
-        if not user:
-            print(f"User not found: {data['email']}")
-            return jsonify({"message": "Invalid email or password"}), 401
-        
-        if not check_password_hash(user.password_hash, data["password"]):
-            print(f"Wrong password for: {data['email']}")
+        if not verify_password(user.password_hash if user else None, data["password"]):
+            record_attempt(*rules)
+            logger.info("Login failed", extra={
+                "reason": "unknown_user" if not user else "wrong_password",
+                "user_id": user.id if user else None,
+                "ip": client_ip()
+            })
             return jsonify({"message": "Invalid email or password"}), 401
+
+        # Move old hashes to the configured method while the password is at hand
+        if needs_rehash(user.password_hash):
+            db.session.query(User).filter(User.id == user.id) \
+                .update({User.password_hash: hash_password(data["password"])}, synchronize_session=False)
+            db.session.commit()
         
         # Create JWT token with user ID as STRING (Flask-JWT-Extended requirement)
         access_token = create_access_token(
@@ -55,8 +86,7 @@ def login():
             expires_delta=timedelta(hours=24)
         )
 
-        print(f"Login successful: {user.email} (ID: {user.id}, Role: {user.role.value})")
-        print(f"Token generated with identity: '{str(user.id)}' (string)")
+        logger.info("Login successful", extra={"user_id": user.id, "role": user.role.name})
 
         return jsonify({
             "access_token": access_token,
@@ -67,8 +97,8 @@ def login():
                 "role": user.role.value
             }
         }), 200
+    except HashingBusyError as e:
+        return jsonify({"message": str(e)}), 503
     except Exception as e:
-        print(f"Login error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Login error")
         return jsonify({"message": str(e)}), 400
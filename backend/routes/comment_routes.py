@@ -1,28 +1,35 @@
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Comment, Task, User
+from models import db, Comment, Task
+from identity import current_role
+from cache import cached_response, invalidate
+from replicas import read_replica
+from events import publish
+from pagination import paginate, page_body
+from serializers import fetch_rows, comment_rows, comment_to_dict
 from datetime import datetime
 
 bp = Blueprint("comments", __name__, url_prefix="/api/comments")
+logger = logging.getLogger(__name__)
 
 @bp.route("/task/<int:task_id>", methods=["GET"])
 @jwt_required()
+@read_replica
+@cached_response("comments", "users")
 def get_task_comments(task_id):
     try:
-        comments = Comment.query.filter_by(task_id=task_id).order_by(Comment.created_at.desc()).all()
-        result = []
-        for c in comments:
-            user = User.query.get(c.user_id)
-            result.append({
-                "id": c.id,
-                "content": c.content,
-                "user_name": user.full_name if user else "Unknown",
-                "user_role": user.role.value if user else "Unknown",
-                "created_at": c.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            })
-        return jsonify(result), 200
+        query = comment_rows().filter(Comment.task_id == task_id)
+
+        # Clients that already hold a page only ask for comments newer than it
+        if request.args.get("since"):
+            query = query.filter(Comment.created_at > datetime.fromisoformat(request.args["since"]))
+
+        comments, next_cursor = paginate(query, Comment, request.args, descending=True, fetch=fetch_rows)
+        result = [comment_to_dict(c) for c in comments]
+        return jsonify(page_body(request.args, result, next_cursor)), 200
     except Exception as e:
-        print(f"Error fetching comments: {str(e)}")
+        logger.exception("Error fetching comments")
         return jsonify({"message": str(e)}), 400
 
 @bp.route("/task/<int:task_id>", methods=["POST"])
@@ -36,12 +43,9 @@ def add_comment(task_id):
         task = Task.query.get_or_404(task_id)
         
         # Verify user exists
-        user = User.query.get(int(current_user_id))
-        if not user:
+        if not current_role():
             return jsonify({"message": "User not found"}), 404
 
-        print(f"Adding comment to task {task_id} by {user.full_name}")
-
         comment = Comment(
             content=data["content"],
             task_id=task_id,
@@ -49,16 +53,16 @@ def add_comment(task_id):
         )
         db.session.add(comment)
         db.session.commit()
+        invalidate("comments")
+        publish("comment.added", task.project_id, task.assigned_to, id=comment.id, task_id=task_id)
 
-        print(f"Comment added (ID: {comment.id})")
+        logger.info("Comment added", extra={"comment_id": comment.id, "task_id": task_id, "user_id": comment.user_id})
         return jsonify({
             "message": "Comment added",
             "id": comment.id
         }), 201
     except Exception as e:
-        print(f"Error adding comment: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error adding comment")
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
@@ -70,12 +74,12 @@ def delete_comment(id):
         comment = Comment.query.get_or_404(id)
         
         # Only comment author or Admin can delete
-        user = User.query.get(int(current_user_id))
-        if comment.user_id != int(current_user_id) and user.role.name != "ADMIN":
+        if comment.user_id != int(current_user_id) and current_role() != "ADMIN":
             return jsonify({"message": "Unauthorized"}), 403
         
         db.session.delete(comment)
         db.session.commit()
+        invalidate("comments")
         return jsonify({"message": "Comment deleted"}), 200
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,69 @@
+import logging
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import date
+from models import Project, Task, User
+from identity import current_role
+from cache import cached_response
+from replicas import read_replica
+from routes.task_routes import visible_tasks_query
+from serializers import fetch_rows, project_rows, project_to_dict, task_to_dict, user_rows, user_to_dict
+
+bp = Blueprint("dashboard", __name__, url_prefix="/api/dashboard")
+logger = logging.getLogger(__name__)
+
+SECTIONS = ["projects", "tasks", "users"]
+
+# Helper function: parse ?fields= into {section: set(fields) or None (all fields)}.
+# Plain names ("id,title") apply to every section; "tasks.title" targets one section.
+def parse_fields(raw):
+    shared, per_section = set(), {}
+    for name in (raw or "").split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if "." in name:
+            section, field = name.split(".", 1)
+            per_section.setdefault(section, set()).add(field)
+        else:
+            shared.add(name)
+    return {s: per_section.get(s) or shared or None for s in SECTIONS}
+
+def select_fields(items, fields):
+    if fields is None:
+        return items
+    return [{k: v for k, v in item.items() if k in fields} for item in items]
+
+@bp.route("", methods=["GET"])
+@jwt_required()
+@read_replica
+@cached_response("projects", "tasks", "users")
+def dashboard():
+    try:
+        current_user_id = int(get_jwt_identity())
+        role = current_role()
+        if not role:
+            return jsonify({"message": "User not found"}), 404
+
+        fields = parse_fields(request.args.get("fields"))
+        logger.debug("Building dashboard", extra={"user_id": current_user_id, "role": role})
+
+        # Skip loading the description text columns when the client did not ask for them
+        project_descriptions = fields["projects"] is None or "description" in fields["projects"]
+        projects = fetch_rows(project_rows(project_descriptions).order_by(Project.created_at, Project.id))
+
+        task_descriptions = fields["tasks"] is None or "description" in fields["tasks"]
+        tasks = fetch_rows(visible_tasks_query(role, current_user_id, {}, task_descriptions)
+                           .order_by(Task.created_at, Task.id))
+
+        users = fetch_rows(user_rows().order_by(User.id))
+
+        today = date.today()
+        return jsonify({
+            "projects": select_fields([project_to_dict(row, project_descriptions) for row in projects], fields["projects"]),
+            "tasks": select_fields([task_to_dict(t, today, task_descriptions) for t in tasks], fields["tasks"]),
+            "users": select_fields([user_to_dict(u) for u in users], fields["users"])
+        }), 200
+    except Exception as e:
+        logger.exception("Error building dashboard")
+        return jsonify({"message": str(e)}), 400
@@ -0,0 +1,45 @@
+import os
+from flask import Blueprint, current_app, jsonify
+from flask_jwt_extended import jwt_required
+from models import db
+from dbpool import pool_stats
+from identity import current_role
+
+bp = Blueprint("diagnostics", __name__, url_prefix="/api/diagnostics")
+
+@bp.route("/pool", methods=["GET"])
+@jwt_required()
+def pool():
+    if current_role() != "ADMIN":
+        return jsonify({"message": "Unauthorized"}), 403
+
+    try:
+        stats = pool_stats(db.engine)
+        options = current_app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+        per_worker = options.get("pool_size", 0) + options.get("max_overflow", 0)
+        stats.update({
+            "pid": os.getpid(),
+            "workers": workers,
+            # Worst case connections this deployment can open against max_connections
+            "max_connections_needed": workers * per_worker,
+        })
+        return jsonify(stats), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 400
+
+@bp.route("/replicas", methods=["GET"])
+@jwt_required()
+def replicas():
+    if current_role() != "ADMIN":
+        return jsonify({"message": "Unauthorized"}), 403
+
+    replica_set = current_app.extensions.get("replicas")
+    if replica_set is None:
+        return jsonify({"enabled": False, "replicas": []}), 200
+    return jsonify({
+        "enabled": True,
+        "pid": os.getpid(),
+        "pin_seconds": replica_set.pin_seconds,
+        "replicas": [dict(r.status(), pool=pool_stats(r.engine)) for r in replica_set.replicas]
+    }), 200
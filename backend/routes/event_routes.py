@@ -0,0 +1,103 @@
+import json
+import queue
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, verify_jwt_in_request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from models import db, User
+from identity import current_role, current_user_id
+
+bp = Blueprint("events", __name__, url_prefix="/api/events")
+
+def format_event(event):
+    payload = {k: event[k] for k in ("type", "project_id", "data")}
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(payload)}\n\n"
+
+# EventSource cannot set an Authorization header, and a token in the URL ends up
+# in proxy and access logs. So the stream takes ?ticket=<ticket> instead: signed
+# for this endpoint only, worthless as an access token and expired after
+# EVENTS_TICKET_TTL seconds. Fetch a fresh one before every (re)connect.
+def _tickets():
+    return URLSafeTimedSerializer(current_app.config["JWT_SECRET_KEY"], salt="events-ticket")
+
+@bp.route("/ticket", methods=["POST"])
+@jwt_required()
+def create_ticket():
+    ttl = current_app.config.get("EVENTS_TICKET_TTL", 60)
+    return jsonify({"ticket": _tickets().dumps(current_user_id()), "expires_in": ttl}), 201
+
+# Helper function: (user id, role name) of the caller, from the ticket or the
+# Authorization header; role is None when the user is gone
+def stream_caller():
+    ticket = request.args.get("ticket")
+    if ticket is None:
+        verify_jwt_in_request()
+        return current_user_id(), current_role()
+    user_id = _tickets().loads(ticket, max_age=current_app.config.get("EVENTS_TICKET_TTL", 60))
+    role = db.session.query(User.role).filter(User.id == user_id).scalar()
+    db.session.close()
+    return user_id, role.name if role else None
+
+@bp.route("", methods=["GET"])
+def stream_events():
+    try:
+        user_id, role = stream_caller()
+    except SignatureExpired:
+        return jsonify({"message": "Stream ticket has expired. Request a new one."}), 401
+    except BadSignature:
+        return jsonify({"message": "Invalid stream ticket."}), 401
+    if not role:
+        return jsonify({"message": "User not found"}), 404
+    try:
+        project_ids = {int(p) for p in request.args.get("project_id", "").split(",") if p.strip()}
+        last_id = int(request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or 0)
+        broker = current_app.extensions["events"]
+        heartbeat = current_app.config.get("EVENTS_HEARTBEAT", 15)
+    except Exception as e:
+        return jsonify({"message": str(e)}), 400
+
+    def visible(event):
+        if project_ids and event.get("project_id") not in project_ids:
+            return False
+        # Developers only hear about their own tasks and the comments on them
+        if role == "DEVELOPER" and event.get("assigned_to") != user_id:
+            return False
+        return True
+
+    # The generator runs after the request context is gone, so it only uses the
+    # values captured above and never holds a DB connection.
+    def generate():
+        sub = broker.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            sent = last_id
+            if last_id:
+                missed = broker.replay(last_id)
+                if missed is None:
+                    # Too far behind for the buffer: the client should call /api/sync
+                    yield "event: resync\ndata: {}\n\n"
+                    missed, sent = [], 0
+                for event in missed:
+                    if visible(event):
+                        yield format_event(event)
+                    sent = max(sent, event["id"])
+
+            while True:
+                try:
+                    event = sub.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if sub.overflowed:
+                    # Slow consumer: close so it reconnects and replays from Last-Event-ID
+                    yield "event: overflow\ndata: {}\n\n"
+                    return
+                if event["id"] <= sent:
+                    continue
+                sent = event["id"]
+                if visible(event):
+                    yield format_event(event)
+        finally:
+            broker.unsubscribe(sub)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(generate(), mimetype="text/event-stream", headers=headers)
@@ -0,0 +1,211 @@
+import csv
+import io
+import json
+import os
+from datetime import date
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Task, Project, Comment, User
+from identity import current_role
+from routes.task_routes import apply_task_filters
+from jobs import enqueue, job_handler, JobLimitError
+
+bp = Blueprint("export", __name__, url_prefix="/api/export")
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH = 1000
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _json_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+# Helper function: encode dict rows as NDJSON or CSV chunks without building the full list
+def export_chunks(fields, rows, fmt):
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([row[f] for f in fields])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+    else:
+        for row in rows:
+            yield json.dumps({f: _json_value(row[f]) for f in fields}) + "\n"
+
+def stream_export(name, fields, rows, fmt):
+    headers = {"Content-Disposition": f"attachment; filename={name}.{fmt}"}
+    return Response(stream_with_context(export_chunks(fields, rows, fmt)), mimetype=FORMATS[fmt], headers=headers)
+
+def export_format(args):
+    fmt = args.get("format", "ndjson").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    return fmt
+
+# Query builders and row mappers shared by the streamed GET exports and the
+# export job in jobs.py; role/user_id/args are passed in so they also work
+# outside a request.
+def task_export_query(role, user_id, args):
+    query = db.session.query(
+        Task.id, Task.title, Task.description, Task.status, Task.project_id,
+        Task.assigned_to, User.full_name, Task.deadline, Task.created_at
+    ).outerjoin(User, User.id == Task.assigned_to)
+
+    # Same visibility as list_tasks: developers only export their assigned tasks
+    if role == "DEVELOPER":
+        query = query.filter(Task.assigned_to == user_id)
+    elif args.get("assigned_to"):
+        query = query.filter(Task.assigned_to == int(args["assigned_to"]))
+    return apply_task_filters(query, args).order_by(Task.id)
+
+def task_export_row(t):
+    return {
+        "id": t.id,
+        "title": t.title,
+        "description": t.description,
+        "status": t.status.value if t.status else None,
+        "project_id": t.project_id,
+        "assigned_to": t.assigned_to,
+        "assigned_to_name": t.full_name or "Unassigned",
+        "deadline": t.deadline,
+        "created_at": t.created_at
+    }
+
+def project_export_query(role, user_id, args):
+    return db.session.query(
+        Project.id, Project.title, Project.description, User.full_name, Project.created_at
+    ).outerjoin(User, User.id == Project.created_by).order_by(Project.id)
+
+def project_export_row(p):
+    return {
+        "id": p.id,
+        "title": p.title,
+        "description": p.description,
+        "created_by": p.full_name or "Unknown",
+        "created_at": p.created_at
+    }
+
+def comment_export_query(role, user_id, args):
+    query = db.session.query(
+        Comment.id, Comment.task_id, Comment.content, Comment.user_id, User.full_name, Comment.created_at
+    ).outerjoin(User, User.id == Comment.user_id)
+
+    # Developers only export comments on tasks assigned to them
+    if role == "DEVELOPER":
+        query = query.join(Task, Task.id == Comment.task_id).filter(Task.assigned_to == user_id)
+    if args.get("task_id"):
+        query = query.filter(Comment.task_id == int(args["task_id"]))
+    return query.order_by(Comment.id)
+
+def comment_export_row(c):
+    return {
+        "id": c.id,
+        "task_id": c.task_id,
+        "content": c.content,
+        "user_id": c.user_id,
+        "user_name": c.full_name or "Unknown",
+        "created_at": c.created_at
+    }
+
+# entity -> (fields, query builder, row mapper)
+EXPORTS = {
+    "tasks": (["id", "title", "description", "status", "project_id", "assigned_to",
+               "assigned_to_name", "deadline", "created_at"], task_export_query, task_export_row),
+    "projects": (["id", "title", "description", "created_by", "created_at"], project_export_query, project_export_row),
+    "comments": (["id", "task_id", "content", "user_id", "user_name", "created_at"], comment_export_query, comment_export_row),
+}
+
+# Primary key each export is ordered by, for batching in the export job
+EXPORT_KEYS = {"tasks": Task.id, "projects": Project.id, "comments": Comment.id}
+
+@bp.route("/<entity>", methods=["GET"])
+@jwt_required()
+def export(entity):
+    if entity not in EXPORTS:
+        return jsonify({"message": f"Unknown export '{entity}'"}), 404
+    try:
+        fmt = export_format(request.args)
+        role = current_role()
+        if not role:
+            return jsonify({"message": "User not found"}), 404
+
+        fields, build_query, to_row = EXPORTS[entity]
+        query = build_query(role, int(get_jwt_identity()), request.args).yield_per(EXPORT_BATCH)
+        return stream_export(entity, fields, (to_row(r) for r in query), fmt)
+    except Exception as e:
+        return jsonify({"message": str(e)}), 400
+
+# Same export written to a file by a background job; fetch it from
+# /api/jobs/<id>/download once the job has succeeded
+@bp.route("/<entity>", methods=["POST"])
+@jwt_required()
+def export_job(entity):
+    if entity not in EXPORTS:
+        return jsonify({"message": f"Unknown export '{entity}'"}), 404
+    try:
+        args = dict(request.args)
+        args.update(request.get_json(silent=True) or {})
+        fmt = export_format(args)
+        role = current_role()
+        if not role:
+            return jsonify({"message": "User not found"}), 404
+
+        job = enqueue("export", int(get_jwt_identity()), {"entity": entity, "format": fmt, "args": args})
+        return jsonify({"message": "Export queued", "job_id": job.id}), 202
+    except JobLimitError as e:
+        return jsonify({"message": str(e)}), 429
+    except Exception as e:
+        return jsonify({"message": str(e)}), 400
+
+@job_handler("export")
+def run_export_job(job, payload):
+    entity, fmt, args = payload["entity"], payload["format"], payload.get("args") or {}
+    if entity not in EXPORTS:
+        raise ValueError(f"Unknown export '{entity}'")
+    # Role as of now, not as of enqueue, in case it changed in between
+    user = db.session.get(User, job.user_id)
+    if user is None:
+        raise ValueError("User not found")
+
+    fields, build_query, to_row = EXPORTS[entity]
+    query = build_query(user.role.name, user.id, args)
+    count = query.order_by(None).count()
+    total = count or 1
+    db.session.commit()
+
+    # Keyset batches, each in its own short read transaction, rather than one
+    # cursor held open for the whole export
+    key = EXPORT_KEYS[entity]
+    def rows():
+        last, done = 0, 0
+        while True:
+            batch = query.filter(key > last).limit(EXPORT_BATCH).all()
+            db.session.commit()
+            if not batch:
+                return
+            for r in batch:
+                yield to_row(r)
+            last, done = batch[-1].id, done + len(batch)
+            job.progress(done * 100 // total)
+
+    # Written under a temporary name so a failed attempt never leaves a partial file behind
+    path = job.result_path(f"{entity}.{fmt}")
+    partial = path + ".part"
+    try:
+        with open(partial, "w", newline="", encoding="utf-8") as f:
+            for chunk in export_chunks(fields, rows(), fmt):
+                f.write(chunk)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return {"file": path, "filename": f"{entity}.{fmt}", "mimetype": FORMATS[fmt], "rows": count}
@@ -0,0 +1,93 @@
+import json
+import os
+from flask import Blueprint, request, jsonify, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Job, JobStatusEnum
+from identity import current_role
+from pagination import paginate, page_body
+from jobs import cancel, FINISHED
+
+bp = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+def job_to_dict(job):
+    result = json.loads(job.result) if job.result else None
+    if isinstance(result, dict):
+        # Server-side file location stays private; clients use /download
+        result = {k: v for k, v in result.items() if k != "file"}
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status.value,
+        "progress": job.progress,
+        "result": result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+# Helper function: the job if the caller owns it (or is Admin), else None
+def visible_job(id):
+    job = db.session.get(Job, id)
+    if job is None:
+        return None
+    if job.user_id != int(get_jwt_identity()) and current_role() != "ADMIN":
+        return None
+    return job
+
+@bp.route("", methods=["GET"])
+@jwt_required()
+def list_jobs():
+    try:
+        query = Job.query.filter(Job.user_id == int(get_jwt_identity()))
+        if request.args.get("status"):
+            statuses = [JobStatusEnum[s.strip().upper()] for s in request.args["status"].split(",")]
+            query = query.filter(Job.status.in_(statuses))
+        jobs, next_cursor = paginate(query, Job, request.args, descending=True)
+        return jsonify(page_body(request.args, [job_to_dict(j) for j in jobs], next_cursor)), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 400
+
+@bp.route("/<int:id>", methods=["GET"])
+@jwt_required()
+def get_job(id):
+    job = visible_job(id)
+    if job is None:
+        return jsonify({"message": "Job not found"}), 404
+    return jsonify(job_to_dict(job)), 200
+
+@bp.route("/<int:id>/cancel", methods=["POST"])
+@jwt_required()
+def cancel_job(id):
+    try:
+        job = visible_job(id)
+        if job is None:
+            return jsonify({"message": "Job not found"}), 404
+        if job.status in FINISHED:
+            return jsonify({"message": f"Job already {job.status.value.lower()}"}), 409
+
+        if cancel(job):
+            return jsonify({"message": "Job cancelled"}), 200
+        return jsonify({"message": "Cancellation requested"}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+@bp.route("/<int:id>/download", methods=["GET"])
+@jwt_required()
+def download_job_result(id):
+    job = visible_job(id)
+    if job is None:
+        return jsonify({"message": "Job not found"}), 404
+    if job.status != JobStatusEnum.SUCCEEDED:
+        return jsonify({"message": "Job has not finished"}), 409
+
+    result = json.loads(job.result) if job.result else {}
+    path = result.get("file") if isinstance(result, dict) else None
+    if not path or not os.path.exists(path):
+        return jsonify({"message": "This job has no downloadable result"}), 404
+    return send_file(path, mimetype=result.get("mimetype"), as_attachment=True,
+                     download_name=result.get("filename"))
@@ -0,0 +1,15 @@
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from metrics import registry
+
+bp = Blueprint("metrics", __name__)
+
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    # Scraped by Prometheus, so no JWT; set METRICS_TOKEN to require
+    # "Authorization: Bearer <token>" when the endpoint is reachable publicly
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return jsonify({"message": "Unauthorized"}), 401
+
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
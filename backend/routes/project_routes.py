@@ -1,31 +1,35 @@
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Project, Task, User
+from sqlalchemy import and_, case, func
+from models import db, Project, Task, TaskStatusEnum
+from pagination import paginate, page_body
+from serializers import fetch_rows, project_rows, project_to_dict
+from identity import current_role
+from cache import cached_response, invalidate
+from replicas import read_replica
+from ai_context import invalidate_context
+import deletes
+from jobs import enqueue, job_handler, JobLimitError
 from datetime import date
 
 bp = Blueprint("projects", __name__, url_prefix="/api/projects")
+logger = logging.getLogger(__name__)
 
 @bp.route("/", methods=["POST"])
 @jwt_required()
 def create_project():
     try:
         current_user_id = get_jwt_identity()
-        print(f"Current user ID from token: {current_user_id} (type: {type(current_user_id)})")
-        
-        user = User.query.get(int(current_user_id))
-        if not user:
-            print(f"User not found with ID: {current_user_id}")
+        role = current_role()
+        if not role:
             return jsonify({"message": "User not found"}), 404
 
-        print(f"User found: {user.full_name} (Role: {user.role.value})")
-
         # Only Admin and Manager can create projects
-        if user.role.name not in ["ADMIN", "MANAGER"]:
-            print(f"Unauthorized role: {user.role.value}")
+        if role not in ["ADMIN", "MANAGER"]:
             return jsonify({"message": "Unauthorized. Only Admin and Manager can create projects."}), 403
         
         data = request.json
-        print(f"Creating project: {data}")
 
         p = Project(
             title=data["title"], 
@@ -34,82 +38,123 @@ def create_project():
         )
         db.session.add(p)
         db.session.commit()
+        invalidate("projects")
 
-        print(f"Project created with ID: {p.id}")
+        logger.info("Project created", extra={"project_id": p.id, "user_id": p.created_by})
         return jsonify({
             "message": "Project created",
             "id": p.id
         }), 201
     except Exception as e:
-        print(f"Error creating project: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating project")
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
 @bp.route("/", methods=["GET"])
 @jwt_required()
+@read_replica
+@cached_response("projects", "tasks", "users")
 def list_projects():
     try:
-        current_user_id = get_jwt_identity()
-        print(f"Fetching projects for user ID: {current_user_id}")
-        
-        projects = Project.query.all()
-        result = []
-        for p in projects:
-            creator = User.query.get(p.created_by) if p.created_by else None
-            result.append({
-                "id": p.id, 
-                "title": p.title, 
-                "description": p.description,
-                "created_by": creator.full_name if creator else "Unknown",
-                "task_count": len(p.tasks)
-            })
-        print(f"Found {len(result)} projects")
-        return jsonify(result), 200
+        query = project_rows()
+
+        search = (request.args.get("q") or "").strip()
+        if search:
+            query = query.filter(Project.title.contains(search, autoescape=True))
+
+        rows, next_cursor = paginate(query, Project, request.args, fetch=fetch_rows)
+        result = [project_to_dict(row) for row in rows]
+        logger.debug("Listed projects", extra={"count": len(result)})
+        return jsonify(page_body(request.args, result, next_cursor)), 200
     except Exception as e:
-        print(f"Error fetching projects: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error fetching projects")
         return jsonify({"message": str(e)}), 400
 
 @bp.route("/<int:id>", methods=["DELETE"])
 @jwt_required()
 def delete_project(id):
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
-        
         # Only Admin can delete projects
-        if user.role.name != "ADMIN":
+        if current_role() != "ADMIN":
             return jsonify({"message": "Unauthorized. Only Admin can delete projects."}), 403
         
-        project = Project.query.get_or_404(id)
-        db.session.delete(project)
-        db.session.commit()
-        return jsonify({"message": "Project deleted"}), 200
+        Project.query.get_or_404(id)
+        task_count = db.session.query(func.count(Task.id)).filter(Task.project_id == id).scalar()
+
+        # Large projects (or ?background=true) are deleted by a job; poll /api/jobs/<id>
+        if task_count > current_app.config["DELETE_INLINE_TASKS"] or request.args.get("background") == "true":
+            job = enqueue("projects.delete", int(get_jwt_identity()), {"project_id": id, "tasks": task_count})
+            return jsonify({"message": "Project deletion queued", "job_id": job.id}), 202
+
+        deleted = deletes.delete_project(id)
+        invalidate("projects", "tasks", "comments")
+        invalidate_context(id)
+        return jsonify({"message": "Project deleted", "tasks_deleted": deleted}), 200
+    except JobLimitError as e:
+        return jsonify({"message": str(e)}), 429
     except Exception as e:
+        logger.exception("Error deleting project")
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
+@job_handler("projects.delete")
+def run_project_delete(job, payload):
+    project_id, total = payload["project_id"], payload.get("tasks") or 1
+    deleted = deletes.delete_project(project_id, progress=lambda done: job.progress(done * 100 // total))
+    invalidate("projects", "tasks", "comments")
+    invalidate_context(project_id)
+    return {"project_id": project_id, "tasks_deleted": deleted}
+
+# Helper function: status counts and overdue totals for many projects in one GROUP BY
+def compute_metrics(project_ids):
+    overdue_case = case(
+        (and_(Task.deadline < date.today(), Task.status != TaskStatusEnum.DONE), 1),
+        else_=0
+    )
+    rows = db.session.query(
+        Task.project_id,
+        Task.status,
+        func.count(Task.id),
+        func.sum(overdue_case)
+    ).filter(Task.project_id.in_(project_ids)).group_by(Task.project_id, Task.status).all()
+
+    result = {pid: {"total": 0, "done": 0, "in_progress": 0, "todo": 0, "overdue": 0} for pid in project_ids}
+    for project_id, status, count, overdue in rows:
+        m = result[project_id]
+        m["total"] += count
+        m["overdue"] += int(overdue or 0)
+        if status is not None:
+            m[status.name.lower()] += count
+    for m in result.values():
+        m["progress"] = int((m["done"] / m["total"]) * 100) if m["total"] else 0
+    return result
+
 @bp.route("/<int:id>/metrics", methods=["GET"])
 @jwt_required()
+@read_replica
+@cached_response("projects", "tasks")
 def metrics(id):
     try:
         project = Project.query.get_or_404(id)
-        total = len(project.tasks)
-        done = len([t for t in project.tasks if t.status.name == "DONE"])
-        in_progress = len([t for t in project.tasks if t.status.name == "IN_PROGRESS"])
-        todo = len([t for t in project.tasks if t.status.name == "TODO"])
-        overdue = len([t for t in project.tasks if t.deadline and t.deadline < date.today() and t.status.name != "DONE"])
-        percent = int((done / total) * 100) if total else 0
-        return jsonify({
-            "total": total,
-            "done": done,
-            "in_progress": in_progress,
-            "todo": todo,
-            "overdue": overdue,
-            "progress": percent
-        }), 200
+        return jsonify(compute_metrics([project.id])[project.id]), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 400
+
+@bp.route("/metrics", methods=["GET"])
+@jwt_required()
+@read_replica
+@cached_response("projects", "tasks")
+def bulk_metrics():
+    try:
+        ids = request.args.get("ids")
+        if ids:
+            project_ids = [int(i) for i in ids.split(",") if i.strip()]
+            # Only report projects that actually exist
+            project_ids = [pid for (pid,) in db.session.query(Project.id).filter(Project.id.in_(project_ids)).all()]
+        else:
+            project_ids = [pid for (pid,) in db.session.query(Project.id).all()]
+
+        result = compute_metrics(project_ids) if project_ids else {}
+        return jsonify({str(pid): m for pid, m in result.items()}), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 400
@@ -0,0 +1,37 @@
+import logging
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from identity import current_role
+from pagination import parse_limit
+from search import search, TYPES
+
+bp = Blueprint("search", __name__, url_prefix="/api/search")
+logger = logging.getLogger(__name__)
+
+@bp.route("", methods=["GET"])
+@jwt_required()
+def search_all():
+    try:
+        q = (request.args.get("q") or "").strip()
+        if not q:
+            return jsonify({"message": "Provide 'q'"}), 400
+
+        role = current_role()
+        if not role:
+            return jsonify({"message": "User not found"}), 404
+
+        kinds = [k.strip() for k in request.args.get("type", ",".join(TYPES)).split(",") if k.strip()]
+        unknown = [k for k in kinds if k not in TYPES]
+        if unknown:
+            return jsonify({"message": f"Unknown type(s): {', '.join(unknown)}"}), 400
+
+        limit = parse_limit(request.args, default=20)
+        offset = max(0, int(request.args.get("offset", 0)))
+        results, has_more = search(q, kinds, role, int(get_jwt_identity()), limit, offset)
+        return jsonify({
+            "results": results,
+            "next_offset": offset + limit if has_more else None
+        }), 200
+    except Exception as e:
+        logger.exception("Error searching")
+        return jsonify({"message": str(e)}), 400
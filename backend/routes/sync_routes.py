@@ -0,0 +1,114 @@
+import base64
+import json
+import logging
+from datetime import date, datetime, timedelta
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import or_, and_
+from models import db, Task, Comment, Project, Tombstone
+from identity import current_role
+from pagination import keyset_after, parse_limit
+from routes.task_routes import visible_tasks_query
+from serializers import task_to_dict, project_rows, project_to_dict, comment_rows, comment_to_dict
+
+bp = Blueprint("sync", __name__, url_prefix="/api/sync")
+logger = logging.getLogger(__name__)
+
+# Default rows per entity type in one sync page
+SYNC_LIMIT = 200
+
+# The sync token is an opaque base64 JSON map of the last (updated_at, id) seen per
+# entity type plus the last tombstone id. No token means "from the beginning".
+def encode_token(positions):
+    raw = json.dumps(positions, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_token(token):
+    if not token:
+        return {}
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid sync token")
+
+# Helper function: next page of rows changed after the stored position and up to
+# the settle horizon, plus whether more remain
+def changed_after(query, model, position, limit, horizon):
+    query = query.filter(model.updated_at <= horizon)
+    if position:
+        query = query.filter(keyset_after(model.updated_at, model.id,
+                                          datetime.fromisoformat(position[0]), position[1]))
+    rows = query.order_by(model.updated_at, model.id).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+def last_position(obj):
+    return [obj.updated_at.isoformat(), obj.id]
+
+@bp.route("", methods=["GET"])
+@jwt_required()
+def sync():
+    try:
+        current_user_id = int(get_jwt_identity())
+        role = current_role()
+        if not role:
+            return jsonify({"message": "User not found"}), 404
+
+        positions = decode_token(request.args.get("since"))
+        limit = parse_limit(request.args, default=SYNC_LIMIT)
+        today = date.today()
+        has_more = False
+        # Rows stamped after this may belong to transactions that have not committed yet
+        horizon = datetime.utcnow() - timedelta(seconds=current_app.config.get("SYNC_SETTLE_SECONDS", 2))
+
+        # Tasks, with the same visibility as list_tasks
+        tasks, more = changed_after(visible_tasks_query(role, current_user_id, {}), Task, positions.get("tasks"), limit, horizon)
+        has_more |= more
+        if tasks:
+            positions["tasks"] = last_position(tasks[-1])
+
+        projects, more = changed_after(project_rows(), Project, positions.get("projects"), limit, horizon)
+        has_more |= more
+        if projects:
+            positions["projects"] = last_position(projects[-1])
+
+        comments_query = comment_rows()
+        if role == "DEVELOPER":
+            comments_query = comments_query.join(Task, Task.id == Comment.task_id) \
+                .filter(Task.assigned_to == current_user_id)
+        comments, more = changed_after(comments_query, Comment, positions.get("comments"), limit, horizon)
+        has_more |= more
+        if comments:
+            positions["comments"] = last_position(comments[-1])
+
+        tombstones = Tombstone.query.filter(Tombstone.id > positions.get("deleted", 0), Tombstone.deleted_at <= horizon)
+        if role == "DEVELOPER":
+            own_tasks = db.session.query(Task.id).filter(Task.assigned_to == current_user_id)
+            tombstones = tombstones.filter(or_(
+                Tombstone.entity == "project",
+                and_(Tombstone.entity == "task", Tombstone.assigned_to == current_user_id),
+                # Taken away from this developer, unless it has been given back since
+                and_(Tombstone.entity == "task_reassigned", Tombstone.assigned_to == current_user_id,
+                     Tombstone.entity_id.notin_(own_tasks)),
+                and_(Tombstone.entity == "comment", Tombstone.task_id.in_(own_tasks))
+            ))
+        else:
+            # Everyone else still sees reassigned tasks
+            tombstones = tombstones.filter(Tombstone.entity != "task_reassigned")
+        deleted = tombstones.order_by(Tombstone.id).limit(limit + 1).all()
+        has_more |= len(deleted) > limit
+        deleted = deleted[:limit]
+        if deleted:
+            positions["deleted"] = deleted[-1].id
+
+        return jsonify({
+            "tasks": [dict(task_to_dict(t, today), updated_at=t.updated_at.isoformat()) for t in tasks],
+            "projects": [dict(project_to_dict(row), updated_at=row.updated_at.isoformat()) for row in projects],
+            "comments": [dict(comment_to_dict(c), task_id=c.task_id, updated_at=c.updated_at.isoformat()) for c in comments],
+            "deleted": [{"entity": "task" if d.entity == "task_reassigned" else d.entity, "id": d.entity_id, "deleted_at": d.deleted_at.isoformat()} for d in deleted],
+            "next_token": encode_token(positions),
+            "has_more": has_more
+        }), 200
+    except Exception as e:
+        logger.exception("Error building sync page")
+        return jsonify({"message": str(e)}), 400
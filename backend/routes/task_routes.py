@@ -1,29 +1,64 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Task, TaskStatusEnum, User
+from models import db, Task, TaskStatusEnum, Project, User
+from identity import current_role
+from cache import cached_response, invalidate
+from replicas import read_replica
+from ai_context import invalidate_context
+from events import publish
+from pagination import paginate, page_body
+from serializers import fetch_rows, task_rows, task_to_dict
 from datetime import datetime, date
+from jobs import enqueue, job_handler, JobLimitError
+import deletes
+import csv
+import io
+import logging
 
 bp = Blueprint("tasks", __name__, url_prefix="/api/tasks")
+logger = logging.getLogger(__name__)
+
+# Upper bound on items accepted by the bulk endpoints in one request
+BULK_LIMIT = 10000
+
+# Helper function for the optional query-string filters on the task listing
+def apply_task_filters(query, args):
+    if args.get("project_id"):
+        query = query.filter(Task.project_id == int(args["project_id"]))
+    if args.get("status"):
+        statuses = [TaskStatusEnum[s.strip().upper()] for s in args["status"].split(",")]
+        query = query.filter(Task.status.in_(statuses))
+    if args.get("deadline_from"):
+        query = query.filter(Task.deadline >= datetime.strptime(args["deadline_from"], "%Y-%m-%d").date())
+    if args.get("deadline_to"):
+        query = query.filter(Task.deadline <= datetime.strptime(args["deadline_to"], "%Y-%m-%d").date())
+    return query
+
+# Helper function: the task listing query, limited to what the caller may see
+def visible_tasks_query(role, user_id, args, with_description=True):
+    query = task_rows(with_description)
+
+    # Developers only see their assigned tasks
+    if role == "DEVELOPER":
+        query = query.filter(Task.assigned_to == user_id)
+    elif args.get("assigned_to"):
+        query = query.filter(Task.assigned_to == int(args["assigned_to"]))
+
+    return apply_task_filters(query, args)
 
 @bp.route("/", methods=["POST"])
 @jwt_required()
 def create_task():
     try:
-        current_user_id = get_jwt_identity()
-        print(f"Current user ID from token: {current_user_id}")
-        
-        user = User.query.get(int(current_user_id))
-        if not user:
+        role = current_role()
+        if not role:
             return jsonify({"message": "User not found"}), 404
-        
-        print(f"User found: {user.full_name} (Role: {user.role.value})")
 
         # Only Admin and Manager can create tasks
-        if user.role.name not in ["ADMIN", "MANAGER"]:
+        if role not in ["ADMIN", "MANAGER"]:
             return jsonify({"message": "Unauthorized. Only Admin and Manager can create tasks."}), 403
         
         data = request.json
-        print(f"Creating task: {data}")
 
         t = Task(
             title=data["title"],
@@ -34,60 +69,41 @@ def create_task():
         )
         db.session.add(t)
         db.session.commit()
+        invalidate("tasks")
+        invalidate_context(t.project_id)
+        publish("task.created", t.project_id, t.assigned_to, id=t.id, title=t.title)
 
-        print(f"Task created with ID: {t.id}")
+        logger.info("Task created", extra={"task_id": t.id, "project_id": t.project_id})
         return jsonify({
             "message": "Task created",
             "id": t.id
         }), 201
     except Exception as e:
-        print(f"Error creating task: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating task")
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
 @bp.route("/", methods=["GET"])
 @jwt_required()
+@read_replica
+@cached_response("tasks", "users")
 def list_tasks():
     try:
         current_user_id = get_jwt_identity()
-        print(f"Fetching tasks for user ID: {current_user_id}")
-        
-        user = User.query.get(int(current_user_id))
-        if not user:
+        role = current_role()
+        if not role:
             return jsonify({"message": "User not found"}), 404
 
-        print(f"User: {user.full_name} (Role: {user.role.value})")
+        query = visible_tasks_query(role, int(current_user_id), request.args)
+        tasks, next_cursor = paginate(query, Task, request.args, fetch=fetch_rows)
 
-        # Developers only see their assigned tasks
-        if user.role.name == "DEVELOPER":
-            tasks = Task.query.filter_by(assigned_to=int(current_user_id)).all()
-        else:
-            # Admin and Manager see all tasks
-            tasks = Task.query.all()
-        
-        result = []
-        for t in tasks:
-            assigned_user = User.query.get(t.assigned_to) if t.assigned_to else None
-            result.append({
-                "id": t.id,
-                "title": t.title,
-                "description": t.description,
-                "status": t.status.value,
-                "project_id": t.project_id,
-                "assigned_to": t.assigned_to,
-                "assigned_to_name": assigned_user.full_name if assigned_user else "Unassigned",
-                "deadline": t.deadline.isoformat() if t.deadline else None,
-                "is_overdue": t.deadline < date.today() if t.deadline and t.status.name != "DONE" else False
-            })
+        today = date.today()
+        result = [task_to_dict(t, today) for t in tasks]
 
-        print(f"Found {len(result)} tasks")
-        return jsonify(result), 200
+        logger.debug("Listed tasks", extra={"count": len(result), "role": role})
+        return jsonify(page_body(request.args, result, next_cursor)), 200
     except Exception as e:
-        print(f"Error fetching tasks: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error fetching tasks")
         return jsonify({"message": str(e)}), 400
 
 @bp.route("/<int:id>/status", methods=["PATCH"])
@@ -97,24 +113,22 @@ def update_status(id):
         current_user_id = get_jwt_identity()
         data = request.json
 
-        print(f"Updating task {id} status to: {data['status']}")
-
         t = Task.query.get_or_404(id)
         
         # Developers can only update their own tasks
-        user = User.query.get(int(current_user_id))
-        if user.role.name == "DEVELOPER" and t.assigned_to != int(current_user_id):
+        if current_role() == "DEVELOPER" and t.assigned_to != int(current_user_id):
             return jsonify({"message": "You can only update your own tasks"}), 403
         
         t.status = TaskStatusEnum[data["status"]]
         db.session.commit()
+        invalidate("tasks")
+        invalidate_context(t.project_id)
+        publish("task.status", t.project_id, t.assigned_to, id=t.id, status=t.status.value)
 
-        print(f"Task {id} status updated")
+        logger.info("Task status updated", extra={"task_id": id, "status": t.status.name})
         return jsonify({"message": "Status updated"}), 200
     except Exception as e:
-        print(f"Error updating task status: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error updating task status")
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
@@ -122,17 +136,275 @@ def update_status(id):
 @jwt_required()
 def delete_task(id):
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
-        
         # Only Admin and Manager can delete tasks
-        if user.role.name not in ["ADMIN", "MANAGER"]:
+        if current_role() not in ["ADMIN", "MANAGER"]:
             return jsonify({"message": "Unauthorized"}), 403
         
         task = Task.query.get_or_404(id)
-        db.session.delete(task)
-        db.session.commit()
+        project_id, assigned_to = task.project_id, task.assigned_to
+        # Comments go in batches rather than being loaded through the relationship
+        deletes.delete_tasks(Task.id == id)
+        invalidate("tasks", "comments")
+        invalidate_context(project_id)
+        publish("task.deleted", project_id, assigned_to, id=id)
         return jsonify({"message": "Task deleted"}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
+
+
+# Helper function: pull the item list out of a bulk payload ([...] or {"<key>": [...]})
+def bulk_items(data, key):
+    items = data.get(key) if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"Expected a non-empty list of {key}")
+    if len(items) > BULK_LIMIT:
+        raise ValueError(f"At most {BULK_LIMIT} {key} per request")
+    return items
+
+# Helper function: an optional id from a bulk item as an int ("3" is accepted as 3)
+def item_id(item, key):
+    value = item.get(key)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().isdigit():
+        raise ValueError(f"'{key}' must be an integer id")
+    return int(value)
+
+# Helper function: item_id() for collecting ids to look up; None for a missing or invalid id,
+# which item_id() then reports in that item's result
+def lookup_id(item, key):
+    try:
+        return item_id(item, key) if isinstance(item, dict) else None
+    except ValueError:
+        return None
+
+# Helper function: validate bulk task items; returns insertable rows and per-item results
+def prepare_task_rows(items):
+    # Resolve every referenced project and user with one query each
+    project_ids = {lookup_id(i, "project_id") for i in items} - {None}
+    user_ids = {lookup_id(i, "assigned_to") for i in items} - {None}
+    known_projects = {pid for (pid,) in db.session.query(Project.id).filter(Project.id.in_(project_ids))} if project_ids else set()
+    known_users = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(user_ids))} if user_ids else set()
+
+    rows, results = [], []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict) or not item.get("title"):
+                raise ValueError("'title' is required")
+            if not isinstance(item["title"], str):
+                raise ValueError("'title' must be a string")
+            project_id, assigned_to = item_id(item, "project_id"), item_id(item, "assigned_to")
+            if project_id and project_id not in known_projects:
+                raise ValueError(f"Project {project_id} not found")
+            if assigned_to and assigned_to not in known_users:
+                raise ValueError(f"User {assigned_to} not found")
+            # A missing or null status means TODO, like a single create
+            status = TaskStatusEnum[str(item.get("status") or "TODO").upper()]
+            rows.append({
+                "title": item["title"],
+                "description": item.get("description", ""),
+                "status": status,
+                "project_id": project_id,
+                "assigned_to": assigned_to,
+                "deadline": datetime.strptime(str(item["deadline"]), "%Y-%m-%d").date() if item.get("deadline") else None,
+                "created_at": datetime.utcnow()
+            })
+            results.append({"index": index, "ok": True})
+        except KeyError as e:
+            results.append({"index": index, "ok": False, "error": f"Invalid status {e}"})
+        except ValueError as e:
+            results.append({"index": index, "ok": False, "error": str(e)})
+    return rows, results
+
+# Helper function: invalidate caches and publish events for tasks inserted with Core
+def announce_created_tasks(rows):
+    invalidate("tasks")
+    invalidate_context(*{row["project_id"] for row in rows})
+    groups = {}
+    for row in rows:
+        key = (row["project_id"], row["assigned_to"])
+        groups[key] = groups.get(key, 0) + 1
+    for (project_id, assigned_to), count in groups.items():
+        publish("task.bulk_created", project_id, assigned_to, count=count)
+
+@bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def bulk_create_tasks():
+    # Only Admin and Manager can create tasks
+    if current_role() not in ["ADMIN", "MANAGER"]:
+        return jsonify({"message": "Unauthorized. Only Admin and Manager can create tasks."}), 403
+
+    try:
+        items = bulk_items(request.json, "tasks")
+
+        rows, results = prepare_task_rows(items)
+
+        # One multi-row INSERT in one transaction for every valid item
+        if rows:
+            db.session.execute(db.insert(Task), rows)
+            db.session.commit()
+    except Exception as e:
+        logger.exception("Error bulk creating tasks")
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+    # Outside the try: the rows are committed, so nothing below may turn this into a 400
+    if rows:
+        announce_created_tasks(rows)
+    logger.info("Bulk created tasks", extra={"tasks_created": len(rows), "submitted": len(items)})
+    return jsonify({
+        "message": f"{len(rows)} tasks created",
+        "created": len(rows),
+        "failed": len(items) - len(rows),
+        "results": results
+    }), 201 if rows else 400
+
+# Helper function: task items from a CSV import (header row with the bulk item keys)
+def csv_task_items(text):
+    items = []
+    for row in csv.DictReader(io.StringIO(text)):
+        # Cells stay text; prepare_task_rows() converts ids and reports a bad cell in its row's result
+        item = {k.strip(): (v.strip() if v else None) for k, v in row.items() if k}
+        if not item.get("status"):
+            item.pop("status", None)
+        items.append(item)
+    return items
+
+# Large imports run as a background job; poll /api/jobs/<id> for the outcome
+@bp.route("/import", methods=["POST"])
+@jwt_required()
+def import_tasks():
+    # Only Admin and Manager can create tasks
+    if current_role() not in ["ADMIN", "MANAGER"]:
+        return jsonify({"message": "Unauthorized. Only Admin and Manager can create tasks."}), 403
+
+    try:
+        # A JSON list (or {"tasks": [...]}), a text/csv body or an uploaded CSV "file"
+        if "file" in request.files:
+            payload = {"csv": request.files["file"].read().decode("utf-8-sig")}
+        elif request.mimetype == "text/csv":
+            payload = {"csv": request.get_data(as_text=True)}
+        else:
+            data = request.get_json(silent=True)
+            items = data.get("tasks") if isinstance(data, dict) else data
+            if not isinstance(items, list) or not items:
+                raise ValueError("Expected a non-empty list of tasks or a CSV file")
+            limit = current_app.config["JOBS_IMPORT_LIMIT"]
+            if len(items) > limit:
+                raise ValueError(f"At most {limit} tasks per import")
+            payload = {"tasks": items}
+
+        job = enqueue("tasks.import", int(get_jwt_identity()), payload)
+        return jsonify({"message": "Import queued", "job_id": job.id}), 202
+    except JobLimitError as e:
+        return jsonify({"message": str(e)}), 429
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+# Inserts in batches of JOBS_IMPORT_BATCH, each in its own transaction together
+# with the job checkpoint, so a retry picks up after the last committed batch and
+# a cancelled import keeps the batches already written
+@job_handler("tasks.import")
+def run_task_import(job, payload):
+    items = csv_task_items(payload["csv"]) if "csv" in payload else payload["tasks"]
+    limit = current_app.config["JOBS_IMPORT_LIMIT"]
+    if len(items) > limit:
+        raise ValueError(f"At most {limit} tasks per import")
+
+    state = job.state or {"done": 0, "created": 0, "failed": 0, "errors": []}
+    batch = current_app.config["JOBS_IMPORT_BATCH"]
+    for start in range(state["done"], len(items), batch):
+        rows, results = prepare_task_rows(items[start:start + batch])
+        if rows:
+            db.session.execute(db.insert(Task), rows)
+        state["done"] = start + len(results)
+        state["created"] += len(rows)
+        for r in results:
+            if not r["ok"]:
+                state["failed"] += 1
+                # Keep the job row small on badly formed files
+                if len(state["errors"]) < 1000:
+                    state["errors"].append({"index": start + r["index"], "error": r["error"]})
+        job.save_state(state)
+        db.session.commit()
+        if rows:
+            announce_created_tasks(rows)
+        job.progress(state["done"] * 100 // len(items))
+    return state
+
+@bp.route("/bulk/status", methods=["PATCH"])
+@jwt_required()
+def bulk_update_status():
+    try:
+        current_user_id = int(get_jwt_identity())
+        role = current_role()
+        if not role:
+            return jsonify({"message": "User not found"}), 404
+
+        data = request.json
+        # Either {"ids": [...], "status": "DONE"} or {"updates": [{"id": 1, "status": "DONE"}, ...]}
+        if isinstance(data, dict) and "ids" in data:
+            items = [{"id": i, "status": data.get("status")} for i in bulk_items(data, "ids")]
+        else:
+            items = bulk_items(data, "updates")
+
+        ids = {lookup_id(i, "id") for i in items} - {None}
+        found = db.session.query(Task.id, Task.assigned_to, Task.project_id).filter(Task.id.in_(ids)).all() if ids else []
+        owners = {task_id: assigned_to for task_id, assigned_to, _ in found}
+        projects = {task_id: project_id for task_id, _, project_id in found}
+
+        by_status, results, seen = {}, [], set()
+        for index, item in enumerate(items):
+            task_id = item.get("id") if isinstance(item, dict) else None
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("Expected an object with 'id' and 'status'")
+                task_id = item_id(item, "id")
+                if task_id not in owners:
+                    raise ValueError(f"Task {task_id} not found")
+                # Developers can only update their own tasks
+                if role == "DEVELOPER" and owners[task_id] != current_user_id:
+                    raise ValueError("You can only update your own tasks")
+                if task_id in seen:
+                    raise ValueError(f"Task {task_id} is listed more than once")
+                status = TaskStatusEnum[str(item.get("status")).upper()]
+                seen.add(task_id)
+                by_status.setdefault(status, []).append(task_id)
+                results.append({"index": index, "id": task_id, "ok": True})
+            except KeyError:
+                results.append({"index": index, "id": task_id, "ok": False, "error": f"Invalid status {item.get('status')}"})
+            except ValueError as e:
+                results.append({"index": index, "id": task_id, "ok": False, "error": str(e)})
+
+        # One UPDATE per target status, all in one transaction
+        for status, task_ids in by_status.items():
+            db.session.query(Task).filter(Task.id.in_(task_ids)) \
+                .update({Task.status: status}, synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        logger.exception("Error bulk updating task status")
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+    # Outside the try: the update is committed, so nothing below may turn this into a 400
+    if by_status:
+        invalidate("tasks")
+        invalidate_context(*{projects[task_id] for task_ids in by_status.values() for task_id in task_ids})
+    # One event per (project, assignee, status) group rather than per task
+    for status, task_ids in by_status.items():
+        groups = {}
+        for task_id in task_ids:
+            groups.setdefault((projects[task_id], owners[task_id]), []).append(task_id)
+        for (project_id, assigned_to), group_ids in groups.items():
+            publish("task.bulk_status", project_id, assigned_to, ids=group_ids, status=status.value)
+
+    updated = sum(len(v) for v in by_status.values())
+    logger.info("Bulk updated task status", extra={"updated": updated, "submitted": len(items)})
+    return jsonify({
+        "message": f"{updated} tasks updated",
+        "updated": updated,
+        "failed": len(items) - updated,
+        "results": results
+    }), 200
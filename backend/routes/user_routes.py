@@ -1,15 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, RoleEnum
-from werkzeug.security import generate_password_hash
+from identity import current_role, invalidate_role
+from cache import cached_response, invalidate
+from replicas import read_replica
+from passwords import HashingBusyError, hash_password
+from ai_context import invalidate_context
+from serializers import fetch_rows, user_rows, user_to_dict
+import deletes
 
 bp = Blueprint("users", __name__, url_prefix="/api/users")
 
 # Helper function to check for Admin role
 def is_admin():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
-    return user and user.role.name == "ADMIN"
+    return current_role() == "ADMIN"
 
 # NEW: Create User (Admin Only)
 @bp.route("/", methods=["POST"])
@@ -26,27 +30,28 @@ def create_user():
         user = User(
             full_name=data["full_name"],
             email=data["email"],
-            password_hash=generate_password_hash(data["password"]),
+            password_hash=hash_password(data["password"]),
             role=RoleEnum[data.get("role", "DEVELOPER").upper()]
         )
         db.session.add(user)
         db.session.commit()
+        invalidate("users")
         return jsonify({"message": "User created successfully", "id": user.id}), 201
+    except HashingBusyError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
 
 @bp.route("/", methods=["GET"])
 @jwt_required()
+@read_replica
+@cached_response("users")
 def list_users():
     try:
-        users = User.query.all()
-        result = [{
-            "id": u.id,
-            "full_name": u.full_name,
-            "email": u.email,
-            "role": u.role.value
-        } for u in users]
+        users = fetch_rows(user_rows())
+        result = [user_to_dict(u) for u in users]
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 400
@@ -66,6 +71,8 @@ def update_user_role(id):
             user_to_update.role = RoleEnum[data['role'].upper()]
             
         db.session.commit()
+        invalidate_role(id)
+        invalidate("users")
         return jsonify({"message": "User role updated"}), 200
     except Exception as e:
         db.session.rollback()
@@ -83,10 +90,24 @@ def delete_user(id):
         return jsonify({"message": "You cannot delete your own account."}), 403
 
     try:
-        user_to_delete = User.query.get_or_404(id)
-        db.session.delete(user_to_delete)
-        db.session.commit()
-        return jsonify({"message": "User deleted"}), 200
+        User.query.get_or_404(id)
+        # ?reassign_to=<user id> hands their tasks over (default: unassigned);
+        # ?comments=delete removes their comments (default: kept, author cleared)
+        reassign_to = request.args.get("reassign_to")
+        if reassign_to is not None:
+            if not reassign_to.isdigit():
+                return jsonify({"message": "reassign_to must be a user id"}), 400
+            reassign_to = int(reassign_to)
+        delete_comments = request.args.get("comments", "keep") == "delete"
+        result = deletes.delete_user(id, reassign_to=reassign_to, delete_comments=delete_comments)
+        invalidate_role(id)
+        invalidate("users", "projects", "tasks", "comments")
+        invalidate_context(*result["project_ids"])
+        return jsonify({
+            "message": "User deleted",
+            "tasks_reassigned" if reassign_to else "tasks_unassigned": result["tasks"],
+            "comments_deleted" if delete_comments else "comments_anonymised": result["comments"]
+        }), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 400
\ No newline at end of file
@@ -0,0 +1,191 @@
+import html
+import math
+import re
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from sqlalchemy.dialects.mysql import match
+from models import db, Task, Project, Comment
+from cache import generation
+
+# Full-text search over tasks, projects and comments. On MySQL the FULLTEXT
+# indexes declared in models.py do the matching and ranking; elsewhere (SQLite
+# test runs) an in-process inverted index is built from the database and rebuilt
+# whenever the cache generation of its namespace moves on.
+
+TYPES = ["tasks", "projects", "comments"]
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+SNIPPET_WIDTH = 160
+# Ranked search is offset-paginated; deep pages are not useful and get expensive
+MAX_OFFSET = 1000
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if len(t) > 1]
+
+
+def _mentions(text, terms):
+    lowered = (text or "").lower()
+    return any(t in lowered for t in terms)
+
+
+def highlight(text, terms, width=SNIPPET_WIDTH):
+    # HTML-escaped window around the first match with <mark> around every term
+    text = text or ""
+    lowered = text.lower()
+    positions = [lowered.find(t) for t in terms if lowered.find(t) >= 0]
+    start = max(0, min(positions) - width // 3) if positions else 0
+    snippet = text[start:start + width]
+    escaped = html.escape(snippet)
+    if terms:
+        pattern = re.compile("|".join(re.escape(html.escape(t)) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+        escaped = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", escaped)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + width < len(text) else ""
+    return prefix + escaped + suffix
+
+
+class InvertedIndex:
+    # term -> {doc id: weighted term frequency}; one instance per entity type
+
+    def __init__(self):
+        self.postings = {}
+        self.docs = {}
+        self.built_for = None
+        self.built_at = 0.0
+
+    def build(self, rows, version):
+        postings, docs = {}, {}
+        for doc_id, title, body, meta in rows:
+            counts = Counter(tokenize(body))
+            # Title hits weigh double
+            for term in tokenize(title):
+                counts[term] += 2
+            for term, tf in counts.items():
+                postings.setdefault(term, {})[doc_id] = tf
+            docs[doc_id] = (title, body, meta)
+        self.postings, self.docs = postings, docs
+        self.built_for, self.built_at = version, time.monotonic()
+
+    def search(self, terms):
+        # TF-IDF scores for documents containing any term
+        scores = {}
+        total = len(self.docs) or 1
+        for term in terms:
+            postings = self.postings.get(term, {})
+            if not postings:
+                continue
+            idf = math.log(1 + total / len(postings))
+            for doc_id, tf in postings.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + (1 + math.log(tf)) * idf
+        return scores
+
+
+_build_lock = threading.Lock()
+
+# Row loaders for the fallback indexes, yielding (id, title, body, meta)
+def _task_rows():
+    query = db.session.query(Task.id, Task.title, Task.description, Task.project_id, Task.assigned_to)
+    for t in query.yield_per(1000):
+        yield t.id, t.title, t.description, {"project_id": t.project_id, "assigned_to": t.assigned_to}
+
+def _project_rows():
+    for p in db.session.query(Project.id, Project.title, Project.description).yield_per(1000):
+        yield p.id, p.title, p.description, {}
+
+def _comment_rows():
+    for c in db.session.query(Comment.id, Comment.task_id, Comment.content).yield_per(1000):
+        yield c.id, "", c.content, {"task_id": c.task_id}
+
+LOADERS = {"tasks": _task_rows, "projects": _project_rows, "comments": _comment_rows}
+
+
+def _is_stale(index, version):
+    if index.built_at == 0.0:
+        return True
+    if version is not None:
+        return index.built_for != version
+    # Without a response cache there is no generation to compare, so fall back to a TTL
+    return time.monotonic() - index.built_at > current_app.config.get("SEARCH_INDEX_TTL", 30)
+
+
+def _fallback_index(kind):
+    indexes = current_app.extensions.setdefault("search_index", {t: InvertedIndex() for t in TYPES})
+    index = indexes[kind]
+    version = generation(kind)
+    if _is_stale(index, version):
+        with _build_lock:
+            if _is_stale(index, version):
+                index.build(LOADERS[kind](), version)
+    return index
+
+
+def _visible_task_ids(user_id):
+    return {tid for (tid,) in db.session.query(Task.id).filter(Task.assigned_to == user_id)}
+
+
+def _python_search(q, kinds, role, user_id, limit):
+    terms = list(dict.fromkeys(tokenize(q)))
+    own_tasks = _visible_task_ids(user_id) if role == "DEVELOPER" else None
+    hits = []
+    for kind in kinds:
+        index = _fallback_index(kind)
+        for doc_id, score in index.search(terms).items():
+            title, body, meta = index.docs[doc_id]
+            if own_tasks is not None:
+                if kind == "tasks" and doc_id not in own_tasks:
+                    continue
+                if kind == "comments" and meta["task_id"] not in own_tasks:
+                    continue
+            hits.append((score, kind, doc_id, title, body, meta))
+    hits.sort(key=lambda h: (-h[0], h[1], h[2]))
+    return hits[:limit], terms
+
+
+def _mysql_search(q, kinds, role, user_id, limit):
+    hits = []
+    if "tasks" in kinds:
+        score = match(Task.title, Task.description, against=q).in_natural_language_mode()
+        query = db.session.query(Task.id, Task.title, Task.description, Task.project_id, Task.assigned_to, score) \
+            .filter(score > 0)
+        if role == "DEVELOPER":
+            query = query.filter(Task.assigned_to == user_id)
+        for t in query.order_by(score.desc()).limit(limit):
+            hits.append((t[-1], "tasks", t.id, t.title, t.description,
+                         {"project_id": t.project_id, "assigned_to": t.assigned_to}))
+    if "projects" in kinds:
+        score = match(Project.title, Project.description, against=q).in_natural_language_mode()
+        query = db.session.query(Project.id, Project.title, Project.description, score).filter(score > 0)
+        for p in query.order_by(score.desc()).limit(limit):
+            hits.append((p[-1], "projects", p.id, p.title, p.description, {}))
+    if "comments" in kinds:
+        score = match(Comment.content, against=q).in_natural_language_mode()
+        query = db.session.query(Comment.id, Comment.task_id, Comment.content, score).filter(score > 0)
+        if role == "DEVELOPER":
+            query = query.join(Task, Task.id == Comment.task_id).filter(Task.assigned_to == user_id)
+        for c in query.order_by(score.desc()).limit(limit):
+            hits.append((c[-1], "comments", c.id, "", c.content, {"task_id": c.task_id}))
+    hits.sort(key=lambda h: (-h[0], h[1], h[2]))
+    return hits[:limit], list(dict.fromkeys(tokenize(q)))
+
+
+def search(q, kinds, role, user_id, limit, offset):
+    # Returns (results, has_more) for one page of ranked hits across entity types
+    offset = min(offset, MAX_OFFSET)
+    backend = current_app.config.get("SEARCH_BACKEND", "auto")
+    use_mysql = backend == "mysql" or (backend == "auto" and db.engine.dialect.name == "mysql")
+    run = _mysql_search if use_mysql else _python_search
+    hits, terms = run(q, kinds, role, user_id, offset + limit + 1)
+
+    page = hits[offset:offset + limit]
+    results = []
+    for score, kind, doc_id, title, body, meta in page:
+        results.append(dict({
+            "type": kind[:-1],
+            "id": doc_id,
+            "title": title or None,
+            "score": round(float(score), 4),
+            "snippet": highlight(body if _mentions(body, terms) or not title else title, terms),
+        }, **{k: v for k, v in meta.items() if k != "assigned_to"}))
+    return results, len(hits) > offset + limit
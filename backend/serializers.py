@@ -0,0 +1,162 @@
+import decimal
+from datetime import date
+from flask.json.provider import JSONProvider
+from sqlalchemy import func
+from werkzeug.http import http_date
+from models import db, User, Project, Task, Comment, RoleEnum, TaskStatusEnum
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib-based Flask provider is used instead
+    orjson = None
+
+# Response rows for the list, sync and dashboard endpoints. The *_rows() queries
+# select only the columns a response needs, so they return SQLAlchemy Row tuples
+# (no identity map, no relationship loading) instead of ORM instances, and the
+# *_to_dict() helpers turn one row into its JSON object. The helpers unpack rows
+# by position, which is several times cheaper per field than attribute access,
+# so the column order of each query is part of its contract; optional columns go
+# last. Enum values come from lookup tables built once, not Enum.value per row.
+
+STATUS_VALUES = {s: s.value for s in TaskStatusEnum}
+ROLE_VALUES = {r: r.value for r in RoleEnum}
+
+
+def fetch_rows(query):
+    # Runs a *_rows() query on Core, skipping the ORM loading layer the Query API
+    # puts around every row. No autoflush: meant for the read-only list endpoints.
+    return db.session.connection().execute(query.statement).all()
+
+
+def task_rows(with_description=True):
+    columns = [Task.id, Task.title, Task.status, Task.project_id, Task.assigned_to,
+               User.full_name.label("assigned_to_name"), Task.deadline, Task.created_at, Task.updated_at]
+    if with_description:
+        columns.append(Task.description)
+    return db.session.query(*columns).select_from(Task).outerjoin(User, User.id == Task.assigned_to)
+
+
+def task_to_dict(row, today, with_description=True):
+    task_id, title, status, project_id, assigned_to, assigned_to_name, deadline = row[:7]
+    result = {
+        "id": task_id,
+        "title": title,
+        "status": STATUS_VALUES.get(status),
+        "project_id": project_id,
+        "assigned_to": assigned_to,
+        "assigned_to_name": assigned_to_name or "Unassigned",
+        "deadline": deadline.isoformat() if deadline else None,
+        "is_overdue": deadline < today if deadline and status is not TaskStatusEnum.DONE else False
+    }
+    if with_description:
+        result["description"] = row[-1]
+    return result
+
+
+# Projects joined with their creator's name and a task count
+def project_rows(with_description=True):
+    task_count = db.session.query(func.count(Task.id)) \
+        .filter(Task.project_id == Project.id) \
+        .correlate(Project).scalar_subquery()
+    columns = [Project.id, Project.title, User.full_name.label("creator_name"),
+               task_count.label("task_count"), Project.created_at, Project.updated_at]
+    if with_description:
+        columns.append(Project.description)
+    return db.session.query(*columns).select_from(Project).outerjoin(User, User.id == Project.created_by)
+
+
+def project_to_dict(row, with_description=True):
+    project_id, title, creator_name, task_count = row[:4]
+    result = {
+        "id": project_id,
+        "title": title,
+        "created_by": creator_name or "Unknown",
+        "task_count": task_count
+    }
+    if with_description:
+        result["description"] = row[-1]
+    return result
+
+
+def comment_rows():
+    return db.session.query(
+        Comment.id, Comment.content, Comment.task_id, User.full_name.label("user_name"),
+        User.role.label("user_role"), Comment.created_at, Comment.updated_at
+    ).select_from(Comment).outerjoin(User, User.id == Comment.user_id)
+
+
+def comment_to_dict(row):
+    comment_id, content, _, user_name, user_role, created_at = row[:6]
+    return {
+        "id": comment_id,
+        "content": content,
+        "user_name": user_name or "Unknown",
+        "user_role": ROLE_VALUES.get(user_role, "Unknown"),
+        # Same text as strftime("%Y-%m-%d %H:%M:%S"), without parsing a format string per row
+        "created_at": created_at.isoformat(" ", "seconds")
+    }
+
+
+def user_rows():
+    return db.session.query(User.id, User.full_name, User.email, User.role)
+
+
+def user_to_dict(row):
+    user_id, full_name, email, role = row
+    return {
+        "id": user_id,
+        "full_name": full_name,
+        "email": email,
+        "role": ROLE_VALUES[role]
+    }
+
+
+def _default(o):
+    # Types orjson leaves to us, rendered the way Flask's default provider does
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    # Drop-in for Flask's DefaultJSONProvider: keys sorted, dates as HTTP dates,
+    # Decimal as a string, indented in debug mode. Responses are encoded straight
+    # to bytes. Non-ASCII text is written as UTF-8 rather than \u escapes.
+    sort_keys = True
+    compact = None
+    mimetype = "application/json"
+
+    def _option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._option(bool(kwargs.get("indent")))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        data = orjson.dumps(obj, default=_default, option=self._option(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def init_json(app):
+    # JSON_PROVIDER: auto (orjson when installed), orjson, or default (Flask's json module)
+    choice = app.config.get("JSON_PROVIDER", "auto")
+    if choice not in ("auto", "orjson", "default"):
+        raise ValueError(f"Unknown JSON_PROVIDER {choice!r}")
+    if choice == "orjson" and orjson is None:
+        raise RuntimeError("JSON_PROVIDER=orjson but orjson is not installed")
+    if choice != "default" and orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,62 @@
+import pytest
+from app import create_app, init_db
+from benchmarks.seed import seed, SEED_PASSWORD
+from models import db, User, RoleEnum
+
+# Every test gets a freshly seeded SQLite file. Background workers, rate limits
+# and the per-process caches are off so runs do not leak into each other.
+
+
+def make_app(tmp_path, **overrides):
+    config = {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+        "JOBS_WORKERS": 0,
+        "JOBS_RESULT_DIR": str(tmp_path / "results"),
+        "RATE_LIMIT_BACKEND": "off",
+        "RESPONSE_CACHE_BACKEND": "off",
+        "ROLE_CACHE_TTL": 0,
+        "LOG_LEVEL": "WARNING",
+        "LOG_FORMAT": "text",
+        "JWT_SECRET_KEY": "test-secret-key-long-enough-for-hs256",
+    }
+    config.update(overrides)
+    return create_app(config)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    init_db(app)
+    with app.app_context():
+        seed(users=20, projects=5, tasks=200, comments=400)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def auth_headers(client, email):
+    response = client.post("/api/auth/login", json={"email": email, "password": SEED_PASSWORD})
+    assert response.status_code == 200, response.get_json()
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def email_of(app, role):
+    with app.app_context():
+        return db.session.query(User.email).filter(User.role == role).order_by(User.id).first()[0]
+
+
+@pytest.fixture
+def admin(client):
+    return auth_headers(client, "user1@example.com")
+
+
+@pytest.fixture
+def developer(app, client):
+    return auth_headers(client, email_of(app, RoleEnum.DEVELOPER))
@@ -0,0 +1,24 @@
+import pytest
+from ai_context import invalidate_context, project_context
+from metrics import count_queries
+
+# The per-project AI context cache: one entry per project whatever the id's type.
+
+
+def test_string_and_int_project_ids_share_a_cache_entry(app):
+    with app.app_context():
+        context = project_context("3")
+        assert context.startswith("Project: ")
+        with count_queries() as counter:
+            assert project_context(3) == context
+        assert counter.count == 0
+
+        invalidate_context("3")
+        with count_queries() as counter:
+            project_context(3)
+        assert counter.count > 0
+
+
+def test_bad_project_id_is_rejected(app):
+    with app.app_context(), pytest.raises(ValueError, match="Invalid project_id"):
+        project_context("abc")
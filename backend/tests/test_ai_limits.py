@@ -0,0 +1,121 @@
+import threading
+import pytest
+from benchmarks.fake_groq import ANSWER, start_fake_groq
+from benchmarks.seed import seed
+from app import init_db
+from models import db
+from tests.conftest import auth_headers, make_app
+
+# /api/ai/assist against the fake Groq server: the per-worker concurrency cap,
+# rejection when the wait queue is full or the wait runs out, the model call
+# timeout, and the answer cache.
+
+
+@pytest.fixture
+def ai_app(tmp_path):
+    # ai_app(delay, **config) -> (app, fake server)
+    servers, apps = [], []
+
+    def build(delay=0.05, **config):
+        server, url = start_fake_groq(delay=delay)
+        servers.append(server)
+        app = make_app(tmp_path, GROQ_API_KEY="fake", GROQ_BASE_URL=url, **config)
+        init_db(app)
+        with app.app_context():
+            seed(users=5, projects=2, tasks=10, comments=0)
+        apps.append(app)
+        return app, server
+
+    yield build
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+def assist(app, headers, **body):
+    return app.test_client().post("/api/ai/assist", json=body, headers=headers)
+
+
+def assist_concurrently(app, headers, count):
+    # Distinct prompts so no request is answered from the cache
+    start = threading.Barrier(count)
+    statuses = [None] * count
+
+    def call(n):
+        client = app.test_client()
+        start.wait()
+        statuses[n] = client.post("/api/ai/assist", json={"prompt": f"question {n}"}, headers=headers).status_code
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(statuses)
+
+
+def login(app):
+    return auth_headers(app.test_client(), "user1@example.com")
+
+
+def test_concurrent_calls_are_capped(ai_app):
+    app, server = ai_app(delay=0.3, AI_MAX_CONCURRENCY=2, AI_MAX_QUEUE=10, AI_QUEUE_TIMEOUT=10)
+    statuses = assist_concurrently(app, login(app), 6)
+    assert statuses == [200] * 6
+    assert server.requests == 6
+    assert server.peak == 2
+
+
+def test_full_queue_is_rejected_at_once(ai_app):
+    app, server = ai_app(delay=0.5, AI_MAX_CONCURRENCY=1, AI_MAX_QUEUE=1, AI_QUEUE_TIMEOUT=10)
+    # One call runs, one waits for the slot, the third finds the queue full
+    assert assist_concurrently(app, login(app), 3) == [200, 200, 503]
+    assert server.requests == 2
+
+
+def test_wait_for_a_slot_times_out(ai_app):
+    app, server = ai_app(delay=0.5, AI_MAX_CONCURRENCY=1, AI_MAX_QUEUE=5, AI_QUEUE_TIMEOUT=0.1)
+    assert assist_concurrently(app, login(app), 2) == [200, 503]
+    assert server.requests == 1
+
+
+def test_slow_model_call_times_out_and_frees_its_slot(ai_app):
+    app, server = ai_app(delay=1.0, AI_MAX_CONCURRENCY=1, AI_REQUEST_TIMEOUT=0.2)
+    response = assist(app, login(app), prompt="slow")
+    assert response.status_code == 500
+    assert "timed out" in response.get_json()["message"].lower()
+    gate = app.extensions["ai"]
+    gate.acquire()
+    gate.release()
+
+
+def test_answers_are_cached(ai_app):
+    app, server = ai_app()
+    headers = login(app)
+
+    first = assist(app, headers, prompt="What next?")
+    assert first.status_code == 200
+    assert first.get_json() == {"message": ANSWER}
+    second = assist(app, headers, prompt="What next?")
+    assert second.get_json() == {"message": ANSWER, "cached": True}
+    streamed = assist(app, headers, prompt="What next?", stream=True)
+    assert streamed.headers["X-Cache"] == "HIT"
+    assert streamed.get_data(as_text=True) == ANSWER
+    assert server.requests == 1
+
+    # Another mode is another question
+    assert "cached" not in assist(app, headers, prompt="What next?", mode="ideas").get_json()
+    assert server.requests == 2
+
+
+def test_streamed_answers_are_cached(ai_app):
+    app, server = ai_app()
+    headers = login(app)
+    first = assist(app, headers, prompt="Stream it", stream=True)
+    assert first.headers["X-Cache"] == "MISS"
+    assert first.get_data(as_text=True).strip() == ANSWER
+    assert assist(app, headers, prompt="Stream it").get_json()["cached"] is True
+    assert server.requests == 1
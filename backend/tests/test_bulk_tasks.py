@@ -0,0 +1,86 @@
+from unittest import mock
+from models import db, Task, TaskStatusEnum
+
+# Bulk create and bulk status: every item gets its own result, and one bad item
+# never fails the others or the request.
+
+
+def bulk_create(client, headers, tasks):
+    return client.post("/api/tasks/bulk", json={"tasks": tasks}, headers=headers)
+
+
+def bulk_status(client, headers, body):
+    return client.patch("/api/tasks/bulk/status", json=body, headers=headers)
+
+
+def status_of(app, task_id):
+    with app.app_context():
+        return db.session.get(Task, task_id).status
+
+
+def test_bulk_create_accepts_numeric_string_ids(client, admin):
+    response = bulk_create(client, admin, [{"title": "Strings", "project_id": "2", "assigned_to": "3"}])
+    assert response.status_code == 201
+    assert response.get_json()["results"] == [{"index": 0, "ok": True}]
+
+
+def test_bulk_create_reports_bad_items_one_by_one(app, client, admin):
+    response = bulk_create(client, admin, [
+        {"title": "Fine"},
+        {"title": "Null status", "status": None},
+        {"title": "Numeric status", "status": 5},
+        {"title": "Bad project", "project_id": "x"},
+        {"title": "Boolean project", "project_id": True},
+        {"title": "Unknown project", "project_id": 999},
+        {"title": "Numeric deadline", "deadline": 20240101},
+        {"title": ["not", "text"]},
+        "not an object",
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["created"] == 2
+    assert [r["ok"] for r in body["results"]] == [True, True] + [False] * 7
+    assert body["results"][2]["error"] == "Invalid status '5'"
+    assert body["results"][3]["error"] == "'project_id' must be an integer id"
+    assert body["results"][5]["error"] == "Project 999 not found"
+    with app.app_context():
+        created = db.session.query(Task).filter(Task.title == "Null status").one()
+        assert created.status == TaskStatusEnum.TODO
+
+
+def test_bulk_status_accepts_numeric_string_ids(app, client, admin):
+    response = bulk_status(client, admin, {"ids": ["3", 4], "status": "DONE"})
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == 2
+    assert status_of(app, 3) == status_of(app, 4) == TaskStatusEnum.DONE
+
+
+def test_bulk_status_counts_duplicates_once(client, admin):
+    body = bulk_status(client, admin, {"ids": [5, "5", 5], "status": "DONE"}).get_json()
+    assert body["updated"] == 1
+    assert body["failed"] == 2
+    assert body["results"][1]["error"] == "Task 5 is listed more than once"
+
+
+def test_bulk_status_reports_bad_ids_per_item(client, admin):
+    response = bulk_status(client, admin, {"updates": [
+        {"id": [1], "status": "DONE"},
+        {"id": {"a": 1}, "status": "DONE"},
+        {"id": 999, "status": "DONE"},
+        {"id": 6, "status": "NOPE"},
+        {"id": 7, "status": "DONE"},
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r["ok"] for r in results] == [False, False, False, False, True]
+    assert results[0]["error"] == "'id' must be an integer id"
+    assert results[2]["error"] == "Task 999 not found"
+
+
+def test_bulk_status_succeeds_when_the_event_broker_fails(app, client, admin):
+    broker = app.extensions["events"]
+    with mock.patch.object(broker, "publish", side_effect=RuntimeError("broker down")):
+        response = bulk_status(client, admin, {"ids": [8], "status": "DONE"})
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == 1
+    assert status_of(app, 8) == TaskStatusEnum.DONE
@@ -0,0 +1,57 @@
+from models import db, Comment, Project, Task, Tombstone, User
+from tests.test_jobs import run_jobs
+
+# Set-based deletes: batches, tombstones for sync, and the user delete options.
+
+
+def count(app, model, *conditions):
+    with app.app_context():
+        return db.session.query(model).filter(*conditions).count()
+
+
+def assignee(app):
+    # The user other than the admin with the most tasks
+    with app.app_context():
+        return db.session.query(Task.assigned_to).filter(Task.assigned_to > 1) \
+            .group_by(Task.assigned_to).order_by(db.func.count().desc()).first()[0]
+
+
+def test_project_delete_runs_in_batches_and_leaves_tombstones(app, client, admin):
+    app.config["DELETE_BATCH"] = 7
+    with app.app_context():
+        task_ids = {t for (t,) in db.session.query(Task.id).filter(Task.project_id == 1)}
+    assert len(task_ids) > 7
+
+    response = client.delete("/api/projects/1?background=true", headers=admin)
+    assert response.status_code == 202
+    run_jobs(app)
+    job = client.get(f"/api/jobs/{response.get_json()['job_id']}", headers=admin).get_json()
+    assert job["status"] == "Succeeded"
+    assert job["result"]["tasks_deleted"] == len(task_ids)
+
+    assert count(app, Project, Project.id == 1) == 0
+    assert count(app, Task, Task.project_id == 1) == 0
+    assert count(app, Comment, Comment.task_id.in_(task_ids)) == 0
+    with app.app_context():
+        tombstones = {(t.entity, t.entity_id) for t in Tombstone.query}
+    assert tombstones == {("project", 1)} | {("task", t) for t in task_ids}
+
+
+def test_user_delete_rejects_a_bad_reassign_to(app, client, admin):
+    user_id = assignee(app)
+    assigned = count(app, Task, Task.assigned_to == user_id)
+    response = client.delete(f"/api/users/{user_id}?reassign_to=abc", headers=admin)
+    assert response.status_code == 400
+    assert count(app, User, User.id == user_id) == 1
+    assert count(app, Task, Task.assigned_to == user_id) == assigned
+
+
+def test_user_delete_reassigns_tasks(app, client, admin):
+    app.config["DELETE_BATCH"] = 3
+    user_id = assignee(app)
+    assigned = count(app, Task, Task.assigned_to == user_id)
+    response = client.delete(f"/api/users/{user_id}?reassign_to=1", headers=admin)
+    assert response.status_code == 200
+    assert response.get_json()["tasks_reassigned"] == assigned
+    assert count(app, Task, Task.assigned_to == user_id) == 0
+    assert count(app, User, User.id == user_id) == 0
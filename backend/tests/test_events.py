@@ -0,0 +1,89 @@
+import json
+from contextlib import contextmanager
+import events
+from models import db, RoleEnum, User
+from tests.conftest import auth_headers, email_of
+
+# /api/events: one published event fans out to every open stream, scoped per
+# role, and streams authenticate with short-lived tickets instead of tokens in the URL.
+
+
+def ticket(client, headers):
+    response = client.post("/api/events/ticket", headers=headers)
+    assert response.status_code == 201
+    return response.get_json()["ticket"]
+
+
+@contextmanager
+def stream(client, query="", headers=None):
+    response = client.get(f"/api/events{query}", headers=headers, buffered=False)
+    assert response.status_code == 200, response.get_json()
+    chunks = (chunk.decode() for chunk in response.response)
+    # The first chunk is sent once the stream has subscribed
+    assert next(chunks) == "retry: 3000\n\n"
+    try:
+        yield chunks
+    finally:
+        response.close()
+
+
+def next_event(chunks):
+    # Skips heartbeats; (event id, payload)
+    for chunk in chunks:
+        if chunk.startswith("id: "):
+            lines = chunk.splitlines()
+            return int(lines[0][4:]), json.loads(lines[2][6:])
+
+
+def publish(app, *args, **kwargs):
+    with app.app_context():
+        events.publish(*args, **kwargs)
+
+
+def developer_id(app, client):
+    email = email_of(app, RoleEnum.DEVELOPER)
+    with app.app_context():
+        user_id = db.session.query(User.id).filter(User.email == email).scalar()
+    return user_id, auth_headers(client, email)
+
+
+def test_events_fan_out_to_every_stream_by_role(app, client, admin):
+    app.config["EVENTS_HEARTBEAT"] = 0.05
+    dev_id, developer = developer_id(app, client)
+    with stream(client, f"?ticket={ticket(client, admin)}") as admin_stream, \
+            stream(client, f"?ticket={ticket(client, developer)}") as dev_stream, \
+            stream(client, "?project_id=2", headers=admin) as project_stream:
+        publish(app, "task.updated", project_id=1, assigned_to=dev_id + 1, task_id=10)
+        publish(app, "task.updated", project_id=2, assigned_to=dev_id, task_id=11)
+
+        assert [next_event(admin_stream)[1]["data"]["task_id"] for _ in range(2)] == [10, 11]
+        # Developers only hear about their own tasks, the project filter applies to everyone
+        assert next_event(dev_stream)[1]["data"]["task_id"] == 11
+        assert next_event(project_stream)[1] == {"type": "task.updated", "project_id": 2, "data": {"task_id": 11}}
+    assert app.extensions["events"]._subscribers == set()
+
+
+def test_reconnect_replays_missed_events(app, client, admin):
+    app.config["EVENTS_HEARTBEAT"] = 0.05
+    with stream(client, headers=admin) as chunks:
+        publish(app, "task.created", project_id=1, task_id=1)
+        last_id, _ = next_event(chunks)
+    publish(app, "task.created", project_id=1, task_id=2)
+    publish(app, "task.created", project_id=1, task_id=3)
+    with stream(client, headers=dict(admin, **{"Last-Event-ID": str(last_id)})) as chunks:
+        assert [next_event(chunks)[1]["data"]["task_id"] for _ in range(2)] == [2, 3]
+
+
+def test_stream_tickets_are_checked(app, client, admin):
+    issued = ticket(client, admin)
+    assert client.get("/api/events?ticket=forged", buffered=False).status_code == 401
+    assert client.get("/api/events", buffered=False).status_code == 401
+    # A ticket is not an access token
+    assert client.get("/api/tasks/", headers={"Authorization": f"Bearer {issued}"}).status_code == 422
+    # Tokens in the URL are no longer accepted
+    token = admin["Authorization"].split()[1]
+    assert client.get(f"/api/events?jwt={token}", buffered=False).status_code == 401
+    app.config["EVENTS_TICKET_TTL"] = -1
+    response = client.get(f"/api/events?ticket={issued}", buffered=False)
+    assert response.status_code == 401
+    assert "expired" in response.get_json()["message"]
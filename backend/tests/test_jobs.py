@@ -0,0 +1,146 @@
+import json
+import time
+from datetime import datetime, timedelta
+import jobs
+from models import db, Job, JobStatusEnum, Task
+
+# Background jobs, run inline with JobWorker.run_once() (JOBS_WORKERS is 0 in tests).
+
+
+def run_jobs(app):
+    worker = app.extensions["jobs"]
+    while worker.run_once():
+        pass
+
+
+def job_body(client, headers, job_id):
+    response = client.get(f"/api/jobs/{job_id}", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_bad_csv_cell_fails_only_its_row(app, client, admin):
+    csv = ("title,project_id,assigned_to,status\n"
+           "First,1,2,TODO\n"
+           "Bad project,abc,,\n"
+           "Bad assignee,1,x,\n"
+           "Last,2,,DONE\n")
+    response = client.post("/api/tasks/import", data=csv, content_type="text/csv", headers=admin)
+    assert response.status_code == 202
+    run_jobs(app)
+
+    job = job_body(client, admin, response.get_json()["job_id"])
+    assert job["status"] == "Succeeded"
+    assert job["result"]["created"] == 2
+    assert job["result"]["errors"] == [
+        {"index": 1, "error": "'project_id' must be an integer id"},
+        {"index": 2, "error": "'assigned_to' must be an integer id"},
+    ]
+    with app.app_context():
+        titles = {title for (title,) in db.session.query(Task.title).filter(Task.title.in_(["First", "Last"]))}
+        assert titles == {"First", "Last"}
+
+
+def test_expired_jobs_are_pruned_with_their_files(app, client, admin, tmp_path):
+    response = client.post("/api/export/tasks", json={"format": "csv"}, headers=admin)
+    assert response.status_code == 202, response.get_json()
+    job_id = response.get_json()["job_id"]
+    run_jobs(app)
+    assert client.get(f"/api/jobs/{job_id}/download", headers=admin).status_code == 200
+    files = list((tmp_path / "results").iterdir())
+    assert [f.name for f in files] == [f"job-{job_id}-tasks.csv"]
+
+    with app.app_context():
+        # Kept while within JOBS_RETENTION
+        assert jobs.prune_finished(force=True) == 0
+        assert files[0].exists()
+        app.config["JOBS_RETENTION"] = 0
+        assert jobs.prune_finished(force=True) == 1
+    assert not files[0].exists()
+    assert client.get(f"/api/jobs/{job_id}", headers=admin).status_code == 404
+
+
+# Handlers for the retry tests; the payload says how the attempts behave
+@jobs.job_handler("test.flaky")
+def run_flaky(job, payload):
+    if job.attempt <= payload.get("failures", 0):
+        raise RuntimeError(f"attempt {job.attempt} failed")
+    if payload.get("bad_input"):
+        raise ValueError("bad input")
+    if payload.get("claimed_again"):
+        # Another worker took the job over as stale while this attempt ran
+        db.session.query(Job).filter(Job.id == job.id).update({Job.attempts: Job.attempts + 1})
+        db.session.commit()
+    return {"attempt": job.attempt}
+
+
+def enqueue(app, payload, max_attempts=None):
+    with app.app_context():
+        job_id = jobs.enqueue("test.flaky", 1, payload, max_attempts=max_attempts).id
+    run_jobs(app)
+    with app.app_context():
+        return db.session.get(Job, job_id)
+
+
+def test_failed_attempts_are_retried(app):
+    app.config["JOBS_RETRY_BACKOFF"] = 0
+    job = enqueue(app, {"failures": 2}, max_attempts=3)
+    assert job.status == JobStatusEnum.SUCCEEDED
+    assert job.attempts == 3
+    assert json.loads(job.result) == {"attempt": 3}
+    assert job.error is None
+
+
+def test_job_fails_once_out_of_attempts(app):
+    app.config["JOBS_RETRY_BACKOFF"] = 0
+    job = enqueue(app, {"failures": 5}, max_attempts=2)
+    assert job.status == JobStatusEnum.FAILED
+    assert job.attempts == 2
+    assert job.error == "attempt 2 failed"
+
+
+def test_bad_input_fails_without_retrying(app):
+    job = enqueue(app, {"bad_input": True}, max_attempts=3)
+    assert job.status == JobStatusEnum.FAILED
+    assert job.attempts == 1
+    assert job.error == "bad input"
+
+
+def test_attempt_that_lost_its_lease_cannot_finish_the_job(app):
+    job = enqueue(app, {"claimed_again": True})
+    # Left to the attempt that holds it now
+    assert job.status == JobStatusEnum.RUNNING
+    assert job.result is None
+
+
+def test_stale_jobs_are_requeued_then_failed(app):
+    app.config["JOBS_STALE_AFTER"] = 60
+    long_ago = datetime.utcnow() - timedelta(minutes=5)
+    with app.app_context():
+        retry = Job(kind="test.flaky", user_id=1, status=JobStatusEnum.RUNNING, attempts=1, max_attempts=3,
+                    heartbeat_at=long_ago)
+        spent = Job(kind="test.flaky", user_id=1, status=JobStatusEnum.RUNNING, attempts=3, max_attempts=3,
+                    heartbeat_at=long_ago)
+        alive = Job(kind="test.flaky", user_id=1, status=JobStatusEnum.RUNNING, attempts=1, max_attempts=3,
+                    heartbeat_at=datetime.utcnow())
+        db.session.add_all([retry, spent, alive])
+        db.session.commit()
+        jobs.requeue_stale()
+        assert [db.session.get(Job, j.id).status for j in (retry, spent, alive)] == \
+            [JobStatusEnum.QUEUED, JobStatusEnum.FAILED, JobStatusEnum.RUNNING]
+
+
+def test_lease_renews_only_its_own_attempt(app):
+    long_ago = datetime.utcnow() - timedelta(minutes=5)
+    with app.app_context():
+        job = Job(kind="test.flaky", user_id=1, status=JobStatusEnum.RUNNING, attempts=2, heartbeat_at=long_ago)
+        db.session.add(job)
+        db.session.commit()
+        with jobs.JobLease(db.engine, job.id, 1, 0.02):
+            time.sleep(0.1)
+        db.session.expire_all()
+        assert db.session.get(Job, job.id).heartbeat_at == long_ago
+        with jobs.JobLease(db.engine, job.id, 2, 0.02):
+            time.sleep(0.1)
+        db.session.expire_all()
+        assert db.session.get(Job, job.id).heartbeat_at > long_ago
@@ -0,0 +1,59 @@
+import pytest
+from metrics import count_queries
+from models import RoleEnum
+from tests.conftest import auth_headers, email_of
+
+# Statement budgets for the hot endpoints. A failure here means a change added
+# queries to a request (typically an N+1 over the rows it returns); raise a
+# budget only when the extra statement is deliberate. The role lookup counts,
+# since ROLE_CACHE_TTL is 0 in tests.
+
+LIST_BUDGETS = [
+    ("/api/tasks/", 2),
+    ("/api/tasks/?limit=20", 2),
+    ("/api/projects/", 1),
+    ("/api/projects/metrics", 2),
+    ("/api/users/", 1),
+    ("/api/comments/task/1", 1),
+    ("/api/dashboard", 4),
+]
+
+
+def queries(client, method, url, headers, **kwargs):
+    with count_queries() as counter:
+        response = client.open(url, method=method, headers=headers, **kwargs)
+    assert response.status_code < 300, response.get_json()
+    return counter.count
+
+
+def new_tasks(count):
+    return [{"title": f"New task {i}", "project_id": i % 5 + 1, "assigned_to": i % 20 + 1} for i in range(count)]
+
+
+@pytest.mark.parametrize("role", [RoleEnum.ADMIN, RoleEnum.MANAGER, RoleEnum.DEVELOPER])
+@pytest.mark.parametrize("url,budget", LIST_BUDGETS)
+def test_read_endpoint_query_budget(app, client, role, url, budget):
+    headers = auth_headers(client, email_of(app, role))
+    assert queries(client, "GET", url, headers) <= budget
+
+
+@pytest.mark.parametrize("url,_", LIST_BUDGETS)
+def test_read_query_count_does_not_grow_with_rows(client, admin, url, _):
+    before = queries(client, "GET", url, admin)
+    assert client.post("/api/tasks/bulk", json={"tasks": new_tasks(100)}, headers=admin).status_code == 201
+    assert queries(client, "GET", url, admin) == before
+
+
+def test_bulk_create_query_budget(client, admin):
+    few = queries(client, "POST", "/api/tasks/bulk", admin, json={"tasks": new_tasks(5)})
+    many = queries(client, "POST", "/api/tasks/bulk", admin, json={"tasks": new_tasks(100)})
+    assert few <= 4
+    assert many == few
+
+
+def test_bulk_status_query_budget(client, admin):
+    few = queries(client, "PATCH", "/api/tasks/bulk/status", admin, json={"ids": list(range(1, 6)), "status": "DONE"})
+    many = queries(client, "PATCH", "/api/tasks/bulk/status", admin,
+                   json={"ids": list(range(1, 101)), "status": "IN_PROGRESS"})
+    assert few <= 3
+    assert many == few
@@ -0,0 +1,62 @@
+import pytest
+from benchmarks.seed import SEED_PASSWORD, seed
+from app import init_db
+from models import db
+from tests.conftest import make_app
+
+# Login rate limits: only failed logins count, and the client address comes from
+# X-Forwarded-For only for the hops our own proxies added.
+
+
+@pytest.fixture
+def limited_app(tmp_path):
+    apps = []
+
+    def build(**config):
+        app = make_app(tmp_path, RATE_LIMIT_BACKEND="memory", LOGIN_LIMIT_PER_IP=3,
+                       LOGIN_LIMIT_PER_EMAIL=100, **config)
+        init_db(app)
+        with app.app_context():
+            seed(users=5, projects=1, tasks=0, comments=0)
+        apps.append(app)
+        return app
+
+    yield build
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+def login(client, password=SEED_PASSWORD, email="user1@example.com", forwarded=None):
+    headers = {"X-Forwarded-For": forwarded} if forwarded else {}
+    return client.post("/api/auth/login", json={"email": email, "password": password},
+                       headers=headers).status_code
+
+
+def test_successful_logins_are_not_counted(limited_app):
+    client = limited_app().test_client()
+    assert [login(client) for _ in range(5)] == [200] * 5
+
+
+def test_failed_logins_are_limited(limited_app):
+    client = limited_app().test_client()
+    assert [login(client, password="wrong") for _ in range(3)] == [401] * 3
+    assert login(client, password="wrong") == 429
+    assert login(client) == 429
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_limit(limited_app):
+    client = limited_app(TRUSTED_PROXY_COUNT=1).test_client()
+    # The proxy appends the real client address; the entries before it are the client's own
+    for n in range(3):
+        assert login(client, password="wrong", forwarded=f"10.0.0.{n}, 203.0.113.7") == 401
+    assert login(client, password="wrong", forwarded="10.9.9.9, 203.0.113.7") == 429
+    # Another real client behind the same proxy is not affected
+    assert login(client, forwarded="203.0.113.8") == 200
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(limited_app):
+    client = limited_app().test_client()
+    for n in range(3):
+        assert login(client, password="wrong", forwarded=f"203.0.113.{n}") == 401
+    assert login(client, forwarded="203.0.113.99") == 429
@@ -0,0 +1,114 @@
+import os
+import shutil
+import sqlite3
+import pytest
+from benchmarks.seed import seed
+from app import init_db
+from models import db, RoleEnum
+from tests.conftest import auth_headers, email_of, make_app
+
+# Read replica routing with two SQLite files: the replica starts as a copy of the
+# primary, and rows written afterwards only exist in the primary, so the number
+# of tasks a list returns shows which database answered.
+
+
+def task_count(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM task").fetchone()[0]
+
+
+def add_task_to_primary(path, title):
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO task (title, status, project_id, created_at, updated_at) "
+                     "VALUES (?, 'TODO', 1, '2024-06-01 00:00:00', '2024-06-01 00:00:00')", (title,))
+
+
+@pytest.fixture
+def databases(tmp_path):
+    primary, replica = tmp_path / "app.db", tmp_path / "replica.db"
+    setup = make_app(tmp_path)
+    init_db(setup)
+    with setup.app_context():
+        seed(users=20, projects=5, tasks=50, comments=50)
+        db.engine.dispose()
+    shutil.copy(primary, replica)
+    return primary, replica
+
+
+@pytest.fixture
+def app(tmp_path, databases):
+    _, replica = databases
+    # No health thread: the tests run checks themselves
+    app = make_app(tmp_path, SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{replica}"],
+                   REPLICA_PIN_SECONDS=60, REPLICA_HEALTH_INTERVAL=0)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+    for r in app.extensions["replicas"].replicas:
+        r.engine.dispose()
+
+
+def listed_tasks(client, headers):
+    response = client.get("/api/tasks/", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return len(response.get_json())
+
+
+@pytest.fixture
+def manager(app, client):
+    return auth_headers(client, email_of(app, RoleEnum.MANAGER))
+
+
+def test_reads_go_to_the_replica(client, manager, databases):
+    primary, replica = databases
+    add_task_to_primary(primary, "Only on the primary")
+    assert listed_tasks(client, manager) == task_count(replica) == task_count(primary) - 1
+
+
+def test_writes_go_to_the_primary(client, admin, databases):
+    primary, replica = databases
+    response = client.post("/api/tasks/", json={"title": "Written", "project_id": 1}, headers=admin)
+    assert response.status_code == 201, response.get_json()
+    assert task_count(primary) == 51
+    assert task_count(replica) == 50
+
+
+def test_writer_reads_are_pinned_to_the_primary(client, admin, manager, databases):
+    primary, _ = databases
+    assert listed_tasks(client, admin) == 50
+    assert client.post("/api/tasks/", json={"title": "Written", "project_id": 1}, headers=admin).status_code == 201
+    # The writer sees their own write; other users keep reading the replica
+    assert listed_tasks(client, admin) == task_count(primary) == 51
+    assert listed_tasks(client, manager) == 50
+
+
+def test_failed_write_does_not_pin(client, admin, databases):
+    response = client.post("/api/tasks/", json={"title": "Bad", "project_id": 1, "deadline": "not a date"}, headers=admin)
+    assert response.status_code >= 400
+    add_task_to_primary(databases[0], "Only on the primary")
+    assert listed_tasks(client, admin) == 50
+
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_down(app, client, manager, databases):
+    primary, replica = databases
+    replicas = app.extensions["replicas"]
+    add_task_to_primary(primary, "Only on the primary")
+
+    # A directory where the replica file was: connecting to it fails
+    replicas.replicas[0].engine.dispose()
+    os.remove(replica)
+    os.mkdir(replica)
+
+    # The failing read is retried on the primary and the replica is marked down
+    assert listed_tasks(client, manager) == task_count(primary)
+    assert not replicas.replicas[0].healthy
+    # Further reads skip it without trying
+    assert listed_tasks(client, manager) == task_count(primary)
+
+    # Back once a health check passes
+    os.rmdir(replica)
+    shutil.copy(primary, replica)
+    replicas.check_all()
+    assert replicas.replicas[0].healthy
+    add_task_to_primary(primary, "Second one on the primary")
+    assert listed_tasks(client, manager) == task_count(primary) - 1
@@ -0,0 +1,98 @@
+from models import db, RoleEnum, Task, TaskStatusEnum, User
+from tests.conftest import auth_headers, email_of
+
+# /api/sync: paging through changes with the opaque token, tombstones for rows
+# that are gone (or left a developer's set), and the settle horizon that holds
+# back rows whose transaction may not have committed yet.
+
+
+def sync(client, headers, token=None, limit=None):
+    query = {k: v for k, v in (("since", token), ("limit", limit)) if v is not None}
+    response = client.get("/api/sync", query_string=query, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def change_status(app, client, headers, task_id):
+    with app.app_context():
+        current = db.session.get(Task, task_id).status
+    status = "TODO" if current != TaskStatusEnum.TODO else "DONE"
+    response = client.patch(f"/api/tasks/{task_id}/status", json={"status": status}, headers=headers)
+    assert response.status_code == 200
+
+
+def sync_all(client, headers, token=None, limit=None):
+    # Follows next_token until has_more is false; (task ids per page, deleted, last token)
+    pages, deleted = [], []
+    while True:
+        body = sync(client, headers, token, limit)
+        pages.append([t["id"] for t in body["tasks"]])
+        deleted += body["deleted"]
+        token = body["next_token"]
+        if not body["has_more"]:
+            return pages, deleted, token
+
+
+def test_pages_cover_every_task_once(app, client, admin):
+    app.config["SYNC_SETTLE_SECONDS"] = 0
+    pages, deleted, token = sync_all(client, admin, limit=30)
+    ids = [task_id for page in pages for task_id in page]
+    assert len(pages) > 1
+    assert len(ids) == len(set(ids)) == 200
+    assert deleted == []
+    # Nothing changed since
+    assert sync(client, admin, token)["tasks"] == []
+
+
+def test_changes_and_deletes_after_the_token(app, client, admin):
+    app.config["SYNC_SETTLE_SECONDS"] = 0
+    _, _, token = sync_all(client, admin)
+    change_status(app, client, admin, 5)
+    assert client.delete("/api/tasks/6", headers=admin).status_code == 200
+
+    body = sync(client, admin, token)
+    assert [t["id"] for t in body["tasks"]] == [5]
+    assert [(d["entity"], d["id"]) for d in body["deleted"]] == [("task", 6)]
+    # Tombstones are not sent twice
+    assert sync(client, admin, body["next_token"])["deleted"] == []
+
+
+def test_reassigned_task_leaves_the_developers_set(app, client, admin):
+    app.config["SYNC_SETTLE_SECONDS"] = 0
+    email = email_of(app, RoleEnum.DEVELOPER)
+    developer = auth_headers(client, email)
+    pages, _, dev_token = sync_all(client, developer)
+    _, _, admin_token = sync_all(client, admin)
+    with app.app_context():
+        dev_id = db.session.query(User.id).filter(User.email == email).scalar()
+        task = db.session.query(Task).filter(Task.assigned_to == dev_id).order_by(Task.id).first()
+        assert task.id in pages[0]
+        task.assigned_to = dev_id + 1
+        db.session.commit()
+        task_id = task.id
+
+    dev_body = sync(client, developer, dev_token)
+    assert dev_body["tasks"] == []
+    assert [(d["entity"], d["id"]) for d in dev_body["deleted"]] == [("task", task_id)]
+    # Everyone else keeps the task and gets it as a change
+    admin_body = sync(client, admin, admin_token)
+    assert admin_body["deleted"] == []
+    assert [t["id"] for t in admin_body["tasks"]] == [task_id]
+
+
+def test_recent_changes_wait_for_the_settle_horizon(app, client, admin):
+    app.config["SYNC_SETTLE_SECONDS"] = 0
+    _, _, token = sync_all(client, admin)
+    app.config["SYNC_SETTLE_SECONDS"] = 60
+    change_status(app, client, admin, 7)
+    assert client.delete("/api/tasks/8", headers=admin).status_code == 200
+
+    held = sync(client, admin, token)
+    assert held["tasks"] == [] and held["deleted"] == []
+    # The token did not move past the held-back rows
+    assert held["next_token"] == token
+    # Once the window has passed they are sent
+    app.config["SYNC_SETTLE_SECONDS"] = 0
+    released = sync(client, admin, token)
+    assert [t["id"] for t in released["tasks"]] == [7]
+    assert [(d["entity"], d["id"]) for d in released["deleted"]] == [("task", 8)]
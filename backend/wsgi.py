@@ -0,0 +1,15 @@
+# WSGI entry point:
+#   gunicorn wsgi:application
+#   gunicorn --preload -w 4 wsgi:application
+#
+# With --preload the app is built once in the master and forked into the
+# workers. Building it opens no database connections or threads that a fork
+# could break (see app.py, dbpool.dispose_after_fork and logs.py), and freezing
+# the GC afterwards keeps the collector from touching, and so un-sharing, the
+# objects every worker inherited copy-on-write.
+import gc
+from app import create_app
+
+application = create_app()
+
+gc.freeze()
@@ -47,6 +47,9 @@ export const api = {
     }
   },
 
+  // Dashboard: projects, tasks and users in one request
+  getDashboard: () => fetch(`${BASE}/api/dashboard`, { headers: headers() }),
+
   // Users
   getUsers: () => fetch(`${BASE}/api/users/`, { headers: headers() }),
   
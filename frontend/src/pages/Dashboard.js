@@ -9,6 +9,7 @@ export default function Dashboard() {
   const [tasks, setTasks] = useState([]);
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadError, setLoadError] = useState("");
   const [stats, setStats] = useState({ total: 0, todo: 0, inProgress: 0, done: 0, overdue: 0 });
 
   // Modals
@@ -55,46 +56,34 @@ export default function Dashboard() {
   }, []);
 
   async function loadData() {
+    // Only the first load shows the loading screen; a failed reload keeps what is on screen
     try {
-      setLoading(true);
-      // Fetch all data in parallel
-      const [pRes, tRes, uRes] = await Promise.all([
-        api.getProjects(),
-        api.getTasks(),
-        api.getUsers(), // Admins and Managers need this
-      ]);
+      // Projects, tasks and users come back in one response
+      const res = await api.getDashboard();
+      if (!res.ok) {
+        const error = await res.json().catch(() => ({}));
+        throw new Error(error.message || error.msg || `HTTP ${res.status}`);
+      }
+      const data = await res.json();
 
       // Process Projects
-      if (pRes.ok) {
-        const pData = await pRes.json();
-        setProjects(Array.isArray(pData) ? pData : []);
-      } else {
-        setProjects([]);
-      }
+      setProjects(Array.isArray(data.projects) ? data.projects : []);
 
       // Process Users
-      if (uRes.ok) {
-        const uData = await uRes.json();
-        setUsers(Array.isArray(uData) ? uData : []);
-      } else {
-        setUsers([]);
-      }
-      
+      setUsers(Array.isArray(data.users) ? data.users : []);
+
       // Process Tasks & Stats
-      if (tRes.ok) {
-        const tData = await tRes.json();
-        const arr = Array.isArray(tData) ? tData : [];
-        setTasks(arr);
-        const total = arr.length;
-        const todo = arr.filter((t) => t.status === "To Do").length;
-        const inProgress = arr.filter((t) => t.status === "In Progress").length;
-        const done = arr.filter((t) => t.status === "Done").length;
-        const overdue = arr.filter((t) => t.is_overdue).length;
-        setStats({ total, todo, inProgress, done, overdue });
-      } else {
-        setTasks([]);
-      }
+      const arr = Array.isArray(data.tasks) ? data.tasks : [];
+      setTasks(arr);
+      const total = arr.length;
+      const todo = arr.filter((t) => t.status === "To Do").length;
+      const inProgress = arr.filter((t) => t.status === "In Progress").length;
+      const done = arr.filter((t) => t.status === "Done").length;
+      const overdue = arr.filter((t) => t.is_overdue).length;
+      setStats({ total, todo, inProgress, done, overdue });
+      setLoadError("");
     } catch (err) {
+      setLoadError(err.message);
       toast.error(`Error loading data: ${err.message}`);
     } finally {
       setLoading(false);
@@ -355,6 +344,13 @@ export default function Dashboard() {
     <div>
       <Navbar />
       <div className="dashboard">
+        {loadError && (
+          <div style={{ background: "#fee2e2", color: "#991b1b", padding: "12px 16px", borderRadius: "8px", marginBottom: "20px", display: "flex", justifyContent: "space-between", alignItems: "center" }}>
+            <span>Could not refresh the dashboard ({loadError}). Showing the last data loaded.</span>
+            <button className="btn-add" onClick={loadData}>Retry</button>
+          </div>
+        )}
+
         {/* Stats */}
         <div className="stats-grid" style={{ display: "grid", gridTemplateColumns: "repeat(auto-fit, minmax(200px, 1fr))", gap: "20px", marginBottom: "30px" }}>
           <div className="stat-card" style={{ background: "#dbeafe", padding: "20px", borderRadius: "10px" }}>